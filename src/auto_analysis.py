@@ -1,52 +1,91 @@
-import pandas as pd
-from ydata_profiling import ProfileReport
+from cache import load_csv
+from formats import split_format
+from profiler import MODES, profile_file, report_path as profile_report_path, describe_update, state_path, write_report
 import os
 import webbrowser
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+# Modes de rapport : profileur intégré (profiler.MODES) ou YData Profiling complet,
+# importé seulement s'il est demandé (plusieurs minutes sur les gros fichiers)
+REPORT_MODES = dict(MODES, ydata="YData Profiling")
 
-def run_auto_analysis(csv_path: str):
+
+def _ydata_report(csv_path: str):
+    from ydata_profiling import ProfileReport
+
+    # --- Chargement du dataset ---
+    df = load_csv(csv_path)
+
+    # Vérification de base
+    if df.empty:
+        raise ValueError("Le fichier CSV est vide.")
+
+    # --- Génération du rapport ---
+    profile = ProfileReport(
+        df,
+        title=f"Analyse automatique de {os.path.basename(csv_path)}",
+        explorative=True,
+        minimal=False,
+        correlations={"auto": {"calculate": True}},
+    )
+
+    # --- Enregistrement ---
+    report_path = split_format(csv_path)[0] + "_report.html"
+    profile.to_file(report_path)
+
+    n_numeric = len(df.select_dtypes(include=["number"]).columns)
+    summary = {"n_rows": df.shape[0], "n_cols": df.shape[1], "n_numeric": n_numeric,
+               "n_categorical": df.shape[1] - n_numeric, "mode": "ydata", "alerts": []}
+    return report_path, summary
+
+
+def generate_report(csv_path: str, mode: str = "sampled", cancel=None, progress=None):
     """
-    Génère une analyse automatique complète via YData Profiling.
-    Crée un rapport HTML interactif et propose de l’ouvrir.
+    Génère le rapport HTML du fichier (sans interface : peut tourner dans un thread de travail).
+    mode : "minimal", "sampled" ou "full" (profileur intégré, cf. profiler.MODES) ou "ydata".
+    Retourne (chemin du rapport, résumé).
+    """
+    if mode == "ydata":
+        return _ydata_report(csv_path)
+
+    # les statistiques fusionnables sont gardées à côté du rapport : la prochaine analyse
+    # ne relit que les lignes ajoutées ou les colonnes modifiées
+    report_path = profile_report_path(csv_path)
+    profile = profile_file(csv_path, mode, cancel=cancel, progress=progress, state_file=state_path(report_path))
+    if profile["n_rows"] == 0:
+        raise ValueError("Le fichier CSV est vide.")
+    write_report(profile, report_path)
+
+    n_numeric = sum(col["kind"] == "numérique" for col in profile["columns"])
+    summary = {"n_rows": profile["n_rows"], "n_cols": profile["n_cols"], "n_numeric": n_numeric,
+               "n_categorical": profile["n_cols"] - n_numeric, "mode": mode,
+               "elapsed": profile["elapsed"], "alerts": profile["alerts"], "update": profile["update"]}
+    return report_path, summary
+
+
+def run_auto_analysis(csv_path: str, mode: str = "sampled"):
+    """
+    Génère une analyse automatique du fichier (profileur intégré ou YData Profiling).
+    Crée un rapport HTML et propose de l’ouvrir.
     """
     try:
-        # --- Chargement du dataset ---
-        df = pd.read_csv(csv_path)
-
-        # Vérification de base
-        if df.empty:
-            messagebox.showwarning("Avertissement", "Le fichier CSV est vide.")
-            return
-
-        # --- Génération du rapport ---
-        profile = ProfileReport(
-            df,
-            title=f"Analyse automatique de {os.path.basename(csv_path)}",
-            explorative=True,
-            minimal=False,
-            correlations={"auto": {"calculate": True}},
-        )
-
-        # --- Enregistrement ---
-        report_path = os.path.splitext(csv_path)[0] + "_report.html"
-        profile.to_file(report_path)
+        report_path, summary = generate_report(csv_path, mode)
 
         # --- Fenêtre de résumé ---
-        show_summary_window(report_path, df)
+        show_summary_window(report_path, summary)
 
     except Exception as e:
         messagebox.showerror("Erreur", f"Impossible d’exécuter l’analyse automatique :\n{e}")
 
 
-def show_summary_window(report_path: str, df: pd.DataFrame):
+def show_summary_window(report_path: str, summary: dict):
     """
     Affiche un résumé de l’analyse et propose d’ouvrir le rapport HTML.
     """
     win = tk.Toplevel()
-    win.title("Rapport automatique - YData Profiling")
-    win.geometry("500x350")
+    win.title(f"Rapport automatique - {REPORT_MODES[summary['mode']]}")
+    win.geometry("500x380")
 
     ttk.Label(
         win,
@@ -59,13 +98,15 @@ def show_summary_window(report_path: str, df: pd.DataFrame):
     stats_frame = ttk.Frame(win)
     stats_frame.pack(pady=10)
 
-    ttk.Label(stats_frame, text=f"Nombre de lignes : {df.shape[0]}").pack(anchor="w", pady=2)
-    ttk.Label(stats_frame, text=f"Nombre de colonnes : {df.shape[1]}").pack(anchor="w", pady=2)
-
-    num_cols = df.select_dtypes(include=["int64", "float64"]).columns
-    cat_cols = df.select_dtypes(include=["object", "category"]).columns
-    ttk.Label(stats_frame, text=f"Variables numériques : {len(num_cols)}").pack(anchor="w", pady=2)
-    ttk.Label(stats_frame, text=f"Variables catégorielles : {len(cat_cols)}").pack(anchor="w", pady=2)
+    ttk.Label(stats_frame, text=f"Nombre de lignes : {summary['n_rows']}").pack(anchor="w", pady=2)
+    ttk.Label(stats_frame, text=f"Nombre de colonnes : {summary['n_cols']}").pack(anchor="w", pady=2)
+    ttk.Label(stats_frame, text=f"Variables numériques : {summary['n_numeric']}").pack(anchor="w", pady=2)
+    ttk.Label(stats_frame, text=f"Variables catégorielles : {summary['n_categorical']}").pack(anchor="w", pady=2)
+    if "elapsed" in summary:
+        ttk.Label(stats_frame, text=f"Durée : {summary['elapsed']:.1f} s").pack(anchor="w", pady=2)
+        ttk.Label(stats_frame, text=f"Mise à jour : {describe_update(summary['update'])}").pack(anchor="w", pady=2)
+    if summary["alerts"]:
+        ttk.Label(stats_frame, text=f"⚠️ Alertes : {len(summary['alerts'])}").pack(anchor="w", pady=2)
 
     ttk.Label(
         win,
@@ -0,0 +1,119 @@
+# bench_startup.py
+"""
+Budget de temps de démarrage (écran de connexion + fenêtre principale) :
+
+    python bench_startup.py            # mesure, compare à la référence, code 1 si régression
+    python bench_startup.py --update   # enregistre la mesure comme nouvelle référence
+
+Les imports sont mesurés dans un processus neuf avec python -X importtime
+(temps cumulé par module, médiane de plusieurs lancements).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+BUDGET_FILE = os.path.join(SRC_DIR, "startup_budget.json")
+
+# Modules chargés avant que la fenêtre principale ne s'affiche
+STARTUP_MODULES = ["main", "auth_window", "main_window"]
+
+# Bibliothèques qui ne doivent être importées qu'à la demande (ou par le préchargement)
+FORBIDDEN_AT_STARTUP = ["pandas", "numpy", "sklearn", "scipy", "matplotlib", "seaborn", "ydata_profiling"]
+
+RUNS = 5
+TOLERANCE = 0.5          # +50 % par rapport à la référence...
+MIN_SLACK_US = 20_000    # ...et au moins 20 ms, pour absorber le bruit de mesure
+
+
+# Un module dont une dépendance manque (ex : mysql-connector) est signalé puis ignoré
+IMPORT_SCRIPT = """
+import sys
+for name in sys.argv[1:]:
+    try:
+        __import__(name)
+    except ImportError as e:
+        print(f"skip: {name} ({e})", file=sys.stderr)
+"""
+
+
+def measure_once(skipped: set) -> dict:
+    """{module: temps cumulé en µs} pour un lancement de python -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT, *STARTUP_MODULES],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("skip: "):
+            skipped.add(line[len("skip: "):])
+            continue
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+
+    # import interrompu : temps partiel, non comparable
+    for message in skipped:
+        times.pop(message.split(" ", 1)[0], None)
+    return times
+
+
+def measure(runs: int = RUNS) -> dict:
+    skipped = set()
+    samples = [measure_once(skipped) for _ in range(runs)]
+    for message in sorted(skipped):
+        print(f"⚠️ module ignoré : {message}", file=sys.stderr)
+    names = set.intersection(*(set(s) for s in samples))
+    return {name: int(statistics.median(s[name] for s in samples)) for name in names}
+
+
+def check(times: dict, budget: dict) -> list:
+    """Liste des problèmes (vide si le démarrage respecte le budget)."""
+    problems = []
+    for lib in FORBIDDEN_AT_STARTUP:
+        if lib in times:
+            problems.append(f"{lib} est importé au démarrage")
+
+    for name, reference in budget.get("modules", {}).items():
+        limit = max(reference * (1 + TOLERANCE), reference + MIN_SLACK_US)
+        if times.get(name, 0) > limit:
+            problems.append(f"{name} : {times[name] / 1000:.1f} ms (référence {reference / 1000:.1f} ms)")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Budget de temps d'import au démarrage.")
+    parser.add_argument("--update", action="store_true", help="enregistrer la mesure comme référence")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args(argv)
+
+    times = measure(args.runs)
+    for name, us in sorted(times.items(), key=lambda item: -item[1])[:15]:
+        print(f"{us / 1000:9.1f} ms  {name}")
+
+    if args.update:
+        budget = {"modules": {name: times[name] for name in STARTUP_MODULES if name in times}}
+        with open(BUDGET_FILE, "w", encoding="utf-8") as f:
+            json.dump(budget, f, indent=2)
+        print(f"Référence enregistrée : {BUDGET_FILE}")
+        return 0
+
+    budget = {}
+    if os.path.exists(BUDGET_FILE):
+        with open(BUDGET_FILE, encoding="utf-8") as f:
+            budget = json.load(f)
+
+    problems = check(times, budget)
+    for problem in problems:
+        print(f"✘ {problem}", file=sys.stderr)
+    if not problems:
+        print("✔ Démarrage dans le budget")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
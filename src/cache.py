@@ -0,0 +1,215 @@
+# cache.py
+import hashlib
+import json
+import os
+import pandas as pd
+
+from formats import decompressed, is_columnar, is_plain_csv, read_frame
+from progress import CountingReader
+from schema import apply_schema, missing_counts as count_missing, optimize, read_options
+
+# Copie binaire (Parquet si pyarrow est disponible) de chaque CSV déjà lu, dans le dossier data/
+# de l'application (à côté de ce fichier), quel que soit le dossier courant (CLI, tests)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", ".cache")
+
+# Budget disque du cache : au-delà, les entrées les moins récemment utilisées sont supprimées
+CACHE_BUDGET = 2 * 1024 ** 3
+
+# En dessous de cette taille, relire le CSV est aussi rapide que le cache
+MIN_CACHE_SIZE = 1024 ** 2
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = "parquet"
+except ImportError:
+    CACHE_FORMAT = "pickle"
+
+
+# ---------------------------
+# Clés du cache
+# ---------------------------
+def _path_key(path: str) -> str:
+    return hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+
+
+def _version_key(path: str) -> str:
+    """Préfixe des entrées associées à (chemin, mtime, taille) du CSV."""
+    st = os.stat(path)
+    version = hashlib.sha1(f"{st.st_mtime_ns}:{st.st_size}".encode()).hexdigest()[:12]
+    return f"{_path_key(path)}_{version}"
+
+
+def _cache_path(path: str) -> str:
+    """Fichier de cache associé à (chemin, mtime, taille) du CSV."""
+    return os.path.join(CACHE_DIR, f"{_version_key(path)}.{CACHE_FORMAT}")
+
+
+def _schema_path(path: str) -> str:
+    """Schéma compact (types inférés, cf. schema.py) de cette version du CSV."""
+    return os.path.join(CACHE_DIR, f"{_version_key(path)}.schema.json")
+
+
+def _missing_path(path: str) -> str:
+    """Valeurs manquantes par colonne de cette version du CSV (cf. missing_counts)."""
+    return os.path.join(CACHE_DIR, f"{_version_key(path)}.missing.json")
+
+
+def _read_cached(cache_file: str) -> pd.DataFrame:
+    if CACHE_FORMAT == "parquet":
+        return pd.read_parquet(cache_file)
+    return pd.read_pickle(cache_file)
+
+
+def _write_cached(df: pd.DataFrame, cache_file: str):
+    tmp = cache_file + ".tmp"
+    if CACHE_FORMAT == "parquet":
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_pickle(tmp)
+    os.replace(tmp, cache_file)
+
+
+def load_schema(path: str):
+    """Schéma mémorisé pour la version actuelle du CSV, ou None."""
+    try:
+        with open(_schema_path(path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_schema(path: str, schema: dict):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        invalidate(path, keep=_version_key(path))  # supprime les anciennes versions de ce fichier
+        with open(_schema_path(path), "w", encoding="utf-8") as f:
+            json.dump(schema, f)
+    except OSError:
+        pass  # dossier en lecture seule : le schéma sera inféré à nouveau
+
+
+# ---------------------------
+# API publique
+# ---------------------------
+def _read_file(path: str, progress=None) -> pd.DataFrame:
+    """
+    pd.read_csv(path), avec les octets lus signalés à progress (étape « lecture »),
+    en types compacts (schema.py) : le schéma inféré à la première lecture est
+    mémorisé et passé directement à read_csv aux lectures suivantes.
+    Les CSV compressés (.csv.gz, .csv.zst) sont décompressés à la volée ; les fichiers
+    en colonnes (Parquet, Feather, dossier .parts) sont lus directement (formats.py).
+    """
+    schema = load_schema(path)
+    options = read_options(schema) if schema else {}
+    if is_columnar(path):
+        if progress is not None:
+            progress.stage("lecture")
+        df = read_frame(path)
+    elif progress is None and is_plain_csv(path):
+        df = pd.read_csv(path, **options)
+    else:
+        if progress is not None:
+            progress.stage("lecture", total_bytes=os.path.getsize(path))
+        with open(path, "rb") as fh:
+            raw = fh if progress is None else CountingReader(fh, progress)
+            df = pd.read_csv(decompressed(path, raw), **options)
+
+    if schema is not None:
+        return apply_schema(df, schema)
+    df, schema = optimize(df)
+    _save_schema(path, schema)
+    return df
+
+
+def load_csv(path: str, progress=None) -> pd.DataFrame:
+    """
+    Équivalent de pd.read_csv(path) passant par le cache binaire.
+    Le cache est invalidé automatiquement si le CSV change (mtime ou taille).
+    progress : progress.Progress facultatif (octets lus, ou lecture du cache).
+    Les colonnes sont converties en types compacts sans perte (schema.py), conservés par le cache.
+    Accepte aussi les autres formats de formats.py (les fichiers en colonnes ne passent pas par le cache).
+    """
+    if is_columnar(path) or os.path.getsize(path) < MIN_CACHE_SIZE:
+        return _read_file(path, progress)
+
+    cache_file = _cache_path(path)
+    if os.path.exists(cache_file):
+        try:
+            if progress is not None:
+                progress.stage("lecture (cache)")
+            df = _read_cached(cache_file)
+            schema = load_schema(path)
+            if schema:
+                df = apply_schema(df, schema)  # Parquet relit les chaînes pyarrow en string[python]
+            os.utime(cache_file)  # marque l'entrée comme récemment utilisée (LRU)
+            return df
+        except Exception:
+            os.remove(cache_file)  # entrée corrompue : on relit le CSV
+
+    df = _read_file(path, progress)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        invalidate(path, keep=_version_key(path))  # supprime les anciennes versions de ce fichier
+        _write_cached(df, cache_file)
+        evict()
+    except Exception:
+        # colonnes non sérialisables (types mixtes...) : on se passe du cache
+        if os.path.exists(cache_file + ".tmp"):
+            os.remove(cache_file + ".tmp")
+    return df
+
+
+def missing_counts(path: str, df: pd.DataFrame) -> pd.Series:
+    """
+    Valeurs manquantes par colonne (NaN et jetons « ? », « » — schema.missing_counts)
+    du DataFrame df lu depuis path : calculées une fois par version du CSV, puis relues.
+    """
+    columns = [str(col) for col in df.columns]
+    try:
+        with open(_missing_path(path), encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached["rows"] == len(df) and cached["columns"] == columns:
+            return pd.Series(cached["counts"], index=df.columns, dtype="int64")
+    except (OSError, ValueError, KeyError):
+        pass
+
+    counts = count_missing(df)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_missing_path(path), "w", encoding="utf-8") as f:
+            json.dump({"rows": len(df), "columns": columns, "counts": counts.tolist()}, f)
+    except OSError:
+        pass  # dossier en lecture seule : les comptes seront recalculés
+    return counts
+
+
+def invalidate(path: str, keep: str = None):
+    """Supprime toutes les entrées du cache associées à ce chemin (sauf celles de la version keep)."""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    prefix = _path_key(path) + "_"
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(prefix) and not (keep and name.startswith(keep + ".")):
+            os.remove(os.path.join(CACHE_DIR, name))
+
+
+def evict(budget: int = CACHE_BUDGET):
+    """Supprime les entrées les moins récemment utilisées jusqu'à repasser sous le budget."""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        full = os.path.join(CACHE_DIR, name)
+        st = os.stat(full)
+        entries.append((st.st_mtime, st.st_size, full))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, full in sorted(entries):
+        if total <= budget:
+            break
+        os.remove(full)
+        total -= size
+
+
+def clear_cache():
+    evict(budget=0)
@@ -0,0 +1,341 @@
+# cli.py
+"""
+Exécution des traitements sans interface graphique (tâches planifiées, scripts) :
+
+    python -m cli preprocess missing "data/*.csv" --workers 4
+    python -m cli preprocess onehot data/big.csv --format parquet
+    python -m cli analyze "data/*.csv" --apply
+    python -m cli fuse data/a.csv data/b.csv
+    python -m cli profile "data/*.csv" --mode minimal
+    python -m cli fit data/train.csv missing onehot standardize -o model.pipeline.json
+    python -m cli apply model.pipeline.json "data/new_*.csv" --workers 4
+
+Aucun import de tkinter, seaborn ou ydata_profiling ; pandas et scikit-learn ne sont
+importés qu'au moment d'exécuter une commande (démarrage et --help immédiats).
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from formats import DEFAULT_FORMAT, FORMATS, split_format
+
+# Même liste que operations.PREPROCESSING_ACTIONS (recopiée pour ne pas importer pandas au démarrage)
+ACTIONS = ["missing", "onehot", "label", "normalize", "standardize", "variance", "outliers"]
+
+# Intervalle minimal entre deux lignes de progression d'un même fichier (s)
+PROGRESS_INTERVAL = 2.0
+
+
+# ---------------------------
+# Utilitaires
+# ---------------------------
+def expand_paths(patterns):
+    """Développe fichiers et motifs glob, sans doublons, dans l'ordre donné."""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or ([pattern] if os.path.exists(pattern) else [])
+        if not matches:
+            raise SystemExit(f"Aucun fichier ne correspond à : {pattern}")
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+
+def make_out_dir(out_dir):
+    """Crée le dossier de sortie (-o) s'il n'existe pas encore, avant de lancer les fichiers."""
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+
+def print_progress(path: str, event):
+    """Une ligne de progression sur stderr (événement progress.ProgressEvent)."""
+    percent = f"{event.fraction:4.0%} " if event.fraction is not None else ""
+    print(f"    ↳ {path} : {percent}{event.describe()}", file=sys.stderr, flush=True)
+
+
+class _Printer:
+    """File d'événements du mode série : chaque événement est affiché immédiatement."""
+
+    def put(self, item):
+        print_progress(*item)
+
+
+def file_progress(path: str, events):
+    """Progress d'un fichier dont les événements partent dans events (file ou _Printer)."""
+    if events is None:
+        return None
+    from progress import Progress
+    return Progress(lambda event: events.put((path, event)), min_interval=PROGRESS_INTERVAL)
+
+
+def run_files(func, paths, workers: int, progress: bool = True, **kwargs) -> int:
+    """
+    Applique func(path, events=…, **kwargs) à chaque fichier (pool de processus si workers > 1)
+    et affiche la progression sur stderr : une ligne par fichier terminé, et les événements
+    de progression (étape, octets lus, ETA) que func envoie dans events.
+    Retourne le nombre d'échecs.
+    """
+    total = len(paths)
+    failures = 0
+    start = time.perf_counter()
+
+    def report(done, path, message, ok):
+        status = "✔" if ok else "✘"
+        elapsed = time.perf_counter() - start
+        print(f"[{done}/{total}] {status} {path} : {message} ({elapsed:.1f}s)", file=sys.stderr, flush=True)
+
+    if workers <= 1 or total == 1:
+        events = _Printer() if progress else None
+        for done, path in enumerate(paths, 1):
+            try:
+                report(done, path, func(path, events=events, **kwargs), True)
+            except Exception as e:
+                failures += 1
+                report(done, path, e, False)
+        return failures
+
+    # les workers envoient leurs événements par une file partagée, vidée ici entre deux attentes
+    import multiprocessing
+    import queue
+
+    manager = multiprocessing.Manager() if progress else None
+    events = manager.Queue() if progress else None
+
+    def drain():
+        while events is not None:
+            try:
+                print_progress(*events.get_nowait())
+            except queue.Empty:
+                return
+
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, total)) as executor:
+            futures = {executor.submit(func, path, events=events, **kwargs): path for path in paths}
+            pending = set(futures)
+            done = 0
+            while pending:
+                finished, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                drain()
+                for future in finished:
+                    done += 1
+                    try:
+                        report(done, futures[future], future.result(), True)
+                    except Exception as e:
+                        failures += 1
+                        report(done, futures[future], e, False)
+    finally:
+        if manager is not None:
+            manager.shutdown()
+    return failures
+
+
+# ---------------------------
+# Traitements par fichier (exécutés dans les workers)
+# ---------------------------
+def preprocess_file(path: str, action: str, out_dir: str = None, n_jobs: int = 1, fmt: str = None,
+                    events=None) -> str:
+    from operations import output_path, run_preprocessing
+
+    out_path = output_path(path, action, out_dir, fmt)
+    if not run_preprocessing(path, action, out_path, n_jobs=n_jobs, progress=file_progress(path, events)):
+        return "aucune valeur manquante, rien à faire"
+    return f"→ {out_path}"
+
+
+def apply_file(path: str, model: str, out_dir: str = None, chunksize: int = None, fmt: str = None,
+               events=None) -> str:
+    from fitted import FittedPipeline
+    from operations import apply_pipeline, output_path
+
+    out_path = output_path(path, "_".join(FittedPipeline.load(model).actions), out_dir, fmt)
+    n_rows = apply_pipeline(model, path, out_path, chunksize, progress=file_progress(path, events))
+    return f"{n_rows} lignes → {out_path}"
+
+
+def analyze_file(path: str, apply: bool = False, out_dir: str = None, n_jobs: int = 1, fmt: str = None,
+                 events=None) -> str:
+    from cache import load_csv
+    from pipeline import PreprocessingPipeline
+    from smart_preprocessing import analyze_dataset
+    from writers import write_frame
+
+    df = load_csv(path, progress=file_progress(path, events))
+    suggestions, summary = analyze_dataset(df, n_jobs=n_jobs)
+    lines = [f"{len(suggestions)} suggestion(s)" + (" (échantillon)" if summary.get("sampled") else "")]
+    for s in suggestions:
+        lines.append(f"    - {s.get('type', '')} : {s.get('action', '')} [{s.get('confidence', 1.0):.0%}]")
+
+    if apply:
+        pipeline = PreprocessingPipeline.from_suggestions(suggestions)
+        base, ext = split_format(os.path.basename(path))
+        out_path = os.path.join(out_dir or os.path.dirname(path), f"{base}_smart{FORMATS[fmt] if fmt else ext}")
+        write_frame(pipeline.run(df), out_path)
+        lines.append(f"    → {out_path} ({' → '.join(pipeline.steps) or 'aucune étape'})")
+    return "\n".join(lines)
+
+
+def profile_file(path: str, mode: str = "sampled", out_dir: str = None, rebuild: bool = False, n_jobs: int = 1,
+                 events=None) -> str:
+    from profiler import describe_update, profile_file as build_profile, report_path, state_path, write_report
+
+    out_path = report_path(path, out_dir)
+    state_file = state_path(out_path)
+    if rebuild and os.path.exists(state_file):
+        os.remove(state_file)
+    profile = build_profile(path, mode, progress=file_progress(path, events), state_file=state_file, n_jobs=n_jobs)
+    write_report(profile, out_path)
+    alerts = f", {len(profile['alerts'])} alerte(s)" if profile["alerts"] else ""
+    return (f"{profile['n_rows']} lignes × {profile['n_cols']} colonnes{alerts}, "
+            f"mise à jour {describe_update(profile['update'])} → {out_path}")
+
+
+# ---------------------------
+# Commandes
+# ---------------------------
+def cmd_preprocess(args) -> int:
+    paths = expand_paths(args.files)
+    make_out_dir(args.out_dir)
+    return run_files(preprocess_file, paths, args.workers, progress=args.progress,
+                     action=args.action, out_dir=args.out_dir, n_jobs=args.n_jobs, fmt=args.format)
+
+
+def cmd_analyze(args) -> int:
+    paths = expand_paths(args.files)
+    make_out_dir(args.out_dir)
+    return run_files(analyze_file, paths, args.workers, progress=args.progress,
+                     apply=args.apply, out_dir=args.out_dir, n_jobs=args.n_jobs, fmt=args.format)
+
+
+def cmd_profile(args) -> int:
+    paths = expand_paths(args.files)
+    make_out_dir(args.out_dir)
+    return run_files(profile_file, paths, args.workers, progress=args.progress,
+                     mode=args.mode, out_dir=args.out_dir, rebuild=args.rebuild, n_jobs=args.n_jobs)
+
+
+def cmd_fit(args) -> int:
+    from fitted import pipeline_path
+    from operations import fit_pipeline
+
+    progress = file_progress(args.file, _Printer()) if args.progress else None
+    pipeline = fit_pipeline(args.file, args.actions, n_jobs=args.n_jobs, progress=progress)
+    for step in pipeline.steps:
+        if step.action == "label":
+            step.unseen = args.unseen
+    output = args.output or pipeline_path(args.file)
+    make_out_dir(os.path.dirname(output))
+    pipeline.save(output)
+    print(f"Pipeline ajusté ({' → '.join(pipeline.actions) or 'aucune étape'}) → {output}")
+    return 0
+
+
+def cmd_apply(args) -> int:
+    paths = expand_paths(args.files)
+    make_out_dir(args.out_dir)
+    return run_files(apply_file, paths, args.workers, progress=args.progress,
+                     model=args.model, out_dir=args.out_dir, chunksize=args.chunksize, fmt=args.format)
+
+
+def cmd_fuse(args) -> int:
+    from datetime import datetime
+    from fuse_engine import FusionError, describe_estimate, fuse_files
+
+    ext = FORMATS[args.format or DEFAULT_FORMAT]
+    output = args.output or os.path.join("data", f"fused_dataset_{datetime.now():%Y%m%d_%H%M%S}{ext}")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+
+    def confirm(best):
+        print(f"⚠️ Jointure volumineuse :\n{describe_estimate(best)}", file=sys.stderr)
+        if not args.force:
+            print("Relancer avec --force pour l'exécuter quand même.", file=sys.stderr)
+        return args.force
+
+    try:
+        result = fuse_files(args.file1, args.file2, output, confirm=confirm)
+    except FusionError as e:
+        print(f"Erreur de fusion : {e}", file=sys.stderr)
+        return 1
+    if result is None:
+        return 1
+    print(f"Fusion {result['fusion_type']} → {output} ({result['n_rows']} lignes × {result['n_cols']} colonnes)")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Prétraitement de datasets CSV en ligne de commande.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_format_option(p, default_help="celui du fichier d'entrée"):
+        p.add_argument("--format", choices=list(FORMATS),
+                       help=f"format des fichiers produits (par défaut : {default_help}) ; "
+                            "csv.zst, parquet, feather et parts demandent pyarrow")
+
+    def add_batch_options(p):
+        p.add_argument("files", nargs="+", help="fichiers CSV ou motifs glob (ex : 'data/*.csv')")
+        p.add_argument("-o", "--out-dir", help="dossier de sortie (par défaut : celui de chaque fichier)")
+        p.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                       help="nombre de fichiers traités en parallèle")
+        p.add_argument("--n-jobs", type=int, default=1, help="processus par fichier pour les statistiques par colonne")
+        p.add_argument("--no-progress", dest="progress", action="store_false",
+                       help="n'afficher que la fin de chaque fichier (pas les étapes ni l'ETA)")
+
+    p = sub.add_parser("preprocess", help="appliquer un prétraitement à un ou plusieurs fichiers")
+    p.add_argument("action", choices=ACTIONS)
+    add_batch_options(p)
+    add_format_option(p)
+    p.set_defaults(func=cmd_preprocess)
+
+    p = sub.add_parser("analyze", help="analyse intelligente (suggestions de prétraitement)")
+    add_batch_options(p)
+    p.add_argument("--apply", action="store_true", help="appliquer les suggestions (fichier *_smart.csv)")
+    add_format_option(p)
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser("profile", help="rapport de profiling HTML (minimal, échantillonné ou complet)")
+    add_batch_options(p)
+    p.add_argument("--mode", choices=["minimal", "sampled", "full"], default="sampled",
+                   help="minimal : statistiques en un passage ; sampled : + échantillon (corrélations, "
+                        "interactions) ; full : tout le fichier en mémoire, statistiques exactes "
+                        "réparties sur --n-jobs processus")
+    p.add_argument("--rebuild", action="store_true",
+                   help="ignorer l'état sauvegardé (*_report.state) et tout recalculer")
+    p.set_defaults(func=cmd_profile)
+
+    p = sub.add_parser("fit", help="ajuster une suite de prétraitements et enregistrer ses paramètres (JSON)")
+    p.add_argument("file", help="fichier CSV d'apprentissage")
+    p.add_argument("actions", nargs="+", choices=ACTIONS, metavar="action",
+                   help=f"prétraitements appliqués dans l'ordre ({', '.join(ACTIONS)})")
+    p.add_argument("-o", "--output", help="pipeline produit (par défaut : <fichier>.pipeline.json)")
+    p.add_argument("--unseen", choices=["unknown", "error"], default="unknown",
+                   help="label : modalité absente du vocabulaire → code -1 (unknown) ou échec (error)")
+    p.add_argument("--n-jobs", type=int, default=1, help="processus pour les statistiques par colonne")
+    p.add_argument("--no-progress", dest="progress", action="store_false", help="ne pas afficher les étapes")
+    p.set_defaults(func=cmd_fit)
+
+    p = sub.add_parser("apply", help="réappliquer un pipeline ajusté (sans recalculer de statistiques)")
+    p.add_argument("model", help="pipeline ajusté (*.pipeline.json, produit par fit ou par preprocess)")
+    add_batch_options(p)
+    p.add_argument("--chunksize", type=int, help="lignes lues par morceau")
+    add_format_option(p)
+    p.set_defaults(func=cmd_apply)
+
+    p = sub.add_parser("fuse", help="fusionner deux fichiers (concaténation ou jointure)")
+    p.add_argument("file1")
+    p.add_argument("file2")
+    p.add_argument("-o", "--output", help="fichier de sortie (par défaut : data/fused_dataset_<date>.csv)")
+    p.add_argument("--force", action="store_true", help="exécuter une jointure volumineuse sans confirmation")
+    add_format_option(p, "csv ; ignoré avec -o, dont l'extension décide")
+    p.set_defaults(func=cmd_fuse)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return 1 if args.func(args) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
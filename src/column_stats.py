@@ -0,0 +1,84 @@
+# column_stats.py
+import numpy as np
+import pandas as pd
+
+from parallel import column_map, resolve_n_jobs
+from schema import numeric_columns
+
+IQR_FACTOR = 1.5
+
+
+def _quartiles(series: pd.Series):
+    return series.quantile([0.25, 0.75]).to_numpy()
+
+
+class ColumnStats:
+    """
+    Quartiles des colonnes numériques, calculés une seule fois et partagés
+    entre la winsorisation (handle_outliers) et la suggestion « outliers »
+    de analyze_dataset.
+    - from_frame : quantiles exacts, en un seul appel vectorisé sur toutes les colonnes
+    - from_accumulators : quantiles approchés (esquisses KLL) issus de la lecture
+      par morceaux de streaming.collect_stats, pour les fichiers trop gros pour la mémoire
+    """
+
+    def __init__(self, q1: pd.Series, q3: pd.Series, approximate: bool = False):
+        self.q1 = q1.astype("float64")
+        self.q3 = q3.astype("float64")
+        self.approximate = approximate
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, n_jobs: int = 1):
+        num_df = df[numeric_columns(df)]
+        if num_df.empty:
+            empty = pd.Series(dtype="float64")
+            return cls(empty, empty)
+        if resolve_n_jobs(n_jobs) > 1:
+            quartiles = pd.DataFrame(column_map(_quartiles, num_df, n_jobs=n_jobs), index=[0.25, 0.75])
+        else:
+            quartiles = num_df.quantile([0.25, 0.75])
+        return cls(quartiles.loc[0.25], quartiles.loc[0.75])
+
+    @classmethod
+    def from_accumulators(cls, stats: dict):
+        """À partir du premier passage de streaming.collect_stats (esquisses KLL)."""
+        cols = [col for col, acc in stats.items() if acc.is_numeric and acc.n_numeric > 0]
+        quartiles = np.array([stats[col].quantile_sketch.quantile([0.25, 0.75]) for col in cols]).reshape(-1, 2)
+        return cls(pd.Series(quartiles[:, 0], index=cols), pd.Series(quartiles[:, 1], index=cols), approximate=True)
+
+    @property
+    def columns(self):
+        return self.q1.index
+
+    @property
+    def iqr(self):
+        return self.q3 - self.q1
+
+    @property
+    def lower(self):
+        return self.q1 - IQR_FACTOR * self.iqr
+
+    @property
+    def upper(self):
+        return self.q3 + IQR_FACTOR * self.iqr
+
+    def _common(self, df):
+        return [col for col in self.columns if col in df.columns]
+
+    def outlier_rates(self, df: pd.DataFrame) -> pd.Series:
+        """Proportion de valeurs hors des bornes IQR, par colonne."""
+        cols = self._common(df)
+        values = df[cols]
+        mask = values.lt(self.lower[cols], axis=1) | values.gt(self.upper[cols], axis=1)
+        return mask.mean()
+
+    def outlier_rate(self, df: pd.DataFrame) -> float:
+        rates = self.outlier_rates(df)
+        return float(rates.mean()) if len(rates) else 0.0
+
+    def winsorize(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Ramène les valeurs extrêmes sur les bornes IQR (toutes les colonnes en une opération)."""
+        cols = self._common(df)
+        if cols:
+            df[cols] = df[cols].astype("float64").clip(self.lower[cols], self.upper[cols], axis=1)
+        return df
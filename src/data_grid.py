@@ -0,0 +1,210 @@
+# data_grid.py
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from row_index import RowView, filter_mask, open_index, sort_order
+
+# Nombre de lignes affichées (seules ces lignes sont lues dans le fichier)
+PAGE_ROWS = 30
+
+# Fréquence de rafraîchissement pendant l'indexation et les calculs en arrière-plan (ms)
+POLL_MS = 200
+
+
+class DataGrid:
+    """
+    Grille à défilement virtuel : le Treeview ne contient que PAGE_ROWS lignes,
+    remplies à chaque défilement à partir de l'index d'offsets (RowIndex ; BlockIndex pour les
+    CSV compressés et les fichiers Parquet / Feather).
+    Le tri (clic sur un en-tête) et le filtre sont calculés sur le fichier, en arrière-plan.
+    """
+
+    def __init__(self, path: str, parent=None):
+        self.path = path
+        self.index = open_index(path)  # index sauvegardé, complété si le fichier a grandi
+        self.view = RowView(self.index)
+        self.top = 0
+        self.closed = False
+        self.sort_state = (None, True)
+        self._job = None        # (description, thread, résultat, application)
+        self._shown = None      # (top, longueur de la vue) affichés
+
+        self.win = tk.Toplevel(parent)
+        self.win.title(f"Aperçu - {os.path.basename(path)}")
+        self.win.geometry("900x600")
+        self.win.bind("<Destroy>", self._on_destroy, add="+")
+
+        self._build_toolbar()
+        self._build_grid()
+
+        self.index.build_in_background(cancel=lambda: self.closed)
+        self._poll()
+
+    # ---------------------------
+    # Interface
+    # ---------------------------
+    def _build_toolbar(self):
+        bar = ttk.Frame(self.win, padding=6)
+        bar.pack(side="top", fill="x")
+
+        ttk.Label(bar, text="Filtrer :").pack(side="left")
+        self.filter_col = tk.StringVar(value=self.index.columns[0] if self.index.columns else "")
+        ttk.Combobox(bar, textvariable=self.filter_col, values=self.index.columns,
+                     state="readonly", width=20).pack(side="left", padx=4)
+        self.filter_text = tk.StringVar()
+        entry = ttk.Entry(bar, textvariable=self.filter_text, width=24)
+        entry.pack(side="left", padx=4)
+        entry.bind("<Return>", lambda e: self.apply_filter())
+        ttk.Button(bar, text="Appliquer", command=self.apply_filter).pack(side="left", padx=2)
+        ttk.Button(bar, text="Réinitialiser", command=self.reset).pack(side="left", padx=2)
+
+        self.status = ttk.Label(bar, text="Indexation…")
+        self.status.pack(side="right")
+
+    def _build_grid(self):
+        frame = ttk.Frame(self.win)
+        frame.pack(expand=True, fill="both")
+
+        # identifiants c0, c1… : les noms de colonnes du CSV peuvent être quelconques
+        headings = ["n°"] + self.index.columns
+        ids = [f"c{i}" for i in range(len(headings))]
+        self.tree = ttk.Treeview(frame, columns=ids, show="headings", height=PAGE_ROWS)
+        for i, (col_id, col) in enumerate(zip(ids, headings)):
+            self.tree.heading(col_id, text=col, command=(lambda c=col: self.sort_by(c)) if i else "")
+            self.tree.column(col_id, width=70 if i == 0 else 120, anchor="e" if i == 0 else "w", stretch=False)
+        for i in range(PAGE_ROWS):
+            self.tree.insert("", "end", iid=f"r{i}", values=())
+
+        self.vsb = ttk.Scrollbar(frame, orient="vertical", command=self._on_scroll)
+        hsb = ttk.Scrollbar(frame, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=hsb.set)
+
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        hsb.grid(row=1, column=0, sticky="ew")
+        frame.rowconfigure(0, weight=1)
+        frame.columnconfigure(0, weight=1)
+
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_to(self.top - int(e.delta / 120) * 3))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_to(self.top - 3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_to(self.top + 3))
+        self.tree.bind("<Prior>", lambda e: self.scroll_to(self.top - PAGE_ROWS))
+        self.tree.bind("<Next>", lambda e: self.scroll_to(self.top + PAGE_ROWS))
+
+    def _on_destroy(self, event):
+        if event.widget is self.win:
+            self.closed = True
+            self.index.close()
+
+    # ---------------------------
+    # Défilement virtuel
+    # ---------------------------
+    def _on_scroll(self, *args):
+        total = len(self.view)
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * total))
+        elif args[0] == "scroll":
+            step = PAGE_ROWS if args[2] == "pages" else 1
+            self.scroll_to(self.top + int(args[1]) * step)
+
+    def scroll_to(self, top: int):
+        self.top = max(0, min(top, len(self.view) - PAGE_ROWS))
+        self.render()
+
+    def render(self):
+        total = len(self.view)
+        page = self.view.rows(self.top, self.top + PAGE_ROWS)
+        for i, (row_id, values) in enumerate(zip(page.index, page.itertuples(index=False))):
+            self.tree.item(f"r{i}", values=(row_id + 1, *values))
+        for i in range(len(page), PAGE_ROWS):
+            self.tree.item(f"r{i}", values=())
+
+        if total:
+            self.vsb.set(self.top / total, min(1.0, (self.top + PAGE_ROWS) / total))
+        else:
+            self.vsb.set(0, 1)
+        self._shown = (self.top, total)
+
+    # ---------------------------
+    # Tri / filtre (sur le fichier, en arrière-plan)
+    # ---------------------------
+    def _run(self, description, func, apply):
+        """Exécute func() dans un thread une fois l'index terminé, puis apply(résultat) dans la boucle Tk."""
+        if self._job is not None:
+            messagebox.showinfo("Patience", "Un calcul est déjà en cours.", parent=self.win)
+            return
+        result = {}
+
+        def task():
+            self.index.done.wait()
+            try:
+                result["value"] = func()
+            except Exception as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=task, daemon=True)
+        self._job = (description, thread, result, apply)
+        thread.start()
+
+    def sort_by(self, column):
+        current, ascending = self.sort_state
+        ascending = not ascending if current == column else True
+        self.sort_state = (column, ascending)
+        arrow = "▲" if ascending else "▼"
+        self._run(f"Tri sur {column} {arrow}",
+                  lambda: sort_order(self.path, column, ascending),
+                  self.view.set_sort)
+
+    def apply_filter(self):
+        column, text = self.filter_col.get(), self.filter_text.get()
+        if not column or not text:
+            self.view.set_filter(None)
+            self.scroll_to(0)
+            return
+        self._run(f"Filtre {column} ∋ « {text} »",
+                  lambda: filter_mask(self.path, column, text),
+                  self.view.set_filter)
+
+    def reset(self):
+        self.filter_text.set("")
+        self.sort_state = (None, True)
+        self.view.set_filter(None)
+        self.view.set_sort(None)
+        self.scroll_to(0)
+
+    # ---------------------------
+    # Boucle de rafraîchissement
+    # ---------------------------
+    def _poll(self):
+        if self.closed:
+            return
+
+        if self._job is not None:
+            description, thread, result, apply = self._job
+            if not thread.is_alive():
+                self._job = None
+                if "error" in result:
+                    messagebox.showerror("Erreur", f"{description} impossible : {result['error']}", parent=self.win)
+                else:
+                    apply(result["value"])
+                    self.top = 0
+
+        total = len(self.view)
+        if self._shown != (self.top, total):
+            self.render()
+
+        if self._job is not None:
+            status = f"{self._job[0]}…"
+        elif self.index.done.is_set():
+            status = f"{total} lignes × {len(self.index.columns)} colonnes"
+        else:
+            status = f"Indexation… {self.index.n_rows} lignes ({self.index.scanned / 1024 ** 2:.0f} Mo)"
+        self.status.config(text=status)
+
+        self.win.after(POLL_MS, self._poll)
+
+
+def open_data_grid(path: str, parent=None) -> DataGrid:
+    return DataGrid(path, parent)
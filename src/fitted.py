@@ -0,0 +1,465 @@
+# fitted.py
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from column_stats import ColumnStats
+from formats import split_format
+from schema import NA_TOKENS, is_text, na_tokens_to_nan, numeric_columns
+
+# Prétraitements ajustés : les paramètres appris sur un fichier (valeurs d'imputation, min/max,
+# moyennes et écarts-types, colonnes gardées, vocabulaires des modalités, bornes IQR) sont
+# enregistrés en JSON puis réappliqués tels quels à de nouveaux fichiers, morceau par morceau,
+# sans recalculer aucune statistique (mêmes transformations en apprentissage et en production).
+
+FORMAT_VERSION = 1
+
+# Indicatrices One-Hot creuses sous cette proportion de 1 : une valeur creuse (index int32
+# + valeur) coûte 5 octets contre 1 en dense
+SPARSE_DENSITY = 0.2
+
+# Modalité absente du vocabulaire d'un Label Encoding : code -1, ou erreur
+UNSEEN_POLICIES = ("unknown", "error")
+
+# Pipeline enregistré à côté de chaque fichier produit : data/x_missing.pipeline.json
+PIPELINE_SUFFIX = ".pipeline.json"
+
+
+def _to_json(value):
+    """Valeur sérialisable (scalaires NumPy, dates)."""
+    if isinstance(value, pd.Timestamp):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _from_json(value):
+    if isinstance(value, dict) and "datetime" in value:
+        return pd.Timestamp(value["datetime"])
+    return value
+
+
+def _require(df: pd.DataFrame, columns, action: str):
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise ValueError(f"Étape « {action} » : colonnes absentes du fichier : {', '.join(map(str, missing))}")
+
+
+# ---------------------------
+# Étapes ajustées
+# ---------------------------
+class FittedStep:
+    """Étape ajustée : transform(df) n'utilise que les paramètres appris, jamais les données."""
+
+    action = None
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def params(self) -> dict:
+        raise NotImplementedError
+
+    @classmethod
+    def from_params(cls, params: dict) -> "FittedStep":
+        return cls(**params)
+
+    @property
+    def text_columns(self) -> list:
+        """Colonnes à lire comme texte (comparées à un vocabulaire)."""
+        return []
+
+
+class ImputeStep(FittedStep):
+    """Valeurs manquantes : colonnes gardées, valeurs de remplissage, puis suppression des lignes incomplètes."""
+
+    action = "missing"
+
+    def __init__(self, kept, fill_values):
+        self.kept = list(kept)
+        self.fill_values = dict(fill_values)
+
+    def transform(self, df):
+        return self.fill(df, token_columns=[col for col in self.kept if col in df.columns and is_text(df[col])])
+
+    def fill(self, df, token_columns=()):
+        """
+        Une seule copie (colonnes gardées), puis colonne par colonne : jetons manquants convertis
+        dans token_columns, remplissage, et suppression des lignes encore incomplètes
+        (masque limité aux colonnes qui contiennent des NaN).
+        """
+        _require(df, self.kept, self.action)
+        out = df.reindex(columns=self.kept)
+        for col in token_columns:
+            out[col] = na_tokens_to_nan(out[col])
+        for col, value in self.fill_values.items():
+            series = out[col]
+            if series.dtype == "float32":
+                series = series.astype("float64")  # moyenne gardée en float64 (float32 l'arrondirait)
+            out[col] = series.fillna(value)
+
+        incomplete = np.zeros(len(out), dtype=bool)
+        for col in out.columns:
+            if out[col].hasnans:
+                incomplete |= out[col].isna().to_numpy()
+        return out[~incomplete] if incomplete.any() else out
+
+    def params(self):
+        return {"kept": self.kept, "fill_values": {col: _to_json(v) for col, v in self.fill_values.items()}}
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(params["kept"], {col: _from_json(v) for col, v in params["fill_values"].items()})
+
+
+class ScaleStep(FittedStep):
+    """Transformation affine par colonne : normalize → x * a + b ; standardize → (x - a) / b."""
+
+    def __init__(self, action, columns, a, b):
+        self.action = action
+        self.columns = list(columns)
+        self.a = np.asarray(a, dtype="float64")
+        self.b = np.asarray(b, dtype="float64")
+
+    def transform(self, df):
+        df = df.copy()
+        if not self.columns:
+            return df
+        _require(df, self.columns, self.action)
+        data = df[self.columns]
+        if len(numeric_columns(data)) < len(self.columns):
+            data = data.apply(pd.to_numeric, errors="coerce")  # lot avec jetons non numériques (« ? »)
+        values = data.to_numpy(dtype="float64")
+        if self.action == "normalize":
+            values *= self.a
+            values += self.b
+        else:
+            values -= self.a
+            values /= self.b
+        df[self.columns] = values
+        return df
+
+    def params(self):
+        return {"action": self.action, "columns": self.columns, "a": self.a.tolist(), "b": self.b.tolist()}
+
+
+class VarianceStep(FittedStep):
+    """Filtrage par variance : colonnes numériques gardées (placées en tête, comme variance_threshold_filter)."""
+
+    action = "variance"
+
+    def __init__(self, numeric, kept):
+        self.numeric = list(numeric)
+        self.kept = list(kept)
+
+    def transform(self, df):
+        _require(df, self.kept, self.action)
+        return df[self.kept + [col for col in df.columns if col not in self.numeric]]
+
+    def params(self):
+        return {"numeric": self.numeric, "kept": self.kept}
+
+
+class OneHotStep(FittedStep):
+    """
+    One-Hot à vocabulaire fixe (comme pd.get_dummies(drop_first=True)) : les colonnes produites
+    ne dépendent pas des valeurs du lot ; une modalité inconnue donne une ligne de zéros.
+    Indicatrices 0/1 en uint8, creuses ou non selon sparse (cf. dummy_frame).
+    """
+
+    action = "onehot"
+
+    def __init__(self, vocab, drop_first=True, sparse=None):
+        self.vocab = {col: list(categories) for col, categories in vocab.items()}
+        self.drop_first = drop_first
+        self.sparse = sparse  # choix de représentation en mémoire, non enregistré
+
+    def transform(self, df):
+        _require(df, self.vocab, self.action)
+        first = 1 if self.drop_first else 0
+        blocks = []
+        for col, categories in self.vocab.items():
+            codes = pd.Categorical(_as_text(df[col]), categories=categories).codes
+            blocks.append((codes.astype("int64") - first, [f"{col}_{cat}" for cat in categories[first:]]))
+        dummies = dummy_frame(blocks, df.index, self.sparse)
+        return pd.concat([df.drop(columns=list(self.vocab)), dummies], axis=1)
+
+    def params(self):
+        return {"vocab": {col: [_to_json(v) for v in cats] for col, cats in self.vocab.items()},
+                "drop_first": self.drop_first}
+
+    @property
+    def text_columns(self):
+        return list(self.vocab)
+
+
+class LabelStep(FittedStep):
+    """
+    Label Encoding à vocabulaire fixe (rang dans les modalités triées, NaN compris s'il figurait
+    dans les données d'apprentissage), codes dans le plus petit type entier suffisant.
+    unseen : traitement d'une modalité absente du vocabulaire — « unknown » (code -1)
+    ou « error » (ValueError).
+    """
+
+    action = "label"
+
+    def __init__(self, classes, unseen="unknown"):
+        if unseen not in UNSEEN_POLICIES:
+            raise ValueError(f"Politique inconnue pour les modalités nouvelles : {unseen}")
+        self.classes = {col: list(values) for col, values in classes.items()}
+        self.unseen = unseen
+
+    def transform(self, df):
+        _require(df, self.classes, self.action)
+        df = df.copy()
+        for col, classes in self.classes.items():
+            values = _as_text(df[col])
+            present = [c for c in classes if not pd.isna(c)]
+            codes = pd.Categorical(values, categories=present).codes.astype(code_dtype(len(classes)))
+            missing = values.isna().to_numpy()
+            if len(present) < len(classes):
+                # LabelEncoder range NaN comme une modalité, en dernier
+                codes[missing] = len(present)
+            unseen = codes < 0
+            if self.unseen == "error" and unseen.any():
+                examples = pd.unique(values[unseen].astype(str))[:5]
+                raise ValueError(f"Colonne « {col} » : modalités absentes du vocabulaire : {', '.join(examples)}")
+            df[col] = codes
+        return df
+
+    def params(self):
+        return {"classes": {col: [_to_json(v) for v in values] for col, values in self.classes.items()},
+                "unseen": self.unseen}
+
+    @property
+    def text_columns(self):
+        return list(self.classes)
+
+
+class OutlierStep(FittedStep):
+    """Winsorisation IQR avec les quartiles appris (ColumnStats)."""
+
+    action = "outliers"
+
+    def __init__(self, stats: ColumnStats):
+        self.stats = stats
+
+    def transform(self, df):
+        return self.stats.winsorize(df.copy())
+
+    def params(self):
+        return {"q1": {str(c): float(v) for c, v in self.stats.q1.items()},
+                "q3": {str(c): float(v) for c, v in self.stats.q3.items()},
+                "approximate": self.stats.approximate}
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(ColumnStats(pd.Series(params["q1"], dtype="float64"), pd.Series(params["q3"], dtype="float64"),
+                               approximate=params["approximate"]))
+
+
+def dummy_frame(blocks, index, sparse=None) -> pd.DataFrame:
+    """
+    Indicatrices 0/1 (uint8) de plusieurs colonnes, construites en une seule allocation.
+    blocks : [(codes, noms)] — codes[i] est le rang de la colonne produite à 1 pour la ligne i
+    parmi noms (négatif : aucune). sparse=None choisit une matrice creuse (CSC SciPy →
+    pd.SparseDtype) lorsque moins de SPARSE_DENSITY des cellules valent 1.
+    """
+    blocks = [(np.asarray(codes), list(names)) for codes, names in blocks]
+    names = [name for _, block_names in blocks for name in block_names]
+    shape = (len(index), len(names))
+
+    if sparse is None:
+        n_ones = sum(int((codes >= 0).sum()) for codes, _ in blocks)
+        sparse = n_ones < SPARSE_DENSITY * shape[0] * shape[1]
+    if sparse:
+        from scipy import sparse as sp
+
+        # CSC directement : lignes triées par colonne produite (tri stable des codes)
+        rows, counts = [], []
+        for codes, block_names in blocks:
+            present = np.flatnonzero(codes >= 0)
+            kept = codes[present]
+            if len(block_names) < 2 ** 15:
+                kept = kept.astype("int16")  # tri stable en radix (entiers courts)
+            rows.append(present[np.argsort(kept, kind="stable")])
+            counts.append(np.bincount(kept, minlength=len(block_names)))
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype="int64")
+        indptr = np.concatenate([[0], np.cumsum(np.concatenate(counts))]) if counts else np.zeros(1, dtype="int64")
+        matrix = sp.csc_matrix((np.ones(len(rows), dtype="uint8"), rows, indptr), shape=shape)
+        return pd.DataFrame.sparse.from_spmatrix(matrix, index=index, columns=names)
+
+    # ordre Fortran : chaque indicatrice est contiguë, et le DataFrame la reprend sans copie
+    matrix = np.zeros(shape, dtype="uint8", order="F")
+    j = 0
+    for codes, block_names in blocks:
+        for i in range(len(block_names)):
+            matrix[:, j] = codes == i
+            j += 1
+    return pd.DataFrame(matrix, index=index, columns=names)
+
+
+def code_dtype(n_classes: int) -> str:
+    """Plus petit type entier signé contenant les codes -1 … n_classes."""
+    for dtype in ("int8", "int16", "int32"):
+        if n_classes <= np.iinfo(dtype).max:
+            return dtype
+    return "int64"
+
+
+def factorize_labels(series: pd.Series, max_classes: int = None):
+    """
+    (modalités triées, codes) en un seul passage (pd.factorize) : mêmes classes et mêmes
+    codes que LabelEncoder().fit_transform (NaN en dernière modalité), codes en code_dtype.
+    None si la colonne a plus de max_classes modalités (NaN exclu, comme nunique) :
+    le tri n'est fait que sur les modalités, une fois le nombre vérifié.
+    Fonction de module : exécutable dans un worker (parallel.column_map).
+    """
+    codes, uniques = pd.factorize(series)
+    if max_classes is not None and len(uniques) > max_classes:
+        return None
+    order = np.argsort(np.asarray(uniques, dtype=object), kind="stable")
+    classes = [uniques[i] for i in order]
+    rank = np.empty(len(order) + 1, dtype="int64")
+    rank[order] = np.arange(len(order))
+    rank[-1] = len(order)  # code -1 (NaN) → dernière modalité
+    if (codes < 0).any():
+        classes.append(np.nan)
+    return classes, rank[codes].astype(code_dtype(len(classes)))
+
+
+def _as_text(series: pd.Series) -> pd.Series:
+    """Valeurs comparables au vocabulaire (un lot lu en nombres est ramené au texte)."""
+    if is_text(series):
+        return series
+    return series.astype(str).where(series.notna())
+
+
+STEP_TYPES = {
+    "missing": ImputeStep,
+    "normalize": ScaleStep,
+    "standardize": ScaleStep,
+    "variance": VarianceStep,
+    "onehot": OneHotStep,
+    "label": LabelStep,
+    "outliers": OutlierStep,
+}
+
+
+# ---------------------------
+# Pipeline ajusté
+# ---------------------------
+class FittedPipeline:
+    """
+    Suite d'étapes ajustées, sérialisable en JSON.
+    - transform(df) : applique les étapes à un DataFrame ;
+    - transform_file(...) : applique les étapes à un CSV morceau par morceau (mémoire bornée) ;
+    - then(étape) : nouveau pipeline prolongé d'une étape (prétraitements enchaînés).
+    columns / float_columns : colonnes du fichier d'apprentissage, et celles lues en float64
+    (un lot lu par morceaux garde ainsi le même type d'un morceau à l'autre).
+    """
+
+    def __init__(self, steps=(), columns=None, float_columns=(), source=None):
+        self.steps = list(steps)
+        self.columns = list(columns) if columns is not None else None
+        self.float_columns = list(float_columns)
+        self.source = source
+
+    @classmethod
+    def for_frame(cls, df: pd.DataFrame, source: str = None) -> "FittedPipeline":
+        floats = [col for col in df.columns if pd.api.types.is_float_dtype(df[col])]
+        return cls(columns=df.columns, float_columns=floats, source=source)
+
+    def __repr__(self):
+        return f"FittedPipeline({' → '.join(self.actions) or 'vide'})"
+
+    @property
+    def actions(self) -> list:
+        return [step.action for step in self.steps]
+
+    def then(self, step: FittedStep) -> "FittedPipeline":
+        return FittedPipeline(self.steps + [step], self.columns, self.float_columns, self.source)
+
+    # --- Application ---
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        for step in self.steps:
+            df = step.transform(df)
+        return df
+
+    def _read_options(self) -> dict:
+        present = set(self.columns or [])
+        dtypes = {col: "float64" for col in self.float_columns}
+        for step in self.steps:
+            dtypes.update({col: object for col in step.text_columns if col in present})
+        # jetons manquants lus comme pd.read_csv (cf. cache.load_csv) : « ? » reste une modalité,
+        # sauf dans les colonnes lues en float64
+        na_values = {col: NA_TOKENS for col in self.float_columns if col in present}
+        return {"dtype": dtypes, "na_values": na_values}
+
+    def transform_file(self, path: str, out_path: str, chunksize: int = None, cancel=None, progress=None) -> int:
+        """
+        Applique le pipeline au fichier path, morceau par morceau, et écrit le résultat dans out_path
+        (format de son extension, écrit depuis un thread : writers.BackgroundWriter).
+        Aucune statistique n'est recalculée. Retourne le nombre de lignes écrites ;
+        en cas d'échec ou d'annulation (jobs.Cancelled), le fichier partiel est supprimé.
+        """
+        from streaming import DEFAULT_CHUNKSIZE, iter_chunks
+        from writers import open_writer
+
+        # annulation (jobs.Cancelled) ou modalité refusée (unseen="error") : le writer supprime la sortie
+        with open_writer(out_path, background=True) as writer:
+            for chunk in iter_chunks(path, chunksize or DEFAULT_CHUNKSIZE, cancel, progress, "transformation",
+                                     **self._read_options()):
+                writer.write(self.transform(chunk))
+        if progress is not None:
+            progress.finish()
+        return writer.n_rows
+
+    # --- Persistance ---
+    def to_dict(self) -> dict:
+        return {
+            "version": FORMAT_VERSION,
+            "source": self.source,
+            "columns": [str(c) for c in self.columns] if self.columns is not None else None,
+            "float_columns": [str(c) for c in self.float_columns],
+            "steps": [{"action": step.action, "params": step.params()} for step in self.steps],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FittedPipeline":
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Version de pipeline non prise en charge : {data.get('version')}")
+        steps = [STEP_TYPES[s["action"]].from_params(s["params"]) for s in data["steps"]]
+        return cls(steps, data["columns"], data["float_columns"], data.get("source"))
+
+    def save(self, path: str) -> str:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "FittedPipeline":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def pipeline_path(csv_path: str) -> str:
+    return split_format(csv_path)[0] + PIPELINE_SUFFIX
+
+
+def upstream_pipeline(csv_path: str):
+    """
+    Pipeline qui a produit csv_path (fichier .pipeline.json voisin, plus récent que le CSV),
+    ou None pour un fichier d'origine.
+    """
+    sidecar = pipeline_path(csv_path)
+    try:
+        if os.path.getmtime(sidecar) < os.path.getmtime(csv_path):
+            return None  # CSV réécrit depuis : le pipeline ne le décrit plus
+        return FittedPipeline.load(sidecar)
+    except (OSError, ValueError, KeyError):
+        return None
@@ -0,0 +1,215 @@
+# formats.py
+import gzip
+import importlib.util
+import os
+import shutil
+
+# Formats des fichiers produits (prétraitements, analyse intelligente, fusion, pipelines) :
+# CSV brut ou compressé (gzip, zstd), Parquet et Feather compressés en zstd, ou dossier
+# de parties Parquet (<nom>.parts/part-00000.parquet…). Le format se déduit de l'extension.
+# Aucun import de pandas ici : la fenêtre principale s'en sert pour lister les fichiers.
+
+FORMATS = {
+    "csv": ".csv",
+    "csv.gz": ".csv.gz",
+    "csv.zst": ".csv.zst",
+    "parquet": ".parquet",
+    "feather": ".feather",
+    "parts": ".parts",
+}
+
+FORMAT_LABELS = {
+    "csv": "CSV",
+    "csv.gz": "CSV compressé (gzip)",
+    "csv.zst": "CSV compressé (zstd)",
+    "parquet": "Parquet (zstd)",
+    "feather": "Feather (zstd)",
+    "parts": "Parquet partitionné (dossier)",
+}
+
+DEFAULT_FORMAT = "csv"
+
+# Formats en colonnes (types conservés, lecture sans parser de texte)
+COLUMNAR = {"parquet", "feather", "parts"}
+
+# Formats qui demandent pyarrow (zstd, Parquet, Feather)
+ARROW_FORMATS = {"csv.zst", "parquet", "feather", "parts"}
+
+COMPRESSION = "zstd"
+
+# Parties d'un dossier .parts
+PART_PATTERN = "part-{:05d}.parquet"
+
+# pyarrow est cherché sans être importé (liste des fichiers et --help de la CLI immédiats)
+HAS_ARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+# ---------------------------
+# Noms de fichiers
+# ---------------------------
+def data_format(path: str):
+    """Format du fichier d'après son extension (la plus longue reconnue), ou None."""
+    name = os.path.basename(os.path.normpath(path)).lower()
+    matches = [fmt for fmt, ext in FORMATS.items() if name.endswith(ext)]
+    return max(matches, key=lambda fmt: len(FORMATS[fmt])) if matches else None
+
+
+def is_data_file(path: str) -> bool:
+    return data_format(path) is not None
+
+
+def split_format(path: str) -> tuple:
+    """(chemin sans extension, extension) : data/x.csv.gz → (data/x, .csv.gz)."""
+    fmt = data_format(path)
+    if fmt is None:
+        return os.path.splitext(path)
+    path = os.path.normpath(path)
+    return path[:len(path) - len(FORMATS[fmt])], path[len(path) - len(FORMATS[fmt]):]
+
+
+def with_format(path: str, fmt: str) -> str:
+    """Même nom, autre format : data/x.csv → data/x.parquet."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Format inconnu : {fmt}")
+    return split_format(path)[0] + FORMATS[fmt]
+
+
+def available_formats() -> list:
+    """Formats utilisables avec les bibliothèques installées."""
+    return [fmt for fmt in FORMATS if HAS_ARROW or fmt not in ARROW_FORMATS]
+
+
+def check_available(fmt: str):
+    if fmt not in FORMATS:
+        raise ValueError(f"Format inconnu : {fmt}")
+    if fmt not in available_formats():
+        raise ValueError(f"Le format {FORMAT_LABELS[fmt]} demande pyarrow (pip install pyarrow)")
+
+
+def is_columnar(path: str) -> bool:
+    return data_format(path) in COLUMNAR
+
+
+def is_plain_csv(path: str) -> bool:
+    """CSV non compressé : seul format lisible à partir d'un offset (index de lignes, ajouts en fin)."""
+    return data_format(path) in (None, "csv")
+
+
+def part_files(path: str) -> list:
+    """Parties d'un dossier .parts, dans l'ordre des lignes."""
+    return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".parquet")]
+
+
+def data_size(path: str) -> int:
+    """Taille sur disque (somme des parties pour un dossier .parts)."""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(part) for part in part_files(path))
+    return os.path.getsize(path)
+
+
+def remove_data(path: str):
+    """Supprime le fichier (ou le dossier de parties)."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+# ---------------------------
+# Lecture
+# ---------------------------
+def decompressed(path: str, raw):
+    """
+    Flux binaire du texte CSV lu depuis raw (fichier binaire ouvert sur path) :
+    raw lui-même pour un CSV brut, décompressé à la volée pour .csv.gz et .csv.zst.
+    """
+    fmt = data_format(path)
+    if fmt == "csv.gz":
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if fmt == "csv.zst":
+        import pyarrow as pa
+        return pa.CompressedInputStream(pa.PythonFile(raw, mode="r"), COMPRESSION)
+    return raw
+
+
+def _ipc_reader(path: str):
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    return ipc.open_file(pa.memory_map(path))
+
+
+def _parquet_sources(path: str) -> list:
+    return part_files(path) if os.path.isdir(path) else [path]
+
+
+def read_columns(path: str) -> list:
+    """Noms des colonnes, sans lire les données."""
+    fmt = data_format(path)
+    if fmt in ("parquet", "parts"):
+        import pyarrow.parquet as pq
+        sources = _parquet_sources(path)
+        return list(pq.read_schema(sources[0]).names) if sources else []
+    if fmt == "feather":
+        return list(_ipc_reader(path).schema.names)
+    import pandas as pd
+    with open(path, "rb") as raw:
+        return list(pd.read_csv(decompressed(path, raw), nrows=0).columns)
+
+
+def count_rows(path: str) -> int:
+    """Nombre de lignes d'un fichier en colonnes, lu dans les métadonnées."""
+    fmt = data_format(path)
+    if fmt == "feather":
+        reader = _ipc_reader(path)
+        return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    import pyarrow.parquet as pq
+    return sum(pq.ParquetFile(source).metadata.num_rows for source in _parquet_sources(path))
+
+
+def read_frame(path: str, columns=None):
+    """DataFrame complet d'un fichier en colonnes (Parquet, Feather ou dossier de parties)."""
+    import pandas as pd
+    if data_format(path) == "feather":
+        return pd.read_feather(path, columns=columns)
+    sources = _parquet_sources(path)
+    if len(sources) == 1:
+        return pd.read_parquet(sources[0], columns=columns)
+    return pd.concat([pd.read_parquet(source, columns=columns) for source in sources], ignore_index=True)
+
+
+def iter_batches(path: str, batch_rows: int, columns=None):
+    """
+    Lots de lignes (pyarrow.RecordBatch) d'un fichier en colonnes, dans l'ordre du fichier :
+    au plus batch_rows lignes par lot (un groupe de lignes Parquet ou un lot Feather peut être découpé).
+    """
+    if data_format(path) == "feather":
+        reader = _ipc_reader(path)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            if columns is not None:
+                batch = batch.select(list(columns))
+            for start in range(0, batch.num_rows, batch_rows):
+                yield batch.slice(start, batch_rows)
+        return
+    import pyarrow.parquet as pq
+    for source in _parquet_sources(path):
+        yield from pq.ParquetFile(source).iter_batches(batch_size=batch_rows, columns=columns)
+
+
+def row_blocks(path: str) -> list:
+    """
+    Blocs lisibles séparément d'un fichier en colonnes, dans l'ordre des lignes :
+    [(nombre de lignes, lecture)] où lecture() rend le bloc en table pyarrow
+    (groupes de lignes Parquet, lots Feather). Seules les métadonnées sont lues ici.
+    """
+    if data_format(path) == "feather":
+        reader = _ipc_reader(path)
+        return [(reader.get_batch(i).num_rows, lambda i=i: reader.get_batch(i))
+                for i in range(reader.num_record_batches)]
+    import pyarrow.parquet as pq
+    blocks = []
+    for source in _parquet_sources(path):
+        parquet = pq.ParquetFile(source)
+        blocks.extend((parquet.metadata.row_group(i).num_rows, lambda parquet=parquet, i=i: parquet.read_row_group(i))
+                      for i in range(parquet.num_row_groups))
+    return blocks
@@ -1,77 +1,79 @@
 # fuse.py
-import pandas as pd
 import os
 from tkinter import filedialog, messagebox
 from datetime import datetime  # <-- pour créer un nom unique
 import random
 
-def detect_common_keys(df1: pd.DataFrame, df2: pd.DataFrame):
-    """
-    Détecte les colonnes communes entre deux DataFrames.
-    Retourne une liste de colonnes communes potentielles.
-    """
-    return list(set(df1.columns).intersection(set(df2.columns)))
+from formats import DEFAULT_FORMAT, FORMATS
+from fuse_engine import FusionError, describe_estimate, detect_common_keys, fuse_files  # noqa: F401
+
+
+def _show_result(result, output_name):
+    if result is None:
+        return
+    messagebox.showinfo(
+        "Fusion réussie",
+        f"✅ Fusion {result['fusion_type']} réalisée avec succès.\n\n"
+        f"Fichier fusionné : {output_name}\n"
+        f"Dimensions finales : {result['n_rows']} lignes × {result['n_cols']} colonnes"
+    )
 
 
-def fuse_datasets_interactive():
+def _show_error(e):
+    if isinstance(e, FusionError):
+        messagebox.showerror("Erreur de fusion", str(e))
+    else:
+        messagebox.showerror("Erreur", f"Une erreur est survenue pendant la fusion :\n{e}")
+
+
+def fuse_datasets_interactive(scheduler=None, on_done=None, fmt=None):
     """
     Ouvre deux fichiers CSV et fusionne automatiquement :
     - Si les colonnes sont identiques → concaténation verticale
     - Si une colonne clé commune est détectée → jointure horizontale
+    Avec un JobScheduler, la fusion s'exécute en arrière-plan (seuls les dialogues
+    restent dans la boucle Tk) ; on_done(résultat) est alors appelé à la fin.
+    fmt : format du fichier fusionné (clé de formats.FORMATS, CSV par défaut).
     """
-    try:
-        # --- Sélection des fichiers à fusionner ---
-        file1_path = filedialog.askopenfilename(title="Sélectionner le premier dataset", filetypes=[("CSV Files", "*.csv")])
-        if not file1_path:
-            return
+    # --- Sélection des fichiers à fusionner ---
+    file1_path = filedialog.askopenfilename(title="Sélectionner le premier dataset", filetypes=[("CSV Files", "*.csv")])
+    if not file1_path:
+        return
 
-        file2_path = filedialog.askopenfilename(title="Sélectionner le second dataset", filetypes=[("CSV Files", "*.csv")])
-        if not file2_path:
-            return
+    file2_path = filedialog.askopenfilename(title="Sélectionner le second dataset", filetypes=[("CSV Files", "*.csv")])
+    if not file2_path:
+        return
 
-        # --- Chargement des fichiers ---
-        df1 = pd.read_csv(file1_path)
-        df2 = pd.read_csv(file2_path)
+    # --- Génération d'un nom de fichier unique ---
+    os.makedirs("data", exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    random_id = random.randint(1000, 9999)
+    output_name = f"fused_dataset_{timestamp}_{random_id}{FORMATS[fmt or DEFAULT_FORMAT]}"
+    output_path = os.path.join("data", output_name)
 
-        # --- Détection automatique du type de fusion ---
-        common_cols = detect_common_keys(df1, df2)
+    def ask(best):
+        return messagebox.askyesno(
+            "Jointure volumineuse",
+            f"⚠️ La jointure va multiplier le nombre de lignes.\n\n{describe_estimate(best)}\n\nContinuer ?"
+        )
 
-        if set(df1.columns) == set(df2.columns):
-            # 🔹 Fusion verticale
-            df_final = pd.concat([df1, df2], ignore_index=True)
-            fusion_type = "verticale (concaténation)"
-        elif len(common_cols) > 0:
-            # 🔹 Fusion horizontale (clé commune)
-            key = common_cols[0]
-            df_final = pd.merge(df1, df2, on=key, how="inner")
-            fusion_type = f"horizontale (clé commune : {key})"
-        else:
-            messagebox.showerror("Erreur de fusion", "Aucune colonne commune trouvée entre les deux fichiers.")
+    if scheduler is None:
+        try:
+            result = fuse_files(file1_path, file2_path, output_path, confirm=ask)
+        except Exception as e:
+            _show_error(e)
             return
+        _show_result(result, output_name)
+        return result
 
-        # --- Nettoyage de base ---
-        df_final.drop_duplicates(inplace=True)
-        df_final.reset_index(drop=True, inplace=True)
+    # --- Fusion en arrière-plan (jointure volumineuse confirmée dans la boucle Tk) ---
+    def task(job):
+        return fuse_files(file1_path, file2_path, output_path, confirm=lambda best: job.call_in_main(ask, best))
 
-        # --- Génération d'un nom de fichier unique ---
-        os.makedirs("data", exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        random_id = random.randint(1000, 9999)
-        output_name = f"fused_dataset_{timestamp}_{random_id}.csv"
-        output_path = os.path.join("data", output_name)
+    def done(result):
+        _show_result(result, output_name)
+        if on_done is not None and result is not None:
+            on_done(result)
 
-        # --- Sauvegarde du résultat ---
-        df_final.to_csv(output_path, index=False)
-
-        messagebox.showinfo(
-            "Fusion réussie",
-            f"✅ Fusion {fusion_type} réalisée avec succès.\n\n"
-            f"Fichier fusionné : {output_name}\n"
-            f"Dimensions finales : {df_final.shape[0]} lignes × {df_final.shape[1]} colonnes"
-        )
-
-        return df_final
-
-    except Exception as e:
-        messagebox.showerror("Erreur", f"Une erreur est survenue pendant la fusion :\n{e}")
- 
\ No newline at end of file
+    title = f"Fusion {os.path.basename(file1_path)} + {os.path.basename(file2_path)}"
+    scheduler.submit(title, task, on_done=done, on_error=_show_error)
@@ -0,0 +1,322 @@
+# fuse_engine.py
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from sketches import HyperLogLog, MinHash
+from streaming import DEFAULT_CHUNKSIZE, STREAMING_THRESHOLD
+from writers import open_writer, write_frame
+
+# Nombre de partitions : la mémoire utilisée est de l'ordre de (taille des entrées / DEFAULT_PARTITIONS)
+DEFAULT_PARTITIONS = 64
+
+# Colonne technique ajoutée le temps de la jointure
+KEY_COLUMN = "__fuse_key__"
+
+# Jointure jugée explosive si le nombre de lignes prévu dépasse FACTOR × (plus grand fichier)
+JOIN_WARN_FACTOR = 10
+JOIN_REFUSE_FACTOR = 1000
+
+# Les fichiers sont lus comme du texte brut, en mémoire comme hors mémoire : les valeurs sont
+# recopiées telles quelles dans le résultat et les doublons sont comparés sur le texte d'origine
+# (le résultat ne dépend pas de la taille des fichiers).
+TEXT_OPTIONS = {"dtype": str, "keep_default_na": False, "na_filter": False}
+
+
+# ---------------------------
+# Outils
+# ---------------------------
+def read_header(path: str) -> pd.DataFrame:
+    """DataFrame vide portant les colonnes du fichier (aucune ligne lue)."""
+    return pd.read_csv(path, nrows=0)
+
+
+def detect_common_keys(df1: pd.DataFrame, df2: pd.DataFrame):
+    """
+    Détecte les colonnes communes entre deux DataFrames.
+    Retourne une liste de colonnes communes potentielles (dans l'ordre du premier DataFrame).
+    Le classement comme clé de jointure se fait avec rank_join_keys.
+    """
+    return [col for col in df1.columns if col in set(df2.columns)]
+
+
+# Nombre décimal écrit en texte : signe, partie entière (zéros de tête exclus), partie décimale
+# (zéros de fin exclus) ; au moins un chiffre
+NUMBER_PATTERN = r"^(?=[+-]?\.?\d)\+?(-?)0*(\d*?)(?:\.(\d*?)0*)?$"
+
+
+def _number(match) -> str:
+    sign, whole, fraction = match.group(1), match.group(2) or "0", match.group(3)
+    if whole == "0" and not fraction:
+        sign = ""  # -0 et 0 se rejoignent
+    return sign + whole + ("." + fraction if fraction else "")
+
+
+def _canonical_key(series: pd.Series) -> pd.Series:
+    """
+    Forme canonique d'une clé lue en texte, pour que "7", "07" et "7.0" (ou "1.5" et "1.50")
+    se rejoignent comme avec les colonnes numériques de pd.merge.
+    Les autres valeurs sont comparées telles quelles.
+    """
+    codes, uniques = pd.factorize(series)  # la regex ne passe que sur les valeurs distinctes
+    canonical = pd.Series(uniques, dtype=object).str.strip().str.replace(NUMBER_PATTERN, _number, regex=True)
+    return pd.Series(canonical.to_numpy()[codes], index=series.index, name=series.name)
+
+
+def _partition_ids(df: pd.DataFrame, n_partitions: int) -> np.ndarray:
+    return pd.util.hash_pandas_object(df, index=False).to_numpy() % np.uint64(n_partitions)
+
+
+def _key_hashes(series: pd.Series) -> np.ndarray:
+    return pd.util.hash_pandas_object(_canonical_key(series), index=False).to_numpy()
+
+
+def _open_output(path: str, columns):
+    """
+    Fichier résultat (format de son extension, writers.py), écrit seau par seau depuis un thread
+    pendant la jointure du seau suivant ; les colonnes sont connues même sans aucune ligne.
+    """
+    out = open_writer(path, background=True)
+    out.write(pd.DataFrame(columns=list(columns)))
+    return out
+
+
+def join_frames(left: pd.DataFrame, right: pd.DataFrame, key: str) -> pd.DataFrame:
+    """
+    Jointure interne de deux blocs lus en texte sur la forme canonique de key
+    (la clé du résultat est celle de gauche, telle qu'écrite ; suffixes _x/_y de pd.merge).
+    """
+    left = left.assign(**{KEY_COLUMN: _canonical_key(left[key])})
+    right = right.drop(columns=key).assign(**{KEY_COLUMN: _canonical_key(right[key])})
+    return pd.merge(left, right, on=KEY_COLUMN, how="inner").drop(columns=KEY_COLUMN)
+
+
+def drop_duplicate_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """drop_duplicates() via un ensemble de hachages de lignes (64 bits) plutôt que sur les valeurs."""
+    hashes = pd.util.hash_pandas_object(df, index=False)
+    return df[~hashes.duplicated().to_numpy()]
+
+
+class _Buckets:
+    """Fichiers temporaires d'une partition (un CSV par seau, écrit par ajouts successifs)."""
+
+    def __init__(self, tmpdir: str, prefix: str, n_partitions: int):
+        self.paths = [os.path.join(tmpdir, f"{prefix}_{i}.csv") for i in range(n_partitions)]
+
+    def spill(self, chunk: pd.DataFrame, partition_ids: np.ndarray):
+        for pid, part in chunk.groupby(partition_ids, sort=False):
+            path = self.paths[pid]
+            part.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+    def __contains__(self, pid: int) -> bool:
+        return os.path.exists(self.paths[pid])
+
+    def read(self, pid: int) -> pd.DataFrame:
+        return pd.read_csv(self.paths[pid], **TEXT_OPTIONS)
+
+
+# ---------------------------
+# API publique
+# ---------------------------
+def hash_join(left_path: str, right_path: str, key: str, out_path: str,
+              n_partitions: int = DEFAULT_PARTITIONS, chunksize: int = DEFAULT_CHUNKSIZE):
+    """
+    Jointure interne (équivalent de pd.merge(how="inner") + drop_duplicates) hors mémoire :
+    1. les deux fichiers sont lus par blocs et répartis en seaux selon le hachage de la clé ;
+    2. chaque paire de seaux est jointe puis dédoublonnée en mémoire, puis ajoutée au résultat.
+    Des lignes identiques ont la même clé, donc le dédoublonnage par seau est global.
+    Retourne (nombre de lignes, nombre de colonnes) du fichier écrit.
+    """
+    left_cols = list(read_header(left_path).columns)
+    right_cols = [col for col in read_header(right_path).columns if col != key]
+
+    # Colonnes du résultat (suffixes _x/_y identiques à pd.merge)
+    empty = pd.merge(
+        pd.DataFrame(columns=left_cols + [KEY_COLUMN]),
+        pd.DataFrame(columns=right_cols + [KEY_COLUMN]),
+        on=KEY_COLUMN,
+    ).drop(columns=KEY_COLUMN)
+    with _open_output(out_path, empty.columns) as out, tempfile.TemporaryDirectory(prefix="fuse_") as tmpdir:
+        left = _Buckets(tmpdir, "left", n_partitions)
+        right = _Buckets(tmpdir, "right", n_partitions)
+        for path, buckets in ((left_path, left), (right_path, right)):
+            for chunk in pd.read_csv(path, chunksize=chunksize, **TEXT_OPTIONS):
+                buckets.spill(chunk, _key_hashes(chunk[key]) % np.uint64(n_partitions))
+
+        for pid in range(n_partitions):
+            if pid not in left or pid not in right:
+                continue
+            out.write(drop_duplicate_rows(join_frames(left.read(pid), right.read(pid), key)))
+
+    return out.n_rows, len(empty.columns)
+
+
+def hash_append(paths, out_path: str, n_partitions: int = DEFAULT_PARTITIONS,
+                chunksize: int = DEFAULT_CHUNKSIZE):
+    """
+    Concaténation verticale (équivalent de pd.concat + drop_duplicates) hors mémoire :
+    les lignes sont réparties en seaux selon leur hachage, puis chaque seau est dédoublonné.
+    Les colonnes sont alignées sur l'ordre du premier fichier.
+    Retourne (nombre de lignes, nombre de colonnes) du fichier écrit.
+    """
+    columns = list(read_header(paths[0]).columns)
+
+    with _open_output(out_path, columns) as out, tempfile.TemporaryDirectory(prefix="fuse_") as tmpdir:
+        buckets = _Buckets(tmpdir, "rows", n_partitions)
+        for path in paths:
+            for chunk in pd.read_csv(path, chunksize=chunksize, **TEXT_OPTIONS):
+                chunk = chunk[columns]
+                buckets.spill(chunk, _partition_ids(chunk, n_partitions))
+
+        for pid in range(n_partitions):
+            if pid in buckets:
+                out.write(drop_duplicate_rows(buckets.read(pid)))
+
+    return out.n_rows, len(columns)
+
+
+# ---------------------------
+# Choix de la clé de jointure
+# ---------------------------
+class KeyProfile:
+    """Esquisses d'une colonne candidate : nombre de lignes, HyperLogLog et MinHash des clés."""
+
+    def __init__(self):
+        self.n_rows = 0
+        self.hll = HyperLogLog()
+        self.minhash = MinHash()
+
+    def update(self, series: pd.Series):
+        hashes = _key_hashes(series)
+        self.n_rows += len(hashes)
+        self.hll.update(hashes)
+        self.minhash.update(hashes)
+
+    @property
+    def distinct(self) -> float:
+        return max(1.0, min(self.hll.count(), self.n_rows))
+
+
+def profile_keys(path: str, columns, chunksize: int = DEFAULT_CHUNKSIZE) -> dict:
+    """Lit uniquement les colonnes candidates, par blocs, et retourne {colonne: KeyProfile}."""
+    profiles = {col: KeyProfile() for col in columns}
+    for chunk in pd.read_csv(path, usecols=list(columns), chunksize=chunksize, **TEXT_OPTIONS):
+        for col, profile in profiles.items():
+            profile.update(chunk[col])
+    return profiles
+
+
+def estimate_join(left: KeyProfile, right: KeyProfile) -> dict:
+    """
+    Prévision de la jointure interne sur une clé :
+    - clés communes ≈ Jaccard (MinHash) × |union| (HyperLogLog fusionnés)
+    - lignes ≈ clés communes × lignes par clé à gauche × lignes par clé à droite
+    """
+    union = HyperLogLog(left.hll.p)
+    union.merge(left.hll).merge(right.hll)
+    jaccard = left.minhash.jaccard(right.minhash)
+    shared = min(jaccard * union.count(), left.distinct, right.distinct)
+    predicted = shared * (left.n_rows / left.distinct) * (right.n_rows / right.distinct)
+
+    largest = max(left.n_rows, right.n_rows, 1)
+    if predicted > JOIN_REFUSE_FACTOR * largest:
+        risk = "refuse"
+    elif predicted > JOIN_WARN_FACTOR * largest:
+        risk = "warn"
+    else:
+        risk = "ok"
+
+    return {
+        "jaccard": jaccard,
+        "shared_keys": int(round(shared)),
+        "distinct_left": int(round(left.distinct)),
+        "distinct_right": int(round(right.distinct)),
+        "rows_left": left.n_rows,
+        "rows_right": right.n_rows,
+        "predicted_rows": int(round(predicted)),
+        "risk": risk,
+    }
+
+
+def rank_join_keys(left_path: str, right_path: str, columns, chunksize: int = DEFAULT_CHUNKSIZE) -> list:
+    """
+    Classe les colonnes communes comme clés de jointure :
+    jointures non explosives d'abord, puis le plus de clés communes, puis le moins de lignes prévues.
+    """
+    left = profile_keys(left_path, columns, chunksize)
+    right = profile_keys(right_path, columns, chunksize)
+    risk_order = {"ok": 0, "warn": 1, "refuse": 2}
+
+    ranking = [dict(key=col, **estimate_join(left[col], right[col])) for col in columns]
+    ranking.sort(key=lambda r: (risk_order[r["risk"]], -r["shared_keys"], r["predicted_rows"]))
+    return ranking
+
+
+# ---------------------------
+# Fusion de deux fichiers
+# ---------------------------
+class FusionError(Exception):
+    """Fusion impossible (aucune colonne commune) ou refusée (jointure explosive)."""
+
+
+def describe_estimate(best: dict) -> str:
+    return (
+        f"Clé : {best['key']} ({best['shared_keys']} valeurs communes estimées)\n"
+        f"Lignes prévues : ~{best['predicted_rows']} "
+        f"(entrées : {best['rows_left']} et {best['rows_right']})"
+    )
+
+
+def fuse_files(file1_path: str, file2_path: str, output_path: str, confirm=None):
+    """
+    Fusionne deux CSV (résultat au format de l'extension de output_path, cf. writers.py) :
+    - colonnes identiques → concaténation verticale
+    - sinon jointure interne sur la meilleure colonne commune (rank_join_keys)
+    Les gros fichiers passent par le moteur partitionné (hash_append / hash_join) ; les autres sont
+    fusionnés en mémoire selon les mêmes règles (texte brut, join_frames, drop_duplicate_rows) :
+    seul l'ordre des lignes diffère.
+    confirm(best) est appelé pour une jointure volumineuse : si elle retourne False
+    (ou si confirm est None), la fusion est abandonnée et la fonction retourne None.
+    Retourne {"fusion_type", "key", "n_rows", "n_cols"}.
+    """
+    head1 = read_header(file1_path)
+    head2 = read_header(file2_path)
+    common_cols = detect_common_keys(head1, head2)
+
+    if set(head1.columns) == set(head2.columns):
+        key = None
+        fusion_type = "verticale (concaténation)"
+    elif len(common_cols) > 0:
+        # 🔹 Choix de la clé : esquisses HyperLogLog / MinHash des colonnes communes
+        best = rank_join_keys(file1_path, file2_path, common_cols)[0]
+        key = best["key"]
+        if best["risk"] == "refuse":
+            raise FusionError(f"Aucune clé ne permet une jointure raisonnable.\n\n{describe_estimate(best)}")
+        if best["risk"] == "warn" and not (confirm and confirm(best)):
+            return None
+        fusion_type = f"horizontale (clé commune : {key})"
+    else:
+        raise FusionError("Aucune colonne commune trouvée entre les deux fichiers.")
+
+    # --- Gros fichiers : moteur partitionné sur disque, mémoire bornée par partition ---
+    if os.path.getsize(file1_path) + os.path.getsize(file2_path) > STREAMING_THRESHOLD:
+        if key is None:
+            n_rows, n_cols = hash_append([file1_path, file2_path], output_path)
+        else:
+            n_rows, n_cols = hash_join(file1_path, file2_path, key, output_path)
+    else:
+        df1 = pd.read_csv(file1_path, **TEXT_OPTIONS)
+        df2 = pd.read_csv(file2_path, **TEXT_OPTIONS)
+        if key is None:
+            df_final = pd.concat([df1, df2[df1.columns]], ignore_index=True)
+        else:
+            df_final = join_frames(df1, df2, key)
+
+        # --- Nettoyage de base ---
+        df_final = drop_duplicate_rows(df_final).reset_index(drop=True)
+        write_frame(df_final, output_path)
+        n_rows, n_cols = df_final.shape
+
+    return {"fusion_type": fusion_type, "key": key, "n_rows": n_rows, "n_cols": n_cols}
@@ -0,0 +1,226 @@
+# jobs.py
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# Ordonnanceur des tâches longues de l'interface : les fonctions s'exécutent dans un pool borné,
+# leurs résultats et leur progression reviennent par une file vidée dans la boucle Tk (root.after).
+# Aucun import de tkinter ni de pandas : utilisable par les modules de traitement.
+
+# Tâches exécutées simultanément (les suivantes attendent leur tour)
+MAX_WORKERS = 3
+
+# Fréquence de vidage de la file des résultats (ms)
+POLL_MS = 100
+
+# États d'une tâche
+PENDING = "en attente"
+RUNNING = "en cours"
+DONE = "terminée"
+CANCELLED = "annulée"
+FAILED = "erreur"
+
+
+class Cancelled(Exception):
+    """Levée entre deux morceaux lorsqu'une tâche a été annulée."""
+
+
+class CancelToken:
+    """
+    Jeton d'annulation d'une tâche. Appelable (token() → annulé ?), comme le paramètre
+    cancel de RowIndex.build ; check() lève Cancelled pour interrompre un traitement.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def __call__(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled()
+
+
+def check_cancel(cancel):
+    """Lève Cancelled si cancel (callable ou None) signale une annulation."""
+    if cancel is not None and cancel():
+        raise Cancelled()
+
+
+class Job:
+    """Une tâche soumise au JobScheduler : état, progression et jeton d'annulation."""
+
+    def __init__(self, scheduler, job_id: int, title: str):
+        self.scheduler = scheduler
+        self.id = job_id
+        self.title = title
+        self.token = CancelToken()
+        self.status = PENDING
+        self.progress = None    # fraction 0..1, None si inconnue
+        self.message = ""
+        self.started = None
+        self.finished = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def report(self, progress: float = None, message: str = None):
+        """Progression (appelable depuis le thread de la tâche) ; vérifie aussi l'annulation."""
+        self.token.check()
+        self.scheduler._post(self._set_progress, progress, message)
+
+    def _set_progress(self, progress, message):
+        if progress is not None:
+            self.progress = progress
+        if message is not None:
+            self.message = message
+
+    def call_in_main(self, func, *args, **kwargs):
+        """
+        Exécute func dans la boucle Tk et attend son résultat (ex : messagebox.askyesno
+        depuis une tâche) : les widgets ne sont jamais touchés depuis un thread de travail.
+        """
+        done = threading.Event()
+        result = {}
+
+        def call():
+            try:
+                result["value"] = func(*args, **kwargs)
+            except Exception as e:
+                result["error"] = e
+            finally:
+                done.set()
+
+        self.scheduler._post(call)
+        while not done.wait(0.1):
+            self.token.check()
+        if "error" in result:
+            raise result["error"]
+        return result["value"]
+
+
+class JobScheduler:
+    """
+    Pool borné de tâches en arrière-plan pour une fenêtre Tk.
+    - submit(titre, func, on_done, on_error) : func(job) s'exécute dans un thread du pool ;
+      on_done(résultat) / on_error(exception) sont appelés dans la boucle Tk
+    - chaque tâche a un jeton d'annulation (job.token) vérifié entre les morceaux
+    - listeners : fonctions appelées dans la boucle Tk à chaque changement (panneau des tâches)
+    """
+
+    def __init__(self, root, max_workers: int = MAX_WORKERS):
+        self.root = root
+        self.jobs = []
+        self.listeners = []
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._queue = queue.Queue()
+        self._next_id = 1
+        self._closed = False
+        self.root.after(POLL_MS, self._drain)
+
+    def submit(self, title: str, func, on_done=None, on_error=None) -> Job:
+        job = Job(self, self._next_id, title)
+        self._next_id += 1
+        self.jobs.append(job)
+        self._executor.submit(self._run, job, func, on_done, on_error)
+        self._notify()
+        return job
+
+    def cancel(self, job: Job):
+        job.token.cancel()
+        if job.status == PENDING:
+            job.status = CANCELLED
+            self._notify()
+
+    def active(self) -> list:
+        return [job for job in self.jobs if job.status in (PENDING, RUNNING)]
+
+    def clear_finished(self):
+        self.jobs = self.active()
+        self._notify()
+
+    def shutdown(self):
+        """Annule toutes les tâches (à la fermeture de la fenêtre principale)."""
+        self._closed = True
+        for job in self.active():
+            job.token.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Thread de travail ---
+    def _run(self, job, func, on_done, on_error):
+        if job.token.cancelled:
+            return
+        self._post(self._set_status, job, RUNNING)
+        job.started = time.perf_counter()
+        try:
+            result = func(job)
+        except Cancelled:
+            job.finished = time.perf_counter()
+            self._post(self._set_status, job, CANCELLED)
+        except Exception as e:
+            job.finished = time.perf_counter()
+            self._post(self._set_status, job, FAILED, str(e))
+            if on_error is not None:
+                self._post(on_error, e)
+        else:
+            job.finished = time.perf_counter()
+            self._post(self._set_status, job, DONE)
+            if on_done is not None:
+                self._post(self._finish, job, on_done, on_error, result)
+
+    # --- Boucle Tk ---
+    def _post(self, func, *args):
+        self._queue.put((func, args))
+
+    def _finish(self, job, on_done, on_error, result):
+        """Rappel on_done ; s'il échoue, la tâche passe en erreur et on_error est appelé."""
+        try:
+            on_done(result)
+        except Exception as e:
+            traceback.print_exc()
+            self._set_status(job, FAILED, str(e))
+            if on_error is not None:
+                on_error(e)
+
+    def _set_status(self, job, status, message=None):
+        job.status = status
+        if status == DONE:
+            job.progress = 1.0
+        if message is not None:
+            job.message = message
+
+    def _notify(self):
+        for listener in list(self.listeners):
+            listener()
+
+    def _drain(self):
+        if self._closed:
+            return
+        changed = False
+        while True:
+            try:
+                func, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            changed = True
+            try:
+                func(*args)
+            except Exception:
+                # un rappel défaillant ne doit pas arrêter le vidage de la file
+                traceback.print_exc()
+        if changed or self.active():
+            self._notify()
+        self.root.after(POLL_MS, self._drain)
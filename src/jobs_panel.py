@@ -0,0 +1,68 @@
+# jobs_panel.py
+from tkinter import ttk
+
+from jobs import PENDING, RUNNING
+
+BAR_WIDTH = 12
+
+
+def _progress_text(job) -> str:
+    if job.progress is None:
+        return "…" if job.status == RUNNING else ""
+    filled = int(round(job.progress * BAR_WIDTH))
+    return f"{'█' * filled}{'░' * (BAR_WIDTH - filled)} {job.progress:.0%}"
+
+
+class JobsPanel:
+    """
+    Panneau des tâches en arrière-plan (ancré dans la fenêtre principale) :
+    état, progression et durée de chaque tâche, annulation de la tâche sélectionnée.
+    Mis à jour dans la boucle Tk par le JobScheduler (jamais depuis un thread de travail).
+    """
+
+    def __init__(self, parent, scheduler):
+        self.scheduler = scheduler
+        self.frame = ttk.LabelFrame(parent, text=" Tâches en arrière-plan ", padding=6)
+
+        columns = ("title", "status", "progress", "elapsed", "message")
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", height=4)
+        for col, text, width in [
+            ("title", "Tâche", 260),
+            ("status", "État", 90),
+            ("progress", "Progression", 150),
+            ("elapsed", "Durée", 70),
+            ("message", "Détail", 330),
+        ]:
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor="w")
+        self.tree.pack(side="left", expand=True, fill="both")
+
+        buttons = ttk.Frame(self.frame)
+        buttons.pack(side="right", fill="y", padx=(6, 0))
+        ttk.Button(buttons, text="⏹ Annuler", command=self.cancel_selected).pack(fill="x", pady=2)
+        ttk.Button(buttons, text="🧹 Effacer terminées", command=scheduler.clear_finished).pack(fill="x", pady=2)
+
+        scheduler.listeners.append(self.refresh)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def cancel_selected(self):
+        selected = {int(iid) for iid in self.tree.selection()}
+        for job in self.scheduler.jobs:
+            if job.id in selected and job.status in (PENDING, RUNNING):
+                self.scheduler.cancel(job)
+
+    def refresh(self):
+        shown = set(self.tree.get_children())
+        current = set()
+        for job in self.scheduler.jobs:
+            iid = str(job.id)
+            current.add(iid)
+            values = (job.title, job.status, _progress_text(job), f"{job.elapsed:.1f}s", job.message)
+            if iid in shown:
+                self.tree.item(iid, values=values)
+            else:
+                self.tree.insert("", "end", iid=iid, values=values)
+        for iid in shown - current:
+            self.tree.delete(iid)
@@ -1,28 +1,80 @@
 # main_gui.py
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
 import os
+import importlib
 import threading
 import time
 
-# Import des fonctions externes (assure-toi que ces modules existent)
-from preprocessing import (
-    handle_missing_data,
-    normalize_data,
-    standardize_data,
-    variance_threshold_filter,
-    encode_categorical,
-    label_encode_categorical,
-)
-from fuse import fuse_datasets_interactive
-from visualize import visualize_interactive
-from smart_preprocessing import analyze_dataset
-from auto_analysis import run_auto_analysis  # module YData Profiling
-from preprocessing import handle_outliers
+from jobs import JobScheduler
+from jobs_panel import JobsPanel
+from progress import Progress
 
 DATA_DIR = "data"
 
+# Modules lourds (pandas, scikit-learn, matplotlib, seaborn, ydata_profiling) : importés
+# par la commande qui en a besoin, et préchargés en arrière-plan une fois la fenêtre affichée
+# (du plus utile au plus coûteux). Les imports différés sont faits dans les fonctions.
+PREWARM_MODULES = [
+    "session_store",
+    "data_grid",
+    "cache",
+    "operations",
+    "smart_preprocessing",
+    "pipeline",
+    "fuse",
+    "visualize",
+    "auto_analysis",
+]
+
+# DataFrames chargés, partagés entre l'aperçu, la visualisation et l'analyse intelligente
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+# Tâches longues (prétraitement, analyse, fusion…), exécutées hors de la boucle Tk
+_JOBS = None
+
+# Format des fichiers produits (menu Fichier > Format de sortie) : "" garde celui du fichier
+# d'entrée, sinon une clé de formats.FORMATS (lu dans la boucle Tk, avant de lancer la tâche)
+_OUTPUT_FORMAT = None
+
+# Fichiers dont l'index d'offsets est en cours de construction (index_in_background)
+_INDEXING = set()
+
+
+def jobs() -> JobScheduler:
+    """JobScheduler de la fenêtre principale (créé par launch_main_window)."""
+    return _JOBS
+
+
+def output_format():
+    """Format de sortie choisi (clé de formats.FORMATS), ou None : celui du fichier d'entrée."""
+    return (_OUTPUT_FORMAT.get() if _OUTPUT_FORMAT is not None else "") or None
+
+
+def session():
+    """SessionStore du processus, créé à la première utilisation (importe pandas)."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            from cache import load_csv
+            from session_store import SessionStore
+            _SESSION = SessionStore(load_csv, budget=1024 ** 3)
+        return _SESSION
+
+
+def prewarm(modules=PREWARM_MODULES):
+    """Importe les modules lourds dans un thread démon (les erreurs sont ignorées ici
+    et réapparaîtront lors de la commande qui en a besoin)."""
+    def task():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass
+    threading.Thread(target=task, daemon=True).start()
+
 
 # ---------------------------
 # Utilitaires
@@ -31,16 +83,28 @@ def ensure_data_dir():
     os.makedirs(DATA_DIR, exist_ok=True)
 
 
+def hold_until_closed(win, path):
+    """Libère le dataset de la session lorsque la fenêtre qui l'utilise est fermée."""
+    def on_destroy(event):
+        if event.widget is win:
+            session().release(path)
+    win.bind("<Destroy>", on_destroy, add="+")
+
+
 # ---------------------------
 # Fenêtre principale
 # ---------------------------
 def launch_main_window():
+    global _JOBS, _OUTPUT_FORMAT
     ensure_data_dir()
     root = tk.Tk()
     root.title("Gestion de Base de Données ")
     root.geometry("1100x650")
     root.minsize(900, 550)
     root._icons = {}
+    _JOBS = JobScheduler(root)
+    _OUTPUT_FORMAT = tk.StringVar(root, value="")
+    root.bind("<Destroy>", lambda e: _JOBS.shutdown() if e.widget is root else None, add="+")
 
     # --- BARRE DE MENU ---
     menubar = tk.Menu(root)
@@ -51,6 +115,9 @@ def launch_main_window():
     menubar.add_cascade(label="Fichier", menu=file_menu)
     file_menu.add_command(label="Charger un CSV", command=lambda: import_csv(tree))
     file_menu.add_command(label="Supprimer un CSV", command=lambda: delete_csv(tree))
+    format_menu = tk.Menu(file_menu, tearoff=0)
+    file_menu.add_cascade(label="Format de sortie", menu=format_menu)
+    build_format_menu(format_menu)
     file_menu.add_separator()
     file_menu.add_command(label="Quitter", command=root.destroy)
 
@@ -59,15 +126,24 @@ def launch_main_window():
     menubar.add_cascade(label="Prétraitement", menu=pre_menu)
     encode_menu = tk.Menu(pre_menu, tearoff=0)
     pre_menu.add_cascade(label="Encodage", menu=encode_menu)
-    encode_menu.add_command(label="One-Hot Encoding", command=lambda: run_with_progress(tree, "onehot", root))
-    encode_menu.add_command(label="Label Encoding", command=lambda: run_with_progress(tree, "label", root))
-    pre_menu.add_command(label="Gestion des valeurs manquantes", command=lambda: run_with_progress(tree, "missing", root))
-    pre_menu.add_command(label="Standardisation", command=lambda: run_with_progress(tree, "standardize", root))
-    pre_menu.add_command(label="Normalisation", command=lambda: run_with_progress(tree, "normalize", root))
-    pre_menu.add_command(label="Filtrage par variance", command=lambda: run_with_progress(tree, "variance", root))
+    encode_menu.add_command(label="One-Hot Encoding", command=lambda: run_with_progress(tree, "onehot"))
+    encode_menu.add_command(label="Label Encoding", command=lambda: run_with_progress(tree, "label"))
+    pre_menu.add_command(label="Gestion des valeurs manquantes", command=lambda: run_with_progress(tree, "missing"))
+    pre_menu.add_command(label="Standardisation", command=lambda: run_with_progress(tree, "standardize"))
+    pre_menu.add_command(label="Normalisation", command=lambda: run_with_progress(tree, "normalize"))
+    pre_menu.add_command(label="Filtrage par variance", command=lambda: run_with_progress(tree, "variance"))
+    pre_menu.add_command(label="Traitement des outliers (IQR)", command=lambda: run_with_progress(tree, "outliers"))
+    pre_menu.add_separator()
+    pre_menu.add_command(label="Appliquer un pipeline ajusté…", command=lambda: run_fitted_pipeline(tree))
     pre_menu.add_separator()
     pre_menu.add_command(label="Analyse intelligente (auto)", command=lambda: open_smart_analysis(tree))
-    pre_menu.add_command(label="Profiling avancé (YData)", command=lambda: open_auto_profiling(tree))
+    profile_menu = tk.Menu(pre_menu, tearoff=0)
+    pre_menu.add_cascade(label="Profiling", menu=profile_menu)
+    profile_menu.add_command(label="Rapide (minimal)", command=lambda: open_auto_profiling(tree, "minimal"))
+    profile_menu.add_command(label="Échantillonné", command=lambda: open_auto_profiling(tree, "sampled"))
+    profile_menu.add_command(label="Complet", command=lambda: open_auto_profiling(tree, "full"))
+    profile_menu.add_separator()
+    profile_menu.add_command(label="YData Profiling (lent)", command=lambda: open_auto_profiling(tree, "ydata"))
 
     # --- MENU : Visualisation ---
     vis_menu = tk.Menu(menubar, tearoff=0)
@@ -85,7 +161,7 @@ def launch_main_window():
         vis_menu.add_command(label=vis, command=lambda v=vis: open_visualization(tree, v))
 
     # --- MENU : Fusion ---
-    menubar.add_command(label="Fusion", command=fuse_datasets_interactive)
+    menubar.add_command(label="Fusion", command=lambda: open_fusion(tree))
 
     # --- MENU : Aide ---
     help_menu = tk.Menu(menubar, tearoff=0)
@@ -131,12 +207,17 @@ def launch_main_window():
 
     style = {"compound": "left", "padding": (4, 2)}
     ttk.Button(toolbar, image=root._icons["import"], command=lambda: import_csv(tree), **style).pack(side="left", padx=4, pady=3)
-    ttk.Button(toolbar, image=root._icons["process"], command=lambda: run_with_progress(tree, "missing", root), **style).pack(side="left", padx=4, pady=3)
+    ttk.Button(toolbar, image=root._icons["process"], command=lambda: run_with_progress(tree, "missing"), **style).pack(side="left", padx=4, pady=3)
     ttk.Button(toolbar, image=root._icons["visual"], command=lambda: open_visualization(tree, "Histogramme"), **style).pack(side="left", padx=4, pady=3)
-    ttk.Button(toolbar, image=root._icons["fuse"], command=fuse_datasets_interactive, **style).pack(side="left", padx=4, pady=3)
+    ttk.Button(toolbar, image=root._icons["fuse"], command=lambda: open_fusion(tree), **style).pack(side="left", padx=4, pady=3)
     ttk.Button(toolbar, image=root._icons["refresh"], command=lambda: show_databases(tree), **style).pack(side="left", padx=4, pady=3)
     ttk.Button(toolbar, image=root._icons["quit"], command=root.destroy, **style).pack(side="right", padx=4, pady=3)
 
+    # Barre d’état et panneau des tâches (placés avant la zone centrale, qui prend le reste)
+    status = tk.Label(root, text="Prêt", anchor="w", relief="sunken", bd=1)
+    status.pack(side="bottom", fill="x")
+    JobsPanel(root, _JOBS).pack(side="bottom", fill="x", padx=10, pady=(0, 6))
+
     # -------------------------------------------------
     # ✅ ZONE CENTRALE (table des fichiers)
     # -------------------------------------------------
@@ -150,31 +231,64 @@ def launch_main_window():
     tree.pack(expand=True, fill="both")
     tree.bind("<Double-1>", lambda e: open_dataset(tree))
 
-    # Barre d’état
-    status = tk.Label(root, text="Prêt", anchor="w", relief="sunken", bd=1)
-    status.pack(side="bottom", fill="x")
-
     # Chargement initial
     show_databases(tree)
     root._tree = tree
     root._status = status
+    root.after(200, prewarm)
     root.mainloop()
 
+
+def build_format_menu(menu):
+    """Choix du format des fichiers produits (prétraitements, pipelines, analyse intelligente, fusion)."""
+    from formats import FORMAT_LABELS, available_formats
+    menu.add_radiobutton(label="Comme le fichier d'entrée", variable=_OUTPUT_FORMAT, value="")
+    menu.add_separator()
+    for fmt in available_formats():
+        menu.add_radiobutton(label=FORMAT_LABELS[fmt], variable=_OUTPUT_FORMAT, value=fmt)
+
+
 # ---------------------------
 # Gestion fichiers CSV
 # ---------------------------
 def show_databases(tree):
+    """Liste les jeux de données de DATA_DIR : CSV (bruts ou compressés), Parquet, Feather et dossiers .parts."""
+    from formats import data_size, is_data_file
+
     tree.delete(*tree.get_children())
     if not os.path.exists(DATA_DIR):
         return
-    files = [f for f in os.listdir(DATA_DIR) if f.lower().endswith(".csv")]
+    files = [f for f in os.listdir(DATA_DIR) if is_data_file(f)]
     for f in sorted(files):
-        size_kb = round(os.path.getsize(os.path.join(DATA_DIR, f)) / 1024, 1)
+        size_kb = round(data_size(os.path.join(DATA_DIR, f)) / 1024, 1)
         tree.insert("", "end", values=(f, size_kb))
+    index_in_background([os.path.join(DATA_DIR, f) for f in sorted(files)])
+
+
+def index_in_background(paths):
+    """
+    Crée / complète l'index d'offsets des fichiers dont l'index manque ou est périmé
+    (accès direct à la ligne N) ; un fichier déjà en cours d'indexation n'est pas relancé.
+    """
+    paths = [path for path in paths if path not in _INDEXING]
+    if not paths:
+        return
+    _INDEXING.update(paths)
+
+    def task():
+        try:
+            from row_index import build_indexes
+            build_indexes(paths)
+        finally:
+            _INDEXING.difference_update(paths)
+    threading.Thread(target=task, daemon=True).start()
 
 
 def import_csv(tree):
-    path = filedialog.askopenfilename(title="Sélectionner un fichier CSV", filetypes=[("CSV files", "*.csv")])
+    path = filedialog.askopenfilename(title="Sélectionner un fichier CSV", filetypes=[
+        ("Jeux de données", "*.csv *.csv.gz *.csv.zst *.parquet *.feather"),
+        ("CSV files", "*.csv"),
+    ])
     if not path:
         return
     dest = os.path.join(DATA_DIR, os.path.basename(path))
@@ -182,6 +296,9 @@ def import_csv(tree):
     try:
         with open(path, "rb") as src, open(dest, "wb") as dst:
             dst.write(src.read())
+        from cache import invalidate
+        invalidate(dest)
+        session().invalidate(dest)
         messagebox.showinfo("Importation", f"Fichier importé : {os.path.basename(path)}")
         show_databases(tree)
     except Exception as e:
@@ -202,7 +319,18 @@ def delete_csv(tree):
         return
 
     try:
-        os.remove(path)
+        from formats import remove_data
+        remove_data(path)  # fichier, ou dossier de parties .parts
+        from cache import invalidate
+        from row_index import remove_index
+        from fitted import pipeline_path
+        from profiler import report_path, state_path
+        invalidate(path)
+        remove_index(path)
+        for derived in (pipeline_path(path), state_path(report_path(path))):
+            if os.path.exists(derived):
+                os.remove(derived)
+        session().invalidate(path)
         show_databases(tree)
         messagebox.showinfo("Supprimé", f"Le fichier '{filename}' a été supprimé avec succès.")
     except Exception as e:
@@ -213,229 +341,221 @@ def delete_csv(tree):
 # Ouverture & preview dataset
 # ---------------------------
 def open_dataset(tree):
+    """Aperçu à défilement virtuel : seules les lignes visibles sont lues (index d'offsets)."""
     item = tree.selection()
     if not item:
         return
     filename = tree.item(item, "values")[0]
     path = os.path.join(DATA_DIR, filename)
     try:
-        df = pd.read_csv(path)
+        from data_grid import open_data_grid
+        open_data_grid(path)
     except Exception as e:
         messagebox.showerror("Erreur", f"Impossible de lire le fichier : {e}")
-        return
-
-    win = tk.Toplevel()
-    win.title(f"Aperçu - {filename}")
-    win.geometry("900x600")
-
-    top_label = ttk.Label(win, text=f"--- {filename} ---    Lignes : {df.shape[0]}    Colonnes : {df.shape[1]}")
-    top_label.pack(anchor="w", padx=8, pady=6)
-
-    text = tk.Text(win, wrap="none", font=("Consolas", 10))
-    text.pack(expand=True, fill="both")
 
-    # affichage des premières lignes
-    text.insert("end", str(df.head(12)))
-    text.config(state="disabled")
 
-
-def apply_preprocessing(tree, action):
+def selected_path(tree, message="Sélectionnez un fichier CSV."):
+    """(nom, chemin) du fichier sélectionné, ou None après un avertissement."""
     item = tree.selection()
     if not item:
-        messagebox.showwarning("Attention", "Sélectionnez un fichier CSV.")
-        return
-
+        messagebox.showwarning("Attention", message)
+        return None
     filename = tree.item(item, "values")[0]
-    path = os.path.join(DATA_DIR, filename)
-    df = pd.read_csv(path)
+    return filename, os.path.join(DATA_DIR, filename)
 
-    # --- Appliquer le prétraitement ---
-    if action == "missing":
-        df_new, changed = handle_missing_data(df)
-        if not changed:
-            messagebox.showinfo(
-                "Information",
-                "Le dataset ne contient aucune valeur manquante. Aucun prétraitement nécessaire."
-            )
-            return
 
-    elif action == "onehot":
-        df_new = encode_categorical(df)
+def job_progress(job) -> Progress:
+    """Progress dont les événements (étape, octets, ETA) alimentent la ligne de la tâche."""
+    return Progress(lambda event: job.report(event.fraction, event.describe()))
 
-    elif action == "label":
-        df_new = label_encode_categorical(df)
 
-    elif action == "normalize":
-        df_new = normalize_data(df)
+def apply_preprocessing(path, action, cancel=None, progress=None, fmt=None):
+    """
+    Applique le prétraitement et sauvegarde le résultat (thread de travail : aucun widget).
+    fmt : format du fichier produit (None : celui du fichier d'entrée).
+    Retourne le message de fin, ou None si le traitement n'avait rien à faire.
+    """
+    from formats import data_size
+    from operations import STREAMING_ACTIONS, output_path, run_preprocessing
+    from streaming import STREAMING_THRESHOLD
 
-    elif action == "standardize":
-        df_new = standardize_data(df)
+    # --- Générer un nouveau nom de fichier pour ne pas écraser l'original ---
+    new_path = output_path(path, action, fmt=fmt)  # ex: "data/data_missing.csv"
 
-    elif action == "variance":
-        df_new = variance_threshold_filter(df, threshold=0.01)
+    # --- Gros fichiers : traitement en streaming (deux passages par morceaux) ---
+    streaming = action in STREAMING_ACTIONS and data_size(path) > STREAMING_THRESHOLD
 
-    else:
-        messagebox.showerror("Erreur", "Action inconnue.")
-        return
+    # --- Appliquer le prétraitement et sauvegarder le résultat ---
+    if not run_preprocessing(path, action, new_path, load=session().get, cancel=cancel, progress=progress):
+        return None
 
-    # --- Générer un nouveau nom de fichier pour ne pas écraser l'original ---
-    base, ext = os.path.splitext(filename)
-    new_filename = f"{base}_{action}{ext}"  # ex: "data_missing.csv"
-    new_path = os.path.join(DATA_DIR, new_filename)
+    mode = " (streaming)" if streaming else ""
+    return f"Le prétraitement '{action}' a été appliqué{mode}.\nFichier enregistré : {os.path.basename(new_path)}"
 
-    # --- Sauvegarder le DataFrame prétraité ---
-    df_new.to_csv(new_path, index=False)
-    messagebox.showinfo("Terminé", f"Le prétraitement '{action}' a été appliqué.\nFichier enregistré : {new_filename}")
 
 # ---------------------------
-# Prétraitement & sauvegarde
+# Tâches en arrière-plan
 # ---------------------------
-def apply_suggestions(df, suggestions, filename, win):
-    
-
-    df_new = df.copy()
-
-    for s in suggestions:
-        t = s["type"].lower()
-
-        if "manquantes" in t:
-            df_new, changed = handle_missing_data(df_new)
-            if not changed:
-                messagebox.showinfo(
-                    "Information",
-                    "Le dataset ne contient aucune valeur manquante. Aucun prétraitement nécessaire."
-                )
-                continue  # passe au traitement suivant
-
-            
-
-        elif "standardisation" in t:
-            df_new = standardize_data(df_new)
-
-        elif "normalisation" in t and "aucune" not in s["action"].lower():
-            df_new = normalize_data(df_new)
-
-        elif "encodage" in t:
-            # --- Encodage automatique des variables catégorielles ---
-            cat_cols = df_new.select_dtypes(include=["object", "category"]).columns
-            if len(cat_cols) == 0:
-                continue
-            df_new = label_encode_categorical(df_new)
-
-
-        elif "outliers":
-            df_new = handle_outliers(df)
+def run_with_progress(tree, action):
+    """
+    Soumet le prétraitement au planificateur de tâches : la fenêtre reste utilisable,
+    plusieurs prétraitements peuvent tourner en même temps (suivi dans le panneau des tâches).
+    """
+    selected = selected_path(tree)
+    if selected is None:
+        return
+    filename, path = selected
+    fmt = output_format()
 
-    out_name = f"{os.path.splitext(filename)[0]}_smart.csv"
-    df_new.to_csv(os.path.join(DATA_DIR, out_name), index=False)
+    def done(message):
+        if message is None:
+            messagebox.showinfo(
+                "Information",
+                "Le dataset ne contient aucune valeur manquante. Aucun prétraitement nécessaire."
+            )
+            return
+        show_databases(tree)
+        messagebox.showinfo("Terminé", message)
 
-    messagebox.showinfo(
-        "Succès",
-        f"Prétraitement intelligent appliqué → {out_name}\n"
-        f"Les encodages catégoriels ont été générés automatiquement."
+    jobs().submit(
+        f"Prétraitement {action} : {filename}",
+        lambda job: apply_preprocessing(path, action, cancel=job.token, progress=job_progress(job), fmt=fmt),
+        on_done=done,
+        on_error=lambda e: messagebox.showerror("Erreur", f"Prétraitement '{action}' impossible : {e}"),
     )
 
-    win.destroy()
 
-# ---------------------------
-# Progress / threading wrapper
-# ---------------------------
-def run_with_progress(tree, action, parent_root=None):
+def run_fitted_pipeline(tree):
     """
-    Ouvre une petite fenêtre avec barre de progression indéterminée
-    et exécute apply_preprocessing dans un thread.
+    Réapplique un pipeline enregistré (fichier .pipeline.json produit par les prétraitements)
+    au fichier sélectionné, morceau par morceau, sans recalculer de statistiques.
     """
-    progress_win = tk.Toplevel(parent_root) if parent_root else tk.Toplevel()
-    progress_win.title("Traitement en cours...")
-    progress_win.geometry("420x110")
-    progress_win.resizable(False, False)
+    selected = selected_path(tree)
+    if selected is None:
+        return
+    filename, path = selected
+    pipeline_file = filedialog.askopenfilename(
+        title="Sélectionner un pipeline ajusté", initialdir=DATA_DIR,
+        filetypes=[("Pipeline ajusté", "*.pipeline.json")],
+    )
+    if not pipeline_file:
+        return
+    fmt = output_format()
 
-    ttk.Label(progress_win, text=f"Application du prétraitement : {action}", anchor="center").pack(pady=(12, 6))
+    def task(job):
+        from fitted import FittedPipeline
+        from operations import apply_pipeline, output_path
 
-    pb = ttk.Progressbar(progress_win, mode="indeterminate", length=360)
-    pb.pack(pady=(0, 12))
-    pb.start(12)
+        actions = FittedPipeline.load(pipeline_file).actions
+        new_path = output_path(path, "_".join(actions), fmt=fmt)
+        n_rows = apply_pipeline(pipeline_file, path, new_path, cancel=job.token, progress=job_progress(job))
+        return (f"Pipeline appliqué ({' → '.join(actions)}) : {n_rows} lignes.\n"
+                f"Fichier enregistré : {os.path.basename(new_path)}")
 
-    # Désactiver la fenêtre principale si parent_root donné (optionnel)
-    if parent_root:
-        try:
-            parent_root.attributes("-disabled", True)
-        except Exception:
-            pass
+    def done(message):
+        show_databases(tree)
+        messagebox.showinfo("Terminé", message)
 
-    def task():
-        try:
-            # Petite pause pour laisser l'UI répondre
-            time.sleep(0.2)
-            apply_preprocessing(tree, action)
-        finally:
-            # arrêt de la progressbar et fermeture
-            try:
-                pb.stop()
-                progress_win.destroy()
-                if parent_root:
-                    parent_root.attributes("-disabled", False)
-            except Exception:
-                pass
+    jobs().submit(
+        f"Pipeline ajusté : {filename}", task, on_done=done,
+        on_error=lambda e: messagebox.showerror("Erreur", f"Impossible d'appliquer le pipeline : {e}"),
+    )
 
-    threading.Thread(target=task, daemon=True).start()
+
+def acquire_in_job(job, path):
+    """Charge le dataset dans la session depuis une tâche ; le libère si la tâche est annulée."""
+    df = session().acquire(path, progress=job_progress(job))
+    if job.token.cancelled:
+        session().release(path)
+        job.token.check()
+    return df
 
 
 # ---------------------------
 # Visualisation
 # ---------------------------
 def open_visualization(tree, vis_type):
-    item = tree.selection()
-    if not item:
-        messagebox.showwarning("Attention", "Sélectionnez un fichier CSV.")
+    selected = selected_path(tree)
+    if selected is None:
         return
+    filename, path = selected
 
-    filename = tree.item(item, "values")[0]
-    path = os.path.join(DATA_DIR, filename)
+    def task(job):
+        df = acquire_in_job(job, path)
+        import visualize  # noqa: F401  (matplotlib/seaborn importés hors de la boucle Tk)
+        return df, session().source(path)
 
-    try:
-        df = pd.read_csv(path)
-        # visualise dans une nouvelle fenêtre via la fonction externe
-        visualize_interactive(df, parent=None, default_vis=vis_type)
-    except Exception as e:
-        messagebox.showerror("Erreur", f"Impossible de charger le dataset : {e}")
+    def done(result):
+        df, source = result
+        try:
+            # visualise dans une nouvelle fenêtre via la fonction externe
+            from visualize import visualize_interactive
+            win = visualize_interactive(df, parent=None, default_vis=vis_type, source=source)
+        except Exception as e:
+            win = None
+            messagebox.showerror("Erreur", f"Impossible d'afficher la visualisation : {e}")
+        if win is not None:
+            hold_until_closed(win, path)
+        else:
+            session().release(path)
+
+    jobs().submit(
+        f"Chargement pour visualisation : {filename}", task, on_done=done,
+        on_error=lambda e: messagebox.showerror("Erreur", f"Impossible de charger le dataset : {e}"),
+    )
 
 
 # ---------------------------
 # Analyse intelligente (smart)
 # ---------------------------
 def open_smart_analysis(tree):
-    item = tree.selection()
-    if not item:
-        messagebox.showwarning("Attention", "Sélectionnez un fichier CSV.")
+    selected = selected_path(tree)
+    if selected is None:
         return
+    filename, path = selected
 
-    filename = tree.item(item, "values")[0]
-    path = os.path.join(DATA_DIR, filename)
-    try:
-        df = pd.read_csv(path)
-    except Exception as e:
-        messagebox.showerror("Erreur", f"Impossible de lire le fichier : {e}")
-        return
+    def task(job):
+        df = acquire_in_job(job, path)
+        try:
+            from smart_preprocessing import analyze_dataset
+            suggestions, summary = analyze_dataset(df)  # attend une liste de dicts
+            job.token.check()
+        except BaseException:
+            session().release(path)
+            raise
+        return df, suggestions, summary
+
+    jobs().submit(
+        f"Analyse intelligente : {filename}", task,
+        on_done=lambda result: show_smart_analysis(tree, filename, path, *result),
+        on_error=lambda e: messagebox.showerror("Erreur", f"Impossible d'analyser le fichier : {e}"),
+    )
 
-    suggestions, summary = analyze_dataset(df)  # attend une liste de dicts
 
+def show_smart_analysis(tree, filename, path, df, suggestions, summary):
     win = tk.Toplevel()
     win.title("Analyse intelligente du prétraitement")
-    win.geometry("700x500")
+    win.geometry("780x500")
+    hold_until_closed(win, path)
 
     ttk.Label(win, text=f"🔍 Analyse automatique de '{filename}'", font=("Segoe UI", 12, "bold")).pack(pady=8)
 
     frame = ttk.Frame(win, padding=8)
     frame.pack(expand=True, fill="both")
 
-    treeview = ttk.Treeview(frame, columns=("type", "action", "reason"), show="headings", height=12)
+    if summary.get("sampled"):
+        ttk.Label(win, text=f"Analyse sur un échantillon de {summary['n_analyzed']} lignes (agrégats simples exacts)",
+                  font=("Segoe UI", 9, "italic")).pack()
+
+    treeview = ttk.Treeview(frame, columns=("type", "action", "reason", "confidence"), show="headings", height=12)
     treeview.heading("type", text="Type de traitement")
     treeview.heading("action", text="Action recommandée")
     treeview.heading("reason", text="Raison")
+    treeview.heading("confidence", text="Confiance")
     treeview.column("type", width=180)
     treeview.column("action", width=200)
     treeview.column("reason", width=320)
+    treeview.column("confidence", width=80, anchor="center")
     treeview.pack(expand=True, fill="both")
 
     for s in suggestions:
@@ -443,80 +563,85 @@ def open_smart_analysis(tree):
         t = s.get("type", "")
         a = s.get("action", "")
         r = s.get("reason", "")
-        treeview.insert("", "end", values=(t, a, r))
+        c = s.get("confidence", 1.0)
+        treeview.insert("", "end", values=(t, a, r, f"{c:.0%}"))
 
-    ttk.Button(win, text="Appliquer automatiquement", command=lambda: apply_suggestions(df, suggestions, filename, win)).pack(pady=8)
+    ttk.Button(win, text="Appliquer automatiquement",
+               command=lambda: apply_suggestions(df, suggestions, filename, win, tree)).pack(pady=8)
 
 
-def apply_suggestions(df, suggestions, filename, win):
-    from sklearn.preprocessing import LabelEncoder
+def apply_suggestions(df, suggestions, filename, win, tree=None):
+    """
+    Applique les suggestions via un plan fusionné (un passage de statistiques,
+    un passage de transformation) au lieu d'enchaîner les fonctions de preprocessing.
+    Exécuté en arrière-plan ; la fenêtre d'analyse se ferme à la fin.
+    """
+    from formats import FORMATS, split_format
+    base, ext = split_format(filename)
+    fmt = output_format()
+    out_name = f"{base}_smart{FORMATS[fmt] if fmt else ext}"
+
+    def task(job):
+        from pipeline import PreprocessingPipeline
+        from writers import write_frame
+
+        pipeline = PreprocessingPipeline.from_suggestions(suggestions)
+        df_new = pipeline.run(df)
+        job.token.check()
+
+        start = time.perf_counter()
+        write_frame(df_new, os.path.join(DATA_DIR, out_name), cancel=job.token)
+        pipeline.timings["écriture"] = time.perf_counter() - start
+        return pipeline
+
+    def done(pipeline):
+        messagebox.showinfo(
+            "Succès",
+            f"Prétraitement intelligent appliqué → {out_name}\n\n"
+            f"Étapes : {' → '.join(pipeline.steps) or 'aucune'}\n"
+            f"Durées :\n{pipeline.timings_report()}"
+        )
+        if win.winfo_exists():
+            win.destroy()
+        if tree is not None:
+            show_databases(tree)
+
+    jobs().submit(
+        f"Prétraitement intelligent : {filename}", task, on_done=done,
+        on_error=lambda e: messagebox.showerror("Erreur", f"Impossible d'appliquer les suggestions : {e}"),
+    )
 
-    df_new = df.copy()
 
-    for s in suggestions:
-        t = s.get("type", "").lower()
-        action = s.get("action", "").lower()
+# ---------------------------
+# Profiling (minimal / échantillonné / complet / YData)
+# ---------------------------
+def open_auto_profiling(tree, mode="sampled"):
+    selected = selected_path(tree, "Sélectionnez un fichier CSV à analyser.")
+    if selected is None:
+        return
+    filename, path = selected
 
-        try:
-            if "manquantes" in t or "missing" in t:
-                df_new, changed = handle_missing_data(df_new)
-                if isinstance(changed, bool) and not changed:
-                    continue
-
-            elif "standardisation" in t or "standardize" in t:
-                df_new = standardize_data(df_new)
-
-            elif "normalisation" in t or "normalize" in t:
-                if "aucune" not in action:
-                    df_new = normalize_data(df_new)
-
-            elif "encodage" in t or "encoding" in t:
-                cat_cols = df_new.select_dtypes(include=["object", "category"]).columns
-                if len(cat_cols) == 0:
-                    continue
-                for col in cat_cols:
-                    n_unique = df_new[col].nunique()
-                    if n_unique <= 10:
-                        onehot = pd.get_dummies(df_new[col], prefix=col)
-                        df_new = pd.concat([df_new.drop(columns=[col]), onehot], axis=1)
-                    else:
-                        le = LabelEncoder()
-                        df_new[col] = le.fit_transform(df_new[col].astype(str))
-        except Exception as e:
-            # log minimal, mais on continue
-            print("Erreur apply_suggestions:", e)
+    def task(job):
+        from auto_analysis import generate_report
+        return generate_report(path, mode, cancel=job.token, progress=job_progress(job))
 
-    out_name = f"{os.path.splitext(filename)[0]}_smart.csv"
-    df_new.to_csv(os.path.join(DATA_DIR, out_name), index=False)
+    def done(result):
+        from auto_analysis import show_summary_window
+        show_summary_window(*result)
 
-    messagebox.showinfo("Succès", f"Prétraitement intelligent appliqué → {out_name}")
-    win.destroy()
-    # refresh liste
-    # si une fenêtre principale existe, on peut déclencher show_databases via root._tree
-    # mais ici on laisse l'utilisateur rafraîchir manuellement (bouton Rafraîchir).
+    from auto_analysis import REPORT_MODES
+    jobs().submit(
+        f"Profiling {REPORT_MODES[mode]} : {filename}", task, on_done=done,
+        on_error=lambda e: messagebox.showerror("Erreur", f"Impossible d’exécuter l’analyse automatique : {e}"),
+    )
 
 
 # ---------------------------
-# Profiling avancé (YData)
+# Fusion
 # ---------------------------
-def open_auto_profiling(tree):
-    item = tree.selection()
-    if not item:
-        messagebox.showwarning("Attention", "Sélectionnez un fichier CSV à analyser.")
-        return
-
-    filename = tree.item(item, "values")[0]
-    path = os.path.join(DATA_DIR, filename)
-
-    # exécuter run_auto_analysis dans un thread — peut ouvrir un rapport HTML
-    def task():
-        try:
-            run_auto_analysis(path)
-            messagebox.showinfo("Profiling", "Analyse automatique terminée (vérifiez le dossier de sortie).")
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Impossible d’exécuter l’analyse automatique : {e}")
-
-    threading.Thread(target=task, daemon=True).start()
+def open_fusion(tree):
+    from fuse import fuse_datasets_interactive
+    fuse_datasets_interactive(jobs(), on_done=lambda result: show_databases(tree), fmt=output_format())
 
 
 # ---------------------------
@@ -0,0 +1,175 @@
+# operations.py
+import os
+
+from cache import load_csv, missing_counts
+from fitted import FittedPipeline, pipeline_path, upstream_pipeline
+from formats import FORMATS, check_available, data_size, remove_data, split_format
+from jobs import Cancelled, check_cancel
+from preprocessing import (
+    fit_missing,
+    fit_normalize,
+    fit_standardize,
+    fit_variance,
+    fit_onehot,
+    fit_label,
+    fit_outliers,
+    handle_missing_data,
+    normalize_data,
+    standardize_data,
+    variance_threshold_filter,
+    encode_categorical,
+    label_encode_categorical,
+    handle_outliers,
+)
+from streaming import (
+    STREAMING_THRESHOLD,
+    read_dtypes,
+    stream_missing_data,
+    stream_normalize_data,
+    stream_standardize_data,
+    stream_outliers_data,
+)
+from writers import write_frame
+
+# Traitements sans interface graphique, partagés par la fenêtre principale et la CLI.
+
+# Actions de prétraitement (nom utilisé dans les menus et les noms de fichiers)
+PREPROCESSING_ACTIONS = {
+    "missing": handle_missing_data,
+    "onehot": encode_categorical,
+    "label": label_encode_categorical,
+    "normalize": normalize_data,
+    "standardize": standardize_data,
+    "variance": variance_threshold_filter,
+    "outliers": handle_outliers,
+}
+
+# Ajustement seul (étape de fitted.py, sans transformer) pour chaque action
+FIT_ACTIONS = {
+    "missing": fit_missing,
+    "onehot": fit_onehot,
+    "label": fit_label,
+    "normalize": fit_normalize,
+    "standardize": fit_standardize,
+    "variance": fit_variance,
+    "outliers": fit_outliers,
+}
+
+# Actions disponibles en mode streaming pour les fichiers volumineux
+STREAMING_ACTIONS = {
+    "missing": stream_missing_data,
+    "normalize": stream_normalize_data,
+    "standardize": stream_standardize_data,
+    "outliers": stream_outliers_data,
+}
+
+
+def output_path(path: str, action: str, out_dir: str = None, fmt: str = None) -> str:
+    """
+    Nom du fichier produit, sans écraser l'original (ex : data/data_missing.csv).
+    fmt : format de sortie (formats.FORMATS, ex : "parquet" → data/data_missing.parquet) ;
+    par défaut, celui du fichier d'entrée.
+    """
+    base, ext = split_format(os.path.basename(path))
+    if fmt is not None:
+        check_available(fmt)
+        ext = FORMATS[fmt]
+    return os.path.join(out_dir or os.path.dirname(path), f"{base}_{action}{ext}")
+
+
+def run_preprocessing(path: str, action: str, out_path: str, load=load_csv, n_jobs: int = 1, cancel=None,
+                      progress=None) -> bool:
+    """
+    Applique une action de PREPROCESSING_ACTIONS au fichier path et écrit le résultat dans out_path
+    (au format de son extension : CSV, CSV compressé, Parquet, Feather ou dossier .parts, cf. writers.py).
+    Les gros fichiers passent par le streaming (deux passages par morceaux) lorsque c'est possible.
+    Les paramètres appris sont enregistrés à côté du résultat (pipeline_path(out_path)), à la suite
+    de ceux qui ont produit path : le fichier .pipeline.json rejoue toute la chaîne sur d'autres fichiers.
+    cancel : callable vérifié entre les morceaux (streaming) ou les étapes (en mémoire) ;
+    en cas d'annulation, jobs.Cancelled est levée et le fichier partiel supprimé.
+    progress : progress.Progress facultatif (lecture, statistiques, transformation, écriture) ;
+    load doit alors accepter progress= (load_csv, SessionStore.get).
+    Retourne False si le traitement n'avait rien à faire (aucune valeur manquante).
+    """
+    if action not in PREPROCESSING_ACTIONS:
+        raise ValueError(f"Action inconnue : {action}")
+
+    try:
+        if action in STREAMING_ACTIONS and data_size(path) > STREAMING_THRESHOLD:
+            if progress is not None:
+                progress.n_stages = 2
+            stats = {}
+            step = STREAMING_ACTIONS[action](path, out_path, cancel=cancel, progress=progress, stats=stats)
+            base = _streamed_pipeline(path, stats)
+        else:
+            step, base = _run_in_memory(path, action, out_path, load, n_jobs, cancel, progress)
+    except Cancelled:
+        remove_data(out_path)
+        raise
+
+    if step is not None:
+        (upstream_pipeline(path) or base).then(step).save(pipeline_path(out_path))
+    if progress is not None:
+        progress.finish()
+    return step is not None
+
+
+def _streamed_pipeline(path, stats):
+    floats = [col for col, dtype in read_dtypes(stats).items() if dtype == "float64"]
+    return FittedPipeline(columns=list(stats), float_columns=floats, source=os.path.basename(path))
+
+
+def _run_in_memory(path, action, out_path, load, n_jobs, cancel, progress):
+    if progress is None:
+        df = load(path)
+    else:
+        progress.n_stages = 4
+        df = load(path, progress=progress)
+    check_cancel(cancel)
+    base = FittedPipeline.for_frame(df, source=os.path.basename(path))
+    # comptes des manquants mémorisés par version du CSV (pas de nouveau passage sur les données)
+    kwargs = {"counts": missing_counts(path, df)} if action == "missing" else {}
+    step = FIT_ACTIONS[action](df, n_jobs=n_jobs, progress=progress, **kwargs)
+    if step is None:
+        return None, base  # aucune valeur manquante
+
+    if progress is not None:
+        progress.stage("transformation")
+    df_new = step.transform(df)
+    check_cancel(cancel)
+    write_frame(df_new, out_path, cancel, progress)
+    return step, base
+
+
+def fit_pipeline(path: str, actions, load=load_csv, n_jobs: int = 1, cancel=None, progress=None) -> FittedPipeline:
+    """
+    Ajuste en mémoire une suite d'actions sur le fichier path (chacune sur le résultat de la
+    précédente), sans rien écrire. Une action sans effet (aucune valeur manquante) est omise.
+    """
+    unknown = [action for action in actions if action not in FIT_ACTIONS]
+    if unknown:
+        raise ValueError(f"Action inconnue : {', '.join(unknown)}")
+    df = load(path) if progress is None else load(path, progress=progress)
+    pipeline = FittedPipeline.for_frame(df, source=os.path.basename(path))
+    for action in actions:
+        check_cancel(cancel)
+        step = FIT_ACTIONS[action](df, n_jobs=n_jobs, progress=progress)
+        if step is not None:
+            df = step.transform(df)
+            pipeline = pipeline.then(step)
+    if progress is not None:
+        progress.finish()
+    return pipeline
+
+
+def apply_pipeline(pipeline_file: str, path: str, out_path: str, chunksize: int = None, cancel=None,
+                   progress=None) -> int:
+    """
+    Réapplique un pipeline enregistré (.pipeline.json) au fichier path, morceau par morceau,
+    sans recalculer de statistiques ; le pipeline est recopié à côté du résultat.
+    Retourne le nombre de lignes écrites.
+    """
+    pipeline = FittedPipeline.load(pipeline_file)
+    n_rows = pipeline.transform_file(path, out_path, chunksize, cancel, progress)
+    pipeline.save(pipeline_path(out_path))
+    return n_rows
@@ -0,0 +1,133 @@
+# parallel.py
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# En dessous de ce nombre de cellules, le coût de démarrage des processus dépasse le gain
+MIN_CELLS_PARALLEL = 1_000_000
+
+_EXECUTOR = None
+_EXECUTOR_WORKERS = 0
+
+
+def resolve_n_jobs(n_jobs) -> int:
+    """n_jobs façon scikit-learn : None/1 → série, -1 → tous les cœurs."""
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+
+def _get_executor(n_workers: int) -> ProcessPoolExecutor:
+    """Pool de processus réutilisé d'un appel à l'autre (recréé si la taille change)."""
+    global _EXECUTOR, _EXECUTOR_WORKERS
+    if _EXECUTOR is None or _EXECUTOR_WORKERS != n_workers:
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown()
+        _EXECUTOR = ProcessPoolExecutor(max_workers=n_workers)
+        _EXECUTOR_WORKERS = n_workers
+    return _EXECUTOR
+
+
+@atexit.register
+def _shutdown_executor():
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------------------------
+# Mémoire partagée
+# ---------------------------
+def _is_shareable(series: pd.Series) -> bool:
+    """Colonnes à buffer NumPy natif (numériques, booléens, dates sans fuseau)."""
+    return isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufcmM"
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Ouvre un segment créé par le processus parent.
+    Avant Python 3.13, le worker l'enregistre auprès du resource_tracker hérité du parent
+    (même ensemble de noms, donc sans effet) : seul le parent le libère via unlink().
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        return shared_memory.SharedMemory(name=name)
+
+
+def _run_batch(func, batch):
+    """Exécuté dans le worker : reconstruit chaque colonne puis applique func."""
+    results = {}
+    for col, payload in batch:
+        if isinstance(payload, pd.Series):
+            results[col] = func(payload)
+            continue
+        name, dtype, length = payload
+        shm = _attach(name)
+        values = np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf)
+        try:
+            results[col] = func(pd.Series(values, name=col, copy=False))
+        finally:
+            del values
+            shm.close()
+    return results
+
+
+# ---------------------------
+# API publique
+# ---------------------------
+def column_map(func, df: pd.DataFrame, columns=None, n_jobs=1, progress=None) -> dict:
+    """
+    Applique func(série) à chaque colonne et retourne {colonne: résultat}.
+    Avec n_jobs > 1, les colonnes sont réparties sur un ProcessPoolExecutor :
+    les colonnes numériques passent par des segments de mémoire partagée,
+    les autres sont sérialisées. func doit être une fonction de module (picklable)
+    et ne doit pas renvoyer de vue sur la colonne reçue.
+    Chaque colonne est traitée par le même code dans les deux modes,
+    donc le résultat est identique au bit près à l'exécution en série.
+    progress : progress.Progress facultatif, avancé à chaque colonne (ou lot de colonnes) traitée.
+    """
+    columns = list(df.columns if columns is None else columns)
+    n_jobs = min(resolve_n_jobs(n_jobs), len(columns))
+
+    if n_jobs <= 1 or len(df) * len(columns) < MIN_CELLS_PARALLEL:
+        results = {}
+        for i, col in enumerate(columns):
+            results[col] = func(df[col].reset_index(drop=True))
+            if progress is not None:
+                progress.advance(done=i + 1, chunks=0)
+        return results
+
+    segments = []
+    batches = [[] for _ in range(n_jobs)]
+    try:
+        for i, col in enumerate(columns):
+            series = df[col]
+            if _is_shareable(series):
+                values = series.to_numpy()
+                shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                segments.append(shm)
+                np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+                payload = (shm.name, values.dtype.str, len(values))
+            else:
+                payload = series.reset_index(drop=True)
+            batches[i % n_jobs].append((col, payload))
+
+        executor = _get_executor(n_jobs)
+        futures = [executor.submit(_run_batch, func, batch) for batch in batches if batch]
+        results = {}
+        for future in as_completed(futures):
+            results.update(future.result())
+            if progress is not None:
+                progress.advance(done=len(results), chunks=0)
+    finally:
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+
+    return {col: results[col] for col in columns}
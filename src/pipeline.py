@@ -0,0 +1,213 @@
+# pipeline.py
+import time
+import numpy as np
+import pandas as pd
+
+from fitted import dummy_frame, factorize_labels
+from schema import NA_TOKENS, categorical_columns, is_text, na_tokens_to_nan, numeric_columns
+from streaming import mode_from_counts
+
+# Ordre canonique des étapes (celui des suggestions de analyze_dataset)
+STEP_ORDER = ["missing", "standardize", "normalize", "encode"]
+
+
+def _step_from_suggestion(suggestion):
+    """Traduit une suggestion de smart_preprocessing en nom d'étape (ou None)."""
+    t = suggestion.get("type", "").lower()
+    action = suggestion.get("action", "").lower()
+
+    if "manquantes" in t or "missing" in t:
+        return "missing"
+    if "standardisation" in t or "standardize" in t:
+        return "standardize"
+    if "normalisation" in t or "normalize" in t:
+        if "aucune" in t or "aucune" in action:
+            return None
+        return "normalize"
+    if "encodage" in t or "encoding" in t:
+        return "encode"
+    return None
+
+
+class PreprocessingPipeline:
+    """
+    Plan fusionné des prétraitements suggérés.
+    Au lieu d'enchaîner handle_missing_data → standardize_data → normalize_data → encodage
+    (une copie et un parcours complet par étape), le plan :
+    - calcule toutes les statistiques nécessaires en un seul passage sur les colonnes ;
+    - compose les transformations (imputation, mise à l'échelle affine, encodage)
+      puis construit le DataFrame de sortie en une seule allocation.
+    """
+
+    def __init__(self, steps):
+        self.steps = [s for s in STEP_ORDER if s in steps]
+        self.timings = {}
+        self.changed_missing = False
+
+    @classmethod
+    def from_suggestions(cls, suggestions):
+        steps = {_step_from_suggestion(s) for s in suggestions}
+        return cls(steps - {None})
+
+    def __repr__(self):
+        return f"PreprocessingPipeline({' → '.join(self.steps) or 'vide'})"
+
+    # --------------------------------------------------
+    #  Passage 1 : statistiques
+    # --------------------------------------------------
+    def _collect_stats(self, df: pd.DataFrame):
+        numeric = set(numeric_columns(df))
+        categorical = set(categorical_columns(df))
+
+        stats = {}
+        for col in df.columns:
+            series = df[col]
+            st = {"n_missing": int(series.isna().sum()), "n_tokens": 0}
+            if col in numeric:
+                values = series.to_numpy(dtype="float64")
+                valid = values[~np.isnan(values)]
+                st["kind"] = "numeric"
+                st["n_valid"] = len(valid)
+                st["mean"] = valid.mean() if len(valid) else np.nan
+                st["m2"] = ((valid - st["mean"]) ** 2).sum() if len(valid) else np.nan
+                st["min"] = valid.min() if len(valid) else np.nan
+                st["max"] = valid.max() if len(valid) else np.nan
+            elif col in categorical:
+                st["kind"] = "categorical"
+                counts = series.value_counts(dropna=True)
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    # modalités observées seulement, indexées par leur valeur (comme pour object)
+                    counts = counts[counts > 0]
+                    counts.index = counts.index.astype(object)
+                st["counts"] = counts
+                if is_text(series):
+                    # jetons "?", "", " " : comptés comme manquants sans copier la colonne
+                    st["n_tokens"] = int(st["counts"].reindex(NA_TOKENS).fillna(0).sum())
+                    st["n_missing"] += st["n_tokens"]
+            else:
+                st["kind"] = "other"
+            stats[col] = st
+        return stats
+
+    # --------------------------------------------------
+    #  Construction du plan (à partir des statistiques)
+    # --------------------------------------------------
+    def _impute_plan(self, df, stats):
+        """Colonnes conservées et valeurs de remplissage (règles de handle_missing_data)."""
+        n_rows = len(df)
+        total_missing = sum(st["n_missing"] for st in stats.values())
+        self.changed_missing = "missing" in self.steps and total_missing > 0
+        if not self.changed_missing:
+            return list(df.columns), {}
+
+        threshold_col = 0.5
+        kept = [col for col, st in stats.items() if n_rows and st["n_missing"] / n_rows < threshold_col]
+        fill_values = {}
+        for col in kept:
+            st = stats[col]
+            if st["n_missing"] == 0:
+                continue
+            if st["kind"] == "numeric":
+                fill_values[col] = st["mean"]
+                # l'imputation par la moyenne ne change ni la moyenne ni M2
+                st["n_valid"] = n_rows
+            elif pd.api.types.is_datetime64_any_dtype(df[col]):
+                fill_values[col] = df[col].median()
+            else:
+                st["counts"] = st["counts"].drop(NA_TOKENS, errors="ignore")
+                fill_values[col] = mode_from_counts(st["counts"])
+        return kept, fill_values
+
+    def _scale_plan(self, kept, stats):
+        """Compose standardisation puis normalisation en une seule transformation affine par colonne."""
+        affine = {}
+        for col in kept:
+            st = stats[col]
+            if st["kind"] != "numeric" or not st["n_valid"]:
+                continue
+            shift, scale = 0.0, 1.0
+            lo, hi = st["min"], st["max"]
+
+            if "standardize" in self.steps:
+                std = np.sqrt(st["m2"] / st["n_valid"])
+                std = std if std != 0 else 1.0
+                shift, scale = st["mean"], 1.0 / std
+                lo, hi = (lo - shift) * scale, (hi - shift) * scale
+
+            if "normalize" in self.steps:
+                data_range = hi - lo
+                step_scale = 1.0 / (data_range if data_range != 0 else 1.0)
+                # (x - a1) * b1 puis (y - a2) * b2  ⇔  (x - (a1 + a2 / b1)) * (b1 * b2)
+                shift, scale = shift + lo / scale, scale * step_scale
+
+            if "standardize" in self.steps or "normalize" in self.steps:
+                affine[col] = (shift, scale)
+        return affine
+
+    # --------------------------------------------------
+    #  Passage 2 : transformation
+    # --------------------------------------------------
+    def run(self, df: pd.DataFrame):
+        """
+        Exécute le plan sur df (non modifié).
+        Retourne le nouveau DataFrame ; les durées de chaque étape sont dans self.timings.
+        """
+        self.timings = {}
+
+        start = time.perf_counter()
+        stats = self._collect_stats(df)
+        self.timings["statistiques"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        kept, fill_values = self._impute_plan(df, stats)
+        affine = self._scale_plan(kept, stats)
+        self.timings["plan"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        names, arrays, dummies = [], [], []
+        for col in kept:
+            st = stats[col]
+            values = df[col]
+            if self.changed_missing and st["n_tokens"]:
+                values = na_tokens_to_nan(values)
+            if col in fill_values:
+                if values.dtype == "float32":
+                    values = values.astype("float64")  # moyenne non arrondie en float32
+                values = values.fillna(fill_values[col])
+
+            if col in affine:
+                shift, scale = affine[col]
+                values = (values.to_numpy(dtype="float64") - shift) * scale
+
+            elif "encode" in self.steps and st["kind"] == "categorical":
+                counts = st["counts"]
+                if len(counts) <= 10:
+                    dummies.append(_onehot_columns(values, col))
+                    continue
+                # LabelEncoder sur les chaînes : codes = rang dans les modalités triées (NaN lu « nan »)
+                if values.isna().any():
+                    values = values.astype(object).where(values.notna(), "nan")
+                values = factorize_labels(values)[1]
+
+            names.append(col)
+            arrays.append(values)
+
+        df_new = pd.DataFrame(dict(enumerate(arrays)), index=df.index)
+        df_new.columns = names
+        if dummies:
+            df_new = pd.concat([df_new, dummy_frame(dummies, df.index)], axis=1)
+        self.timings["transformation"] = time.perf_counter() - start
+        return df_new
+
+    def timings_report(self):
+        return "\n".join(f"- {stage} : {seconds:.3f} s" for stage, seconds in self.timings.items())
+
+
+def _onehot_columns(values: pd.Series, col):
+    """(codes, noms) des indicatrices de col (comme pd.get_dummies(prefix=col)), pour fitted.dummy_frame."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories
+    else:
+        categories = pd.Index(pd.unique(values.dropna())).sort_values()
+    codes = pd.Categorical(values, categories=categories).codes
+    return codes, [f"{col}_{cat}" for cat in categories]
@@ -0,0 +1,280 @@
+# plot_aggregates.py
+import itertools
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from sketches import KLLSketch
+
+# Pré-agrégation des graphiques : le coût de tracé ne dépend plus du nombre de lignes,
+# seulement de la taille des agrégats (bacs, pixels, points conservés).
+
+# Nombre maximal de points tracés individuellement
+POINT_BUDGET = 50_000
+
+# Au-delà de DENSITY_FACTOR × POINT_BUDGET points, le nuage devient une image de densité
+DENSITY_FACTOR = 20
+RASTER_SHAPE = (300, 200)
+
+HIST_BINS = 20
+KDE_GRID = 512
+
+# Catégories affichées (les suivantes sont regroupées dans « Autres »)
+MAX_CATEGORIES = 30
+OTHERS_LABEL = "Autres"
+
+# Au-delà, quartiles par esquisse KLL et corrélations sur échantillon
+EXACT_LIMIT = 1_000_000
+SKETCH_CHUNK = 100_000
+
+# Nombre d'agrégats gardés en mémoire
+CACHE_ENTRIES = 64
+
+
+def _finite(values) -> np.ndarray:
+    values = np.asarray(values, dtype="float64")
+    return values[np.isfinite(values)]
+
+
+def sample_indices(n: int, size: int, seed: int = 0) -> np.ndarray:
+    """size positions tirées sans remise parmi n, triées (ordre d'origine conservé)."""
+    if n <= size:
+        return np.arange(n)
+    return np.sort(np.random.default_rng(seed).choice(n, size=size, replace=False))
+
+
+# ---------------------------
+# Histogrammes
+# ---------------------------
+def binned_kde(values: np.ndarray, bin_width: float, grid: int = KDE_GRID):
+    """
+    Estimation de densité par noyau gaussien calculée sur un histogramme fin (O(n) + convolution),
+    avec la largeur de bande de Scott comme seaborn, mise à l'échelle des effectifs de l'histogramme.
+    """
+    n = len(values)
+    std = values.std() if n > 1 else 0.0
+    if std == 0:
+        return None
+    bandwidth = std * n ** (-1 / 5)
+    lo, hi = values.min() - 3 * bandwidth, values.max() + 3 * bandwidth
+    counts, edges = np.histogram(values, bins=grid, range=(lo, hi))
+    dx = edges[1] - edges[0]
+
+    half = min(int(np.ceil(4 * bandwidth / dx)), grid // 2 - 1)
+    kernel = np.exp(-0.5 * ((np.arange(-half, half + 1) * dx) / bandwidth) ** 2)
+    kernel /= kernel.sum()
+    density = np.convolve(counts, kernel, mode="same") / (n * dx)
+
+    centers = (edges[:-1] + edges[1:]) / 2
+    return centers, density * n * bin_width
+
+
+def histogram(values, bins: int = HIST_BINS):
+    """(effectifs, bornes des bacs, courbe KDE ou None) d'une colonne numérique."""
+    values = _finite(values)
+    counts, edges = np.histogram(values, bins=bins)
+    kde = binned_kde(values, edges[1] - edges[0]) if len(values) else None
+    return counts, edges, kde
+
+
+# ---------------------------
+# Catégories
+# ---------------------------
+def top_counts(series: pd.Series, limit: int = MAX_CATEGORIES) -> pd.Series:
+    """value_counts limité aux `limit` modalités les plus fréquentes (+ « Autres »)."""
+    counts = series.value_counts()
+    if len(counts) > limit:
+        others = counts.iloc[limit - 1:].sum()
+        counts = pd.concat([counts.iloc[:limit - 1], pd.Series({OTHERS_LABEL: others})])
+    counts.index = counts.index.astype(str)
+    return counts
+
+
+def _category_codes(series: pd.Series, limit: int = MAX_CATEGORIES):
+    """
+    (codes, libellés) des modalités : les `limit` - 1 plus fréquentes gardent leur code,
+    les autres partagent le code « Autres » ; -1 pour les valeurs manquantes.
+    """
+    codes, uniques = pd.factorize(series, sort=True)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    labels = uniques.astype(str).tolist()
+    if len(uniques) <= limit:
+        return codes, labels
+
+    top = np.sort(np.argsort(-counts, kind="stable")[:limit - 1])
+    remap = np.full(len(uniques), limit - 1, dtype="int64")
+    remap[top] = np.arange(limit - 1)
+    codes = np.where(codes >= 0, remap[codes], -1)
+    return codes, [labels[i] for i in top] + [OTHERS_LABEL]
+
+
+def crosstab(df: pd.DataFrame, x_col: str, y_col: str) -> pd.DataFrame:
+    """Table de contingence x × y (catégories limitées) par comptage des paires de codes."""
+    x_codes, x_labels = _category_codes(df[x_col])
+    y_codes, y_labels = _category_codes(df[y_col])
+    keep = (x_codes >= 0) & (y_codes >= 0)
+    pairs = x_codes[keep] * len(y_labels) + y_codes[keep]
+    counts = np.bincount(pairs, minlength=len(x_labels) * len(y_labels)).reshape(len(x_labels), len(y_labels))
+    table = pd.DataFrame(counts, index=pd.Index(x_labels, name=x_col), columns=pd.Index(y_labels, name=y_col))
+    # comme pd.crosstab : pas de ligne/colonne vide
+    return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+
+
+# ---------------------------
+# Nuage de points
+# ---------------------------
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets : indices de n_out points qui préservent la forme
+    d'une série ordonnée selon x (premier et dernier point conservés).
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    bounds = np.linspace(1, n - 1, n_out - 1).astype("int64")
+    selected = np.empty(n_out, dtype="int64")
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = bounds[i], bounds[i + 1]
+        nxt_stop = bounds[i + 2] if i + 2 < len(bounds) else n
+        avg_x = x[stop:nxt_stop].mean() if nxt_stop > stop else x[-1]
+        avg_y = y[stop:nxt_stop].mean() if nxt_stop > stop else y[-1]
+        # aire du triangle (point précédent, candidat, moyenne du bac suivant)
+        area = np.abs((x[prev] - avg_x) * (y[start:stop] - y[prev]) - (x[prev] - x[start:stop]) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+
+def scatter_data(x, y, budget: int = POINT_BUDGET):
+    """
+    Données d'un nuage de points selon le nombre de points valides :
+    - ≤ budget : tous les points ("points")
+    - ≤ DENSITY_FACTOR × budget : `budget` points, LTTB si x est trié, sinon tirage aléatoire ("échantillon")
+    - au-delà : image de densité 2D ("densité"), comme datashader
+    Retourne (mode, données).
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    valid = np.isfinite(x) & np.isfinite(y)
+    x, y = x[valid], y[valid]
+    n = len(x)
+
+    if n <= budget:
+        return "points", (x, y)
+    if n <= DENSITY_FACTOR * budget:
+        if np.all(x[1:] >= x[:-1]):
+            idx = lttb(x, y, budget)
+        else:
+            idx = sample_indices(n, budget)
+        return "échantillon", (x[idx], y[idx])
+
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=RASTER_SHAPE)
+    extent = (x_edges[0], x_edges[-1], y_edges[0], y_edges[-1])
+    return "densité", (counts.T, extent)
+
+
+# ---------------------------
+# Boîtes à moustaches
+# ---------------------------
+def _quartiles(values: np.ndarray):
+    if len(values) <= EXACT_LIMIT:
+        return np.quantile(values, [0.25, 0.5, 0.75])
+    sketch = KLLSketch()
+    for start in range(0, len(values), SKETCH_CHUNK):
+        sketch.update(values[start:start + SKETCH_CHUNK])
+    return sketch.quantile([0.25, 0.5, 0.75])
+
+
+def box_stats(df: pd.DataFrame, cat_col: str, num_col: str, budget: int = POINT_BUDGET) -> list:
+    """
+    Statistiques de boîtes (format de matplotlib Axes.bxp) par modalité de cat_col :
+    quartiles exacts ou par esquisse KLL au-delà de EXACT_LIMIT valeurs,
+    moustaches à 1.5 × IQR, valeurs extrêmes échantillonnées pour rester sous le budget de points.
+    """
+    codes, labels = _category_codes(df[cat_col])
+    values = df[num_col].to_numpy(dtype="float64")
+    keep = (codes >= 0) & np.isfinite(values)
+    codes, values = codes[keep], values[keep]
+
+    stats = []
+    flier_budget = max(1, budget // max(1, len(labels)))
+    for code, label in enumerate(labels):
+        group = values[codes == code]
+        if len(group) == 0:
+            continue
+        q1, med, q3 = _quartiles(group)
+        iqr = q3 - q1
+        inside = group[(group >= q1 - 1.5 * iqr) & (group <= q3 + 1.5 * iqr)]
+        fliers = group[(group < q1 - 1.5 * iqr) | (group > q3 + 1.5 * iqr)]
+        stats.append({
+            "label": str(label),
+            "q1": q1, "med": med, "q3": q3,
+            "whislo": inside.min() if len(inside) else q1,
+            "whishi": inside.max() if len(inside) else q3,
+            "fliers": fliers[sample_indices(len(fliers), flier_budget)],
+        })
+    return stats
+
+
+# ---------------------------
+# Corrélations
+# ---------------------------
+def correlation(df: pd.DataFrame, columns) -> tuple:
+    """Matrice de corrélation (sur un échantillon de EXACT_LIMIT lignes au-delà). Retourne (matrice, échantillonné)."""
+    sampled = len(df) > EXACT_LIMIT
+    data = df[columns]
+    if sampled:
+        data = data.iloc[sample_indices(len(df), EXACT_LIMIT)]
+    return data.corr(), sampled
+
+
+# ---------------------------
+# Cache des agrégats
+# ---------------------------
+_VIEW_IDS = itertools.count()
+
+
+def dataset_key(source=None) -> tuple:
+    """
+    Identité d'un dataset dans le cache d'agrégats : source = (chemin, mtime, taille) de la version
+    chargée (SessionStore.source), partagée par les fenêtres du même fichier et changée dès qu'il
+    est modifié ; sans source, une clé propre à la fenêtre (agrégats non partagés).
+    """
+    if source is not None:
+        return ("fichier",) + tuple(source)
+    return ("fenêtre", next(_VIEW_IDS))
+
+
+class AggregateCache:
+    """
+    Cache LRU des agrégats de graphiques, partagé par toutes les fenêtres de visualisation.
+    clé : (dataset_key, type de graphique, x, y, budget de points)
+    """
+
+    def __init__(self, max_entries: int = CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
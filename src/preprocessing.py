@@ -2,70 +2,163 @@
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
-from sklearn.feature_selection import VarianceThreshold
-from sklearn.preprocessing import LabelEncoder
+from column_stats import ColumnStats
+from fitted import ImputeStep, LabelStep, factorize_labels, OneHotStep, OutlierStep, ScaleStep, VarianceStep
+from parallel import column_map
+from schema import categorical_columns, is_text, missing_counts, na_tokens_to_nan, numeric_columns
 
+# Toutes les fonctions acceptent n_jobs : les statistiques par colonne sont alors
+# calculées en parallèle (parallel.column_map), avec un résultat identique au mode série.
+# Elles acceptent aussi progress (progress.Progress) : étapes « statistiques » (avancée
+# colonne par colonne) puis « transformation ».
+# Les colonnes peuvent avoir des types compacts (int8…int32, float32, category, string,
+# cf. schema.py) : elles sont sélectionnées par famille, jamais par type exact.
+# Chaque traitement se décompose en fit_*(df) → étape ajustée (fitted.py), dont les paramètres
+# peuvent être enregistrés et réappliqués à d'autres fichiers, puis étape.transform(df).
 
-def handle_missing_data(df: pd.DataFrame) -> pd.DataFrame:
+
+def _stage(progress, name: str, total: int = None):
+    if progress is not None:
+        progress.stage(name, total=total)
+
+
+# =========================================
+# Statistiques par colonne (exécutables dans un worker)
+# =========================================
+def _fill_value(series: pd.Series):
+    if is_text(series):
+        series = na_tokens_to_nan(series)  # colonne par colonne, dans le worker
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype("float64").mean()  # pas de moyenne arrondie en float32
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        return series.median()
+    else:
+        return series.mode()[0]
+
+
+def _minmax_params(series: pd.Series):
+    scaler = MinMaxScaler().fit(series.to_numpy(dtype="float64").reshape(-1, 1))
+    return scaler.scale_[0], scaler.min_[0]
+
+
+def _standard_params(series: pd.Series):
+    scaler = StandardScaler().fit(series.to_numpy(dtype="float64").reshape(-1, 1))
+    return scaler.mean_[0], scaler.scale_[0]
+
+
+def _variance(series: pd.Series):
+    return np.nanvar(series.to_numpy(dtype="float64"))
+
+
+def _nunique(series: pd.Series):
+    return series.nunique()
+
+
+
+# =========================================
+# Valeurs manquantes
+# =========================================
+def fit_missing(df: pd.DataFrame, n_jobs: int = 1, progress=None, counts: pd.Series = None):
     """
-    Traite les valeurs manquantes d'un DataFrame.
-    Ne modifie le dataset que si des valeurs manquantes existent.
-    Gère maintenant aussi les colonnes de type datetime.
+    ImputeStep, ou None si le DataFrame ne contient aucune valeur manquante.
+    counts : valeurs manquantes par colonne (jetons compris) déjà connues
+    (cache.missing_counts), sinon comptées ici en un passage.
     """
-    df = df.copy()
-
-    # --- Étape 1 : Normaliser les valeurs manquantes non standard ---
-    df.replace(["?", "", " "], np.nan, inplace=True)
+    if counts is None:
+        counts = missing_counts(df)
 
     # --- Vérifier s'il y a réellement des valeurs manquantes ---
-    if df.isnull().sum().sum() == 0:
-        return df, False  # pas de valeurs manquantes
+    if counts.sum() == 0:
+        return None  # pas de valeurs manquantes
 
-    # --- Étape 2 : Supprimer les colonnes avec trop de valeurs manquantes ---
+    # --- Supprimer les colonnes avec trop de valeurs manquantes ---
     threshold_col = 0.5  # si plus de 50% des valeurs sont manquantes
-    df = df.loc[:, df.isnull().mean() < threshold_col]
+    kept = df.columns[counts / len(df) < threshold_col]
 
-    # --- Étape 3 : Remplir les valeurs manquantes ---
-    for col in df.columns:
-        if df[col].isnull().any():
-            if pd.api.types.is_numeric_dtype(df[col]):
-                df[col].fillna(df[col].mean(), inplace=True)
-            elif pd.api.types.is_datetime64_any_dtype(df[col]):
-                df[col].fillna(df[col].median(), inplace=True)
-            else:
-                df[col].fillna(df[col].mode()[0], inplace=True)
+    # --- Valeurs de remplissage (moyenne / médiane / mode) ---
+    to_fill = [col for col in kept if counts[col] > 0]
+    _stage(progress, "statistiques", len(to_fill))
+    fill_values = column_map(_fill_value, df, to_fill, n_jobs=n_jobs, progress=progress)
+    return ImputeStep(kept, fill_values)
 
-    # --- Étape 4 : Supprimer les lignes restantes avec NaN ---
-    df.dropna(inplace=True)
 
-    return df, True
+def handle_missing_data(df: pd.DataFrame, n_jobs: int = 1, progress=None, counts: pd.Series = None) -> pd.DataFrame:
+    """
+    Traite les valeurs manquantes d'un DataFrame.
+    Ne modifie le dataset que si des valeurs manquantes existent.
+    Gère maintenant aussi les colonnes de type datetime.
+    Les jetons non standard (« ? », « ») ne sont convertis en NaN que dans les colonnes
+    à remplir, et chaque colonne est remplie sur place dans une seule copie du DataFrame.
+    """
+    # --- Étapes 1 à 3 : comptes des manquants, colonnes gardées, valeurs de remplissage ---
+    step = fit_missing(df, n_jobs, progress, counts)
+    if step is None:
+        return df, False
+
+    # --- Étape 4 : Remplir, puis supprimer les lignes restantes avec NaN ---
+    _stage(progress, "transformation")
+    return step.fill(df, token_columns=[col for col in step.fill_values if is_text(df[col])]), True
+
+
+# =========================================
+# Mise à l'échelle et filtrage des colonnes numériques
+# =========================================
+def fit_normalize(df: pd.DataFrame, n_jobs: int = 1, progress=None) -> ScaleStep:
+    """Min-Max : x * scale + offset (paramètres de MinMaxScaler) par colonne numérique."""
+    numeric_cols = numeric_columns(df)
+    scale, offset = [], []
+    if len(numeric_cols) > 0:
+        _stage(progress, "statistiques", len(numeric_cols))
+        params = column_map(_minmax_params, df, numeric_cols, n_jobs=n_jobs, progress=progress)
+        scale, offset = np.array([params[col] for col in numeric_cols]).T
+    return ScaleStep("normalize", numeric_cols, scale, offset)
 
 
-def normalize_data(df: pd.DataFrame) -> pd.DataFrame:
+def normalize_data(df: pd.DataFrame, n_jobs: int = 1, progress=None) -> pd.DataFrame:
     """
     Applique une normalisation Min-Max sur les colonnes numériques.
     """
-    df = df.copy()
-    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
+    step = fit_normalize(df, n_jobs, progress)
+    if step.columns:
+        _stage(progress, "transformation")
+    return step.transform(df)
+
+
+def fit_standardize(df: pd.DataFrame, n_jobs: int = 1, progress=None) -> ScaleStep:
+    """Z-score : (x - moyenne) / écart-type (paramètres de StandardScaler) par colonne numérique."""
+    numeric_cols = numeric_columns(df)
+    mean, scale = [], []
     if len(numeric_cols) > 0:
-        scaler = MinMaxScaler()
-        df[numeric_cols] = scaler.fit_transform(df[numeric_cols])
-    return df
+        _stage(progress, "statistiques", len(numeric_cols))
+        params = column_map(_standard_params, df, numeric_cols, n_jobs=n_jobs, progress=progress)
+        mean, scale = np.array([params[col] for col in numeric_cols]).T
+    return ScaleStep("standardize", numeric_cols, mean, scale)
 
 
-def standardize_data(df: pd.DataFrame) -> pd.DataFrame:
+def standardize_data(df: pd.DataFrame, n_jobs: int = 1, progress=None) -> pd.DataFrame:
     """
     Applique une standardisation (Z-score) sur les colonnes numériques.
     """
-    df = df.copy()
-    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
-    if len(numeric_cols) > 0:
-        scaler = StandardScaler()
-        df[numeric_cols] = scaler.fit_transform(df[numeric_cols])
-    return df
+    step = fit_standardize(df, n_jobs, progress)
+    if step.columns:
+        _stage(progress, "transformation")
+    return step.transform(df)
+
+
+def fit_variance(df: pd.DataFrame, threshold: float = 0.01, n_jobs: int = 1, progress=None) -> VarianceStep:
+    """Colonnes numériques dont la variance dépasse le seuil."""
+    numeric_cols = numeric_columns(df)
+    if len(numeric_cols) == 0:
+        return VarianceStep([], [])  # rien à filtrer
+
+    # Même critère que VarianceThreshold : variance (ddof=0, NaN ignorés) > seuil
+    _stage(progress, "statistiques", len(numeric_cols))
+    variances = column_map(_variance, df, numeric_cols, n_jobs=n_jobs, progress=progress)
+    return VarianceStep(numeric_cols, [col for col in numeric_cols if variances[col] > threshold])
 
 
-def variance_threshold_filter(df: pd.DataFrame, threshold: float = 0.01) -> pd.DataFrame:
+def variance_threshold_filter(df: pd.DataFrame, threshold: float = 0.01, n_jobs: int = 1,
+                              progress=None) -> pd.DataFrame:
     """
     Supprime les colonnes dont la variance est inférieure au seuil spécifié.
     Utile pour réduire les features redondantes ou quasi constantes.
@@ -74,84 +167,105 @@ def variance_threshold_filter(df: pd.DataFrame, threshold: float = 0.01) -> pd.D
     - df : DataFrame d'entrée
     - threshold : seuil minimal de variance (par défaut 0.01)
     """
-    df = df.copy()
-    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
-
-    if len(numeric_cols) == 0:
-        return df  # rien à filtrer
+    step = fit_variance(df, threshold, n_jobs, progress)
+    if step.numeric:
+        _stage(progress, "transformation")
+    return step.transform(df.copy())
 
-    selector = VarianceThreshold(threshold=threshold)
-    reduced_data = selector.fit_transform(df[numeric_cols])
 
-    kept_features = [col for col, keep in zip(numeric_cols, selector.get_support()) if keep]
-    df = df[kept_features + [col for col in df.columns if col not in numeric_cols]]
-
-    return df
 # =========================================
-def encode_categorical(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Encode les colonnes catégorielles (object / category) en One-Hot,
-    en excluant les colonnes numériques, les dates et celles avec trop de catégories (>15).
-    """
-    df = df.copy()
-    
+# Encodage des colonnes catégorielles
+# =========================================
+def _columns_to_encode(df: pd.DataFrame, n_jobs: int = 1, progress=None) -> list:
+    """Colonnes catégorielles (object / category) à encoder : ni numériques, ni dates, au plus 10 modalités."""
     # Sélection des colonnes catégorielles
-    cat_cols = df.select_dtypes(include=['object', 'category']).columns
+    cat_cols = categorical_columns(df)
+    _stage(progress, "statistiques", len(cat_cols))
+    nunique = column_map(_nunique, df, cat_cols, n_jobs=n_jobs, progress=progress)
 
     # Filtrage intelligent des colonnes à encoder
-    filtered_cols = [
+    return [
         col for col in cat_cols
         if not pd.api.types.is_numeric_dtype(df[col])         # exclure numériques
         and not pd.api.types.is_datetime64_any_dtype(df[col]) # exclure dates
-        and df[col].nunique() <= 10                           # nombre raisonnable de catégories
+        and nunique[col] <= 10                                # nombre raisonnable de catégories
     ]
-    
-    # Appliquer One-Hot Encoding sur les colonnes filtrées
-    if filtered_cols:
-        df = pd.get_dummies(df, columns=filtered_cols, drop_first=True)
-    
-    return df
 
 
-# =========================================
-def label_encode_categorical(df: pd.DataFrame) -> pd.DataFrame:
+def fit_onehot(df: pd.DataFrame, n_jobs: int = 1, progress=None) -> OneHotStep:
+    """Vocabulaire de chaque colonne à encoder (modalités triées, comme pd.get_dummies)."""
+    filtered_cols = _columns_to_encode(df, n_jobs, progress)
+    return OneHotStep({col: pd.Categorical(df[col]).categories.tolist() for col in filtered_cols})
+
+
+def encode_categorical(df: pd.DataFrame, n_jobs: int = 1, progress=None) -> pd.DataFrame:
     """
-    Encode toutes les colonnes catégorielles (object / category) en entiers,
+    Encode les colonnes catégorielles (object / category) en One-Hot,
     en excluant les colonnes numériques, les dates et celles avec trop de catégories (>15).
     """
-    df = df.copy()
-    
-    # Sélection des colonnes catégorielles
-    cat_cols = df.select_dtypes(include=['object', 'category']).columns
+    step = fit_onehot(df, n_jobs, progress)
 
-    # Filtrage intelligent des colonnes à encoder
-    filtered_cols = [
-        col for col in cat_cols
-        if not pd.api.types.is_numeric_dtype(df[col])      # exclure numériques
+    # Appliquer One-Hot Encoding sur les colonnes filtrées
+    _stage(progress, "transformation", len(step.vocab))
+    return step.transform(df)
+
+
+def _label_codes(series: pd.Series):
+    return factorize_labels(series, max_classes=10)
+
+
+def _encode_labels(df: pd.DataFrame, unseen: str, n_jobs: int, progress) -> tuple:
+    """
+    (LabelStep, {colonne: codes}) : un seul passage par colonne, qui compte les modalités
+    (même filtre que _columns_to_encode) et donne vocabulaire et codes.
+    """
+    cat_cols = [
+        col for col in categorical_columns(df)
+        if not pd.api.types.is_numeric_dtype(df[col])          # exclure numériques
         and not pd.api.types.is_datetime64_any_dtype(df[col])  # exclure dates
-        and df[col].nunique() <= 10                        # nombre raisonnable de catégories
     ]
-    
-    # Appliquer Label Encoding sur les colonnes filtrées
-    if filtered_cols:
-        le = LabelEncoder()
-        for col in filtered_cols:
-            df[col] = le.fit_transform(df[col])
-    
+    _stage(progress, "statistiques", len(cat_cols))
+    encoded = column_map(_label_codes, df, cat_cols, n_jobs=n_jobs, progress=progress)
+    _stage(progress, "transformation")
+    encoded = {col: result for col, result in encoded.items() if result is not None}  # au plus 10 modalités
+    step = LabelStep({col: classes for col, (classes, _) in encoded.items()}, unseen=unseen)
+    return step, {col: codes for col, (_, codes) in encoded.items()}
+
+
+def fit_label(df: pd.DataFrame, n_jobs: int = 1, progress=None, unseen: str = "unknown") -> LabelStep:
+    """Modalités triées de chaque colonne à encoder (classes_ de LabelEncoder)."""
+    return _encode_labels(df, unseen, n_jobs, progress)[0]
+
+
+def label_encode_categorical(df: pd.DataFrame, n_jobs: int = 1, progress=None) -> pd.DataFrame:
+    """
+    Encode toutes les colonnes catégorielles (object / category) en entiers,
+    en excluant les colonnes numériques, les dates et celles avec trop de catégories (>15).
+    Codes identiques à LabelEncoder, dans le plus petit type entier suffisant (int8 le plus souvent).
+    """
+    _, codes = _encode_labels(df, "unknown", n_jobs, progress)
+    df = df.copy()
+    for col, values in codes.items():
+        df[col] = values
     return df
 
 # =========================================
 # 4️⃣ Traitement des outliers (IQR / Winsorization)
 # =========================================
-def handle_outliers(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
-    for col in numeric_cols:
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        lower = Q1 - 1.5 * IQR
-        upper = Q3 + 1.5 * IQR
-        df[col] = np.where(df[col] < lower, lower, df[col])
-        df[col] = np.where(df[col] > upper, upper, df[col])
-    return df
+def fit_outliers(df: pd.DataFrame, stats: ColumnStats = None, n_jobs: int = 1, progress=None) -> OutlierStep:
+    """Quartiles des colonnes numériques (ceux de stats s'ils sont fournis)."""
+    _stage(progress, "statistiques")
+    if stats is None:
+        stats = ColumnStats.from_frame(df, n_jobs=n_jobs)
+    return OutlierStep(stats)
+
+
+def handle_outliers(df: pd.DataFrame, stats: ColumnStats = None, n_jobs: int = 1, progress=None) -> pd.DataFrame:
+    """
+    Winsorisation IQR : ramène les valeurs hors de [Q1 - 1.5*IQR, Q3 + 1.5*IQR] sur les bornes.
+    Les quartiles peuvent être fournis (ColumnStats déjà calculé par analyze_dataset,
+    ou esquisses KLL en streaming) pour éviter de les recalculer.
+    """
+    step = fit_outliers(df, stats, n_jobs, progress)
+    _stage(progress, "transformation")
+    return step.transform(df)
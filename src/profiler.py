@@ -0,0 +1,652 @@
+# profiler.py
+import hashlib
+import html
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from formats import data_size, is_plain_csv, split_format
+from jobs import check_cancel
+from parallel import column_map
+from sketches import HyperLogLog
+from streaming import DEFAULT_CHUNKSIZE, collect_stats, iter_chunks
+
+# Profilage par niveaux, en un seul passage sur le fichier, avec rapport HTML intégré
+# (remplace ProfileReport de ydata_profiling pour les gros fichiers) :
+# - minimal : agrégats simples exacts sur tout le fichier (manquants, moments, min/max, modalités),
+#             quantiles, histogrammes et valeurs distinctes approchés (esquisses KLL / HyperLogLog)
+# - sampled : minimal + corrélations, interactions et doublons estimés sur un échantillon uniforme
+# - full    : tout est exact et calculé sur toutes les lignes (le fichier est gardé en mémoire)
+MODES = {
+    "minimal": "Minimal",
+    "sampled": "Échantillonné",
+    "full": "Complet",
+}
+
+SAMPLE_ROWS = 100_000
+HIST_BINS = 20
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+TOP_VALUES = 10
+
+# Tables larges : corrélations limitées aux premières colonnes numériques non constantes
+MAX_CORR_COLUMNS = 40
+INTERACTIONS = 6
+SCATTER_POINTS = 400
+
+# Profil incrémental : état fusionnable sauvegardé à côté du rapport (*_report.state),
+# prolongé avec les lignes ajoutées ou recalculé pour les seules colonnes modifiées
+STATE_VERSION = 1
+DIGEST_BYTES = 64 * 1024
+
+# Seuils des alertes
+MISSING_ALERT = 0.5
+CORRELATION_ALERT = 0.9
+UNIQUE_ALERT = 0.95
+
+
+# ---------------------------
+# Collecte (un passage)
+# ---------------------------
+class _Sampler:
+    """
+    Échantillon uniforme de `size` lignes en un passage : chaque ligne reçoit une clé aléatoire,
+    on garde les `size` plus petites (seules les lignes sous le seuil courant sont concaténées).
+    positions : rang des lignes gardées dans le fichier (croissant).
+    """
+
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.positions = np.empty(0, dtype="int64")
+        self.rows = None
+
+    def update(self, chunk: pd.DataFrame, start: int):
+        keys = self.rng.random(len(chunk))
+        positions = np.arange(start, start + len(chunk))
+        if len(self.keys) >= self.size:
+            below = keys < self.keys.max()
+            chunk, keys, positions = chunk[below], keys[below], positions[below]
+            if len(keys) == 0:
+                return
+        rows = chunk if self.rows is None else pd.concat([self.rows, chunk], ignore_index=True)
+        keys = np.concatenate([self.keys, keys])
+        positions = np.concatenate([self.positions, positions])
+        if len(keys) > self.size:
+            keep = np.sort(np.argpartition(keys, self.size)[:self.size])
+            rows, keys, positions = rows.iloc[keep].reset_index(drop=True), keys[keep], positions[keep]
+        self.rows, self.keys, self.positions = rows, keys, positions
+
+    def pick(self, chunk: pd.DataFrame, start: int) -> pd.DataFrame:
+        """Lignes de l'échantillon contenues dans le morceau (qui commence à la ligne start)."""
+        lo, hi = np.searchsorted(self.positions, [start, start + len(chunk)])
+        return chunk.iloc[self.positions[lo:hi] - start]
+
+
+def _digest_columns(chunk: pd.DataFrame, start: int) -> dict:
+    """
+    Empreinte de chaque colonne du morceau (ligne de début start), additive d'un morceau à
+    l'autre : la somme sur le fichier ne dépend pas du découpage en morceaux.
+    Retourne {colonne: (empreinte, hachages des valeurs)} ; les nombres sont hachés en float64
+    (une colonne entière lue en float dans un morceau avec manquants garde les mêmes hachages).
+    """
+    rows = pd.util.hash_array(np.arange(start, start + len(chunk), dtype="int64")) | np.uint64(1)
+    digests = {}
+    for col in chunk.columns:
+        series = chunk[col]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            series = series.astype("float64")
+        hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+        digests[col] = (int((hashes * rows).sum(dtype=np.uint64)), hashes)
+    return digests
+
+
+def _add_digest(a: int, b: int) -> int:
+    return (a + b) % 2 ** 64
+
+
+class _Collector:
+    """
+    Calculs faits pendant le passage de collect_stats, selon le mode.
+    En modes minimal et échantillonné, tout est fusionnable (moments, esquisses, comptages,
+    échantillon) : le collecteur est sauvegardé (save_state) puis prolongé au passage suivant.
+    """
+
+    def __init__(self, mode: str, sample_rows: int):
+        self.mode = mode
+        self.sample_rows = sample_rows
+        self.columns = []
+        self.stats = {}
+        self.hll = {}
+        self.digests = {}
+        self.n_rows = 0
+        self.row_hll = HyperLogLog() if mode == "sampled" else None
+        self.sampler = _Sampler(sample_rows) if mode == "sampled" else None
+        self.frames = [] if mode == "full" else None
+        self._refresh_row = 0
+        self._refreshed = []
+
+    def __call__(self, chunk: pd.DataFrame):
+        start, self.n_rows = self.n_rows, self.n_rows + len(chunk)
+        if self.frames is not None:
+            self.frames.append(chunk)
+            return
+        for col, (digest, hashes) in _digest_columns(chunk, start).items():
+            self.digests[col] = _add_digest(self.digests.get(col, 0), digest)
+            self._update_distinct(chunk[col], hashes)
+        if self.row_hll is not None:
+            self.row_hll.update(pd.util.hash_pandas_object(chunk, index=False))
+        if self.sampler is not None:
+            self.sampler.update(chunk, start)
+
+    def _update_distinct(self, series: pd.Series, hashes):
+        # valeurs distinctes des colonnes numériques (les modalités sont déjà comptées)
+        if pd.api.types.is_numeric_dtype(series):
+            self.hll.setdefault(series.name, HyperLogLog()).update(hashes[series.notna().to_numpy()])
+
+    def refresh(self, chunk: pd.DataFrame):
+        """Passage limité aux colonnes modifiées : esquisses et échantillon de ces colonnes seulement."""
+        start, self._refresh_row = self._refresh_row, self._refresh_row + len(chunk)
+        hashes = _digest_columns(chunk, start)
+        for col in chunk.columns:
+            self._update_distinct(chunk[col], hashes[col][1])
+        if self.sampler is not None:
+            self._refreshed.append(self.sampler.pick(chunk, start))
+
+    def forget(self, columns):
+        """Oublie les statistiques de ces colonnes (modifiées ou supprimées) avant leur recalcul."""
+        for col in columns:
+            self.stats.pop(col, None)
+            self.hll.pop(col, None)
+        self._refresh_row = 0
+        self._refreshed = []
+
+    def apply_refresh(self, changed):
+        """Remplace les colonnes modifiées dans l'échantillon par les valeurs relues."""
+        if self.sampler is not None and self.sampler.rows is not None and self._refreshed:
+            fresh = pd.concat(self._refreshed, ignore_index=True)
+            rows = self.sampler.rows.drop(columns=[c for c in changed if c in self.sampler.rows])
+            for col in changed:
+                rows[col] = fresh[col].to_numpy()
+            self.sampler.rows = rows
+        self._refreshed = []
+
+    def reorder(self, columns):
+        """Colonnes dans l'ordre de l'en-tête (les colonnes recalculées sont ajoutées à la fin)."""
+        self.columns = list(columns)
+        self.stats = {col: self.stats[col] for col in columns}
+        self.digests = {col: self.digests[col] for col in columns}
+        if self.sampler is not None and self.sampler.rows is not None:
+            self.sampler.rows = self.sampler.rows[self.columns]
+
+    def data(self):
+        """Lignes sur lesquelles calculer les analyses coûteuses (None en mode minimal)."""
+        if self.frames is not None:
+            return pd.concat(self.frames, ignore_index=True) if self.frames else pd.DataFrame()
+        if self.sampler is not None:
+            return self.sampler.rows
+        return None
+
+
+# ---------------------------
+# Profil incrémental
+# ---------------------------
+def _fingerprint(path: str, size: int) -> tuple:
+    """Empreintes du début et de la fin des `size` premiers octets (reconnaît un fichier prolongé)."""
+    with open(path, "rb") as f:
+        head = hashlib.sha1(f.read(min(DIGEST_BYTES, size))).hexdigest()
+        f.seek(max(0, size - DIGEST_BYTES))
+        tail = hashlib.sha1(f.read(size - max(0, size - DIGEST_BYTES))).hexdigest()
+    return head, tail
+
+
+def state_path(report: str) -> str:
+    return os.path.splitext(report)[0] + ".state"
+
+
+def load_state(path: str, state_file: str, mode: str, sample_rows: int):
+    """Collecteur sauvegardé pour ce fichier et ce mode, ou None (absent, illisible ou incompatible)."""
+    try:
+        with open(state_file, "rb") as f:
+            state = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if (state.get("version") != STATE_VERSION or state["path"] != os.path.abspath(path)
+            or state["collector"].mode != mode or state["collector"].sample_rows != sample_rows):
+        return None
+    return state
+
+
+def save_state(path: str, state_file: str, collector: _Collector):
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        f.seek(max(0, st.st_size - 1))
+        ends_with_newline = f.read(1) == b"\n"
+    state = {
+        "version": STATE_VERSION,
+        "path": os.path.abspath(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "fingerprint": _fingerprint(path, st.st_size),
+        # on ne reprend après la fin du fichier que si elle termine une ligne
+        "appendable": ends_with_newline,
+        "collector": collector,
+    }
+    tmp = state_file + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, state_file)
+
+
+def _scan_digests(path: str, chunksize: int, cancel, progress):
+    """Passage de lecture seule : empreinte de chaque colonne, lignes et doublons (HyperLogLog)."""
+    digests, n_rows, row_hll = {}, 0, HyperLogLog()
+    for chunk in iter_chunks(path, chunksize, cancel, progress, "empreintes"):
+        for col, (digest, _) in _digest_columns(chunk, n_rows).items():
+            digests[col] = _add_digest(digests.get(col, 0), digest)
+        row_hll.update(pd.util.hash_pandas_object(chunk, index=False))
+        n_rows += len(chunk)
+    return digests, n_rows, row_hll
+
+
+def _update_collector(path: str, state: dict, chunksize: int, cancel, progress):
+    """
+    Met à jour le collecteur sauvegardé ; retourne (collecteur, mise à jour) où mise à jour
+    décrit le travail fait : "unchanged", "append" (new_rows) ou "columns" (columns recalculées).
+    Retourne (None, None) s'il faut tout recalculer.
+    """
+    collector = state["collector"]
+    st = os.stat(path)
+    columns = list(pd.read_csv(path, nrows=0).columns)
+    same_header = columns == collector.columns
+    if st.st_size >= state["size"] and _fingerprint(path, state["size"]) == state["fingerprint"] and same_header:
+        if st.st_size == state["size"] and st.st_mtime_ns == state["mtime_ns"]:
+            return collector, {"kind": "unchanged"}
+        if st.st_size > state["size"] and state["appendable"]:
+            # fichier prolongé : seules les lignes ajoutées sont lues
+            if progress is not None:
+                progress.n_stages = 2
+            before = collector.n_rows
+            collect_stats(path, chunksize, cancel, progress, on_chunk=collector,
+                          stats=collector.stats, start=state["size"])
+            return collector, {"kind": "append", "new_rows": collector.n_rows - before}
+
+    # fichier réécrit : on compare les empreintes des colonnes
+    if progress is not None:
+        progress.n_stages = 3
+    digests, n_rows, row_hll = _scan_digests(path, chunksize, cancel, progress)
+    if n_rows != collector.n_rows:
+        return None, None
+    changed = [col for col in columns if digests[col] != collector.digests.get(col)]
+    if len(changed) == len(columns):
+        return None, None
+    collector.forget(changed + [col for col in collector.columns if col not in columns])
+    if changed:
+        collect_stats(path, chunksize, cancel, progress, on_chunk=collector.refresh,
+                      stats=collector.stats, usecols=changed)
+        collector.apply_refresh(changed)
+    collector.digests = digests
+    if collector.row_hll is not None:
+        collector.row_hll = row_hll
+    collector.reorder(columns)
+    return collector, {"kind": "columns", "columns": [str(c) for c in changed]}
+
+
+# ---------------------------
+# Profil
+# ---------------------------
+def _scalar(value):
+    """Valeur sérialisable en JSON (types NumPy convertis, NaN → None)."""
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(value)
+    return value
+
+
+def _exact_numeric(column: pd.Series) -> tuple:
+    """
+    (valeurs distinctes, quantiles, effectifs, bornes) exacts d'une colonne numérique complète
+    (mode full ; fonction de module pour parallel.column_map).
+    """
+    values = column.dropna().to_numpy(dtype="float64")
+    value_range = (values.min(), values.max()) if len(values) and values.max() > values.min() else None
+    quantiles = np.quantile(values, QUANTILES) if len(values) else np.full(len(QUANTILES), np.nan)
+    counts, edges = np.histogram(values, bins=HIST_BINS, range=value_range)
+    return int(column.nunique()), quantiles, counts, edges
+
+
+def _numeric_profile(acc, hll, exact: tuple = None) -> dict:
+    """Statistiques d'une colonne numérique ; exactes si exact (_exact_numeric) est fourni."""
+    profile = {"mean": _scalar(acc.mean) if acc.n_numeric else None, "std": _scalar(acc.std),
+               "min": _scalar(acc.min), "max": _scalar(acc.max)}
+
+    if exact is not None:
+        profile["distinct"], quantiles, counts, edges = exact
+    else:
+        value_range = (acc.min, acc.max) if acc.n_numeric and acc.max > acc.min else None
+        profile["distinct"] = int(round(hll.count())) if hll is not None else 0
+        quantiles = acc.quantile_sketch.quantile(QUANTILES)
+        counts, edges = acc.quantile_sketch.histogram(HIST_BINS, value_range)
+
+    profile["quantiles"] = {f"{int(q * 100)}%": _scalar(v) for q, v in zip(QUANTILES, quantiles)}
+    profile["histogram"] = {"counts": [_scalar(c) for c in counts], "edges": [_scalar(e) for e in edges]}
+    return profile
+
+
+def _categorical_profile(acc) -> dict:
+    counts = acc.counts if acc.counts is not None else pd.Series(dtype="float64")
+    top = counts.sort_values(ascending=False, kind="stable").head(TOP_VALUES)
+    return {
+        "distinct": int(len(counts)),
+        "top": [[str(value), int(count)] for value, count in top.items()],
+    }
+
+
+def _correlations(data: pd.DataFrame, columns) -> dict:
+    numeric = [col for col in columns if data[col].nunique() > 1][:MAX_CORR_COLUMNS]
+    if len(numeric) < 2:
+        return None
+    corr = data[numeric].astype("float64").corr()
+    return {"columns": [str(c) for c in numeric], "matrix": [[_scalar(v) for v in row] for row in corr.to_numpy()]}
+
+
+def _interactions(data: pd.DataFrame, correlations: dict) -> list:
+    """Paires les plus corrélées, avec un nuage de SCATTER_POINTS points."""
+    if correlations is None:
+        return []
+    names = correlations["columns"]
+    matrix = np.array(correlations["matrix"], dtype="float64")
+    i, j = np.triu_indices(len(names), k=1)
+    strength = np.nan_to_num(np.abs(matrix[i, j]), nan=-1)
+    pairs = []
+    rng = np.random.default_rng(0)
+    for k in np.argsort(-strength, kind="stable")[:INTERACTIONS]:
+        x_col, y_col = names[i[k]], names[j[k]]
+        xy = data[[x_col, y_col]].dropna().to_numpy(dtype="float64")
+        if len(xy) > SCATTER_POINTS:
+            xy = xy[np.sort(rng.choice(len(xy), SCATTER_POINTS, replace=False))]
+        pairs.append({"x": x_col, "y": y_col, "r": _scalar(matrix[i[k], j[k]]),
+                      "points": [[_scalar(v) for v in xy[:, 0]], [_scalar(v) for v in xy[:, 1]]]})
+    return pairs
+
+
+def _alerts(profile: dict) -> list:
+    alerts = []
+    for col in profile["columns"]:
+        name = col["name"]
+        if col["missing_rate"] >= MISSING_ALERT:
+            alerts.append(f"« {name} » : {col['missing_rate']:.0%} de valeurs manquantes")
+        present = col["count"] - col["missing"]
+        if present and col["distinct"] <= 1:
+            alerts.append(f"« {name} » est constante")
+        elif present > 100 and col.get("integer", True) and col["distinct"] >= UNIQUE_ALERT * present:
+            alerts.append(f"« {name} » : valeurs presque toutes distinctes (identifiant ?)")
+    for pair in profile["interactions"]:
+        if pair["r"] is not None and abs(pair["r"]) >= CORRELATION_ALERT:
+            alerts.append(f"« {pair['x']} » et « {pair['y']} » très corrélées (r = {pair['r']:.2f})")
+    duplicates = profile["duplicates"]
+    if duplicates and duplicates["count"] > 0:
+        alerts.append(f"{duplicates['count']} lignes dupliquées ({duplicates['rate']:.1%})")
+    return alerts
+
+
+def profile_file(path: str, mode: str = "sampled", sample_rows: int = SAMPLE_ROWS,
+                 chunksize: int = DEFAULT_CHUNKSIZE, cancel=None, progress=None, state_file: str = None,
+                 n_jobs: int = 1) -> dict:
+    """
+    Profil du fichier CSV (dict sérialisable en JSON) lu en un passage par morceaux.
+    mode : "minimal", "sampled" ou "full" (cf. MODES).
+    n_jobs : processus pour les statistiques exactes par colonne du mode full (parallel.column_map).
+    state_file : état sauvegardé entre deux profils (modes minimal et échantillonné) ; s'il
+    correspond au fichier, seules les lignes ajoutées ou les colonnes modifiées sont relues.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Mode de profilage inconnu : {mode}")
+    start = time.perf_counter()
+    if progress is not None:
+        progress.n_stages = 2
+    if mode == "full" or not is_plain_csv(path):
+        state_file = None  # reprise incrémentale : CSV brut uniquement (lecture à partir d'un offset)
+
+    collector, update = None, None
+    state = load_state(path, state_file, mode, sample_rows) if state_file else None
+    if state is not None:
+        collector, update = _update_collector(path, state, chunksize, cancel, progress)
+    if collector is None:
+        collector = _Collector(mode, sample_rows)
+        collect_stats(path, chunksize, cancel, progress, on_chunk=collector, stats=collector.stats)
+        collector.columns = list(collector.stats)
+        update = {"kind": "full"}
+    check_cancel(cancel)
+    if state_file and update["kind"] != "unchanged":
+        save_state(path, state_file, collector)
+    if progress is not None:
+        progress.stage("analyses")
+
+    stats = collector.stats
+    data = collector.data()
+    n_rows = max((acc.n_rows for acc in stats.values()), default=0)
+    numeric = [col for col, acc in stats.items() if acc.is_numeric]
+    exact = column_map(_exact_numeric, data, numeric, n_jobs=n_jobs) if mode == "full" else {}
+    columns = []
+    for col, acc in stats.items():
+        entry = {"name": str(col), "count": acc.n_rows, "missing": acc.n_missing,
+                 "missing_rate": acc.missing_rate}
+        if acc.is_numeric:
+            entry["kind"] = "numérique"
+            entry["integer"] = acc.kinds <= {"i", "u"}
+            entry.update(_numeric_profile(acc, collector.hll.get(col), exact.get(col)))
+        else:
+            entry["kind"] = "catégorielle"
+            entry.update(_categorical_profile(acc))
+        columns.append(entry)
+
+    correlations = _correlations(data, numeric) if data is not None and len(data) else None
+
+    if mode == "full" or (mode == "sampled" and len(data) == n_rows):
+        # toutes les lignes sont en mémoire (mode complet, ou fichier plus petit que l'échantillon)
+        n_unique = len(np.unique(pd.util.hash_pandas_object(data, index=False).to_numpy())) if len(data) else 0
+        duplicates = {"count": n_rows - n_unique, "exact": True}
+    elif mode == "sampled":
+        estimate = min(n_rows, int(round(collector.row_hll.count())))
+        duplicates = {"count": n_rows - estimate, "exact": False}
+    else:
+        duplicates = None
+    if duplicates is not None:
+        duplicates["rate"] = duplicates["count"] / n_rows if n_rows else 0.0
+
+    profile = {
+        "path": path,
+        "mode": mode,
+        "n_rows": n_rows,
+        "n_cols": len(stats),
+        "size": data_size(path),
+        "sample_rows": len(data) if mode == "sampled" and data is not None else None,
+        "columns": columns,
+        "correlations": correlations,
+        "interactions": _interactions(data, correlations) if correlations else [],
+        "duplicates": duplicates,
+        "update": update,
+    }
+    profile["alerts"] = _alerts(profile)
+    profile["elapsed"] = time.perf_counter() - start
+    if progress is not None:
+        progress.finish()
+    return profile
+
+
+# ---------------------------
+# Rapport HTML
+# ---------------------------
+STYLE = """
+body { font-family: "Segoe UI", Arial, sans-serif; margin: 0; background: #f9fafc; color: #222; }
+header { background: #1d3557; color: white; padding: 18px 28px; }
+header p { margin: 4px 0 0; opacity: .8; }
+section { padding: 10px 28px; }
+h2 { border-bottom: 2px solid #4ea8de; padding-bottom: 4px; }
+.cards { display: flex; flex-wrap: wrap; gap: 14px; }
+.card { background: white; border-radius: 6px; box-shadow: 0 1px 3px rgba(0,0,0,.12); padding: 12px 16px; }
+.card h3 { margin: 0 0 6px; font-size: 15px; }
+.kind { font-size: 12px; color: #666; font-weight: normal; }
+table { border-collapse: collapse; font-size: 13px; }
+td, th { padding: 2px 8px; text-align: left; }
+td.num { text-align: right; font-variant-numeric: tabular-nums; }
+.alerts li { margin: 3px 0; }
+.corr td { width: 34px; height: 22px; text-align: center; font-size: 11px; padding: 0; }
+.corr th { font-size: 11px; font-weight: normal; }
+.note { color: #666; font-size: 12px; }
+"""
+
+
+def _fmt(value) -> str:
+    if value is None:
+        return "—"
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    if isinstance(value, int):
+        return f"{value:,}".replace(",", " ")
+    return html.escape(str(value))
+
+
+def _svg_bars(heights, width: int = 260, height: int = 70, color: str = "#4ea8de") -> str:
+    heights = [h or 0 for h in heights]
+    top = max(heights) if heights and max(heights) > 0 else 1
+    bar = width / max(len(heights), 1)
+    rects = "".join(
+        f'<rect x="{i * bar:.1f}" y="{height - h / top * height:.1f}" width="{max(bar - 1, 1):.1f}" '
+        f'height="{h / top * height:.1f}" fill="{color}"/>'
+        for i, h in enumerate(heights)
+    )
+    return f'<svg width="{width}" height="{height}">{rects}</svg>'
+
+
+def _svg_scatter(xs, ys, size: int = 220) -> str:
+    points = [(x, y) for x, y in zip(xs, ys) if x is not None and y is not None]
+    if not points:
+        return ""
+    x_min, x_max = min(p[0] for p in points), max(p[0] for p in points)
+    y_min, y_max = min(p[1] for p in points), max(p[1] for p in points)
+    sx = (size - 10) / ((x_max - x_min) or 1)
+    sy = (size - 10) / ((y_max - y_min) or 1)
+    dots = "".join(
+        f'<circle cx="{5 + (x - x_min) * sx:.1f}" cy="{size - 5 - (y - y_min) * sy:.1f}" r="1.8"/>'
+        for x, y in points
+    )
+    return (f'<svg width="{size}" height="{size}" style="background:#fff;border:1px solid #ddd">'
+            f'<g fill="#ff595e" fill-opacity=".6">{dots}</g></svg>')
+
+
+def _corr_color(r) -> str:
+    if r is None:
+        return "#eee"
+    strength = int(255 * (1 - min(abs(r), 1)))
+    return f"rgb(255,{strength},{strength})" if r >= 0 else f"rgb({strength},{strength},255)"
+
+
+def _column_card(col: dict, mode: str) -> str:
+    rows = [("Valeurs", col["count"]), ("Manquantes", f"{col['missing']} ({col['missing_rate']:.1%})"),
+            ("Distinctes", col["distinct"] if mode == "full" or col["kind"] != "numérique" else f"≈ {col['distinct']}")]
+    if col["kind"] == "numérique":
+        rows += [("Moyenne", col["mean"]), ("Écart-type", col["std"]), ("Min", col["min"]), ("Max", col["max"])]
+        rows += [(f"Q {name}", value) for name, value in col["quantiles"].items()]
+        chart = _svg_bars(col["histogram"]["counts"])
+    else:
+        chart = "<table>" + "".join(
+            f"<tr><td>{html.escape(value[:30])}</td><td class='num'>{_fmt(count)}</td>"
+            f"<td>{_svg_bars([count], width=int(120 * count / col['top'][0][1]) or 1, height=10)}</td></tr>"
+            for value, count in col["top"]
+        ) + "</table>"
+    table = "".join(f"<tr><th>{label}</th><td class='num'>{_fmt(value)}</td></tr>" for label, value in rows)
+    return (f"<div class='card'><h3>{html.escape(col['name'])} <span class='kind'>{col['kind']}</span></h3>"
+            f"<table>{table}</table>{chart}</div>")
+
+
+def describe_update(update: dict) -> str:
+    if update["kind"] == "unchanged":
+        return "fichier inchangé (état réutilisé)"
+    if update["kind"] == "append":
+        return f"incrémentale : +{_fmt(update['new_rows'])} lignes lues"
+    if update["kind"] == "columns":
+        changed = ", ".join(update["columns"]) or "aucune"
+        return f"incrémentale : colonnes recalculées : {changed}"
+    return "complète"
+
+
+def render_html(profile: dict) -> str:
+    """Rapport HTML autonome (CSS et graphiques SVG intégrés, aucune dépendance)."""
+    mode = profile["mode"]
+    name = os.path.basename(profile["path"])
+    if mode == "sampled":
+        scope = (f"Agrégats simples exacts sur les {_fmt(profile['n_rows'])} lignes ; quantiles, histogrammes et "
+                 f"valeurs distinctes approchés ; corrélations sur un échantillon de {_fmt(profile['sample_rows'])} "
+                 f"lignes ; doublons estimés (HyperLogLog).")
+    elif mode == "minimal":
+        scope = "Agrégats simples exacts ; quantiles, histogrammes et valeurs distinctes approchés ; pas de corrélations."
+    else:
+        scope = "Toutes les statistiques sont exactes et calculées sur toutes les lignes."
+
+    overview = [("Lignes", profile["n_rows"]), ("Colonnes", profile["n_cols"]),
+                ("Taille", f"{profile['size'] / 1024 ** 2:.1f} Mo"), ("Mode", MODES[mode]),
+                ("Durée", f"{profile['elapsed']:.1f} s"), ("Mise à jour", describe_update(profile["update"]))]
+    if profile["duplicates"] is not None:
+        prefix = "" if profile["duplicates"]["exact"] else "≈ "
+        overview.append(("Lignes dupliquées", f"{prefix}{profile['duplicates']['count']} "
+                                              f"({profile['duplicates']['rate']:.1%})"))
+
+    parts = [
+        "<!DOCTYPE html><html lang='fr'><head><meta charset='utf-8'>",
+        f"<title>Profil de {html.escape(name)}</title><style>{STYLE}</style></head><body>",
+        f"<header><h1>📊 Profil de {html.escape(name)}</h1><p>{scope}</p></header>",
+        "<section><h2>Vue d'ensemble</h2><div class='cards'><div class='card'><table>",
+        "".join(f"<tr><th>{label}</th><td class='num'>{_fmt(value)}</td></tr>" for label, value in overview),
+        "</table></div></div></section>",
+    ]
+
+    if profile["alerts"]:
+        parts.append("<section><h2>⚠️ Alertes</h2><ul class='alerts'>")
+        parts.append("".join(f"<li>{html.escape(alert)}</li>" for alert in profile["alerts"]))
+        parts.append("</ul></section>")
+
+    parts.append("<section><h2>Variables</h2><div class='cards'>")
+    parts.append("".join(_column_card(col, mode) for col in profile["columns"]))
+    parts.append("</div></section>")
+
+    corr = profile["correlations"]
+    if corr:
+        header = "".join(f"<th>{html.escape(c[:12])}</th>" for c in corr["columns"])
+        body = "".join(
+            f"<tr><th>{html.escape(row_name)}</th>" + "".join(
+                f"<td style='background:{_corr_color(r)}'>{'' if r is None else f'{r:.2f}'}</td>" for r in row
+            ) + "</tr>"
+            for row_name, row in zip(corr["columns"], corr["matrix"])
+        )
+        parts.append(f"<section><h2>Corrélations (Pearson)</h2><table class='corr'><tr><th></th>{header}</tr>"
+                     f"{body}</table></section>")
+
+    if profile["interactions"]:
+        parts.append("<section><h2>Interactions</h2><div class='cards'>")
+        for pair in profile["interactions"]:
+            parts.append(f"<div class='card'><h3>{html.escape(pair['y'])} ↔ {html.escape(pair['x'])} "
+                         f"<span class='kind'>r = {_fmt(pair['r'])}</span></h3>"
+                         f"{_svg_scatter(*pair['points'])}</div>")
+        parts.append("</div><p class='note'>Nuages de points sur un sous-échantillon.</p></section>")
+
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def write_report(profile: dict, out_path: str) -> str:
+    tmp = out_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_html(profile))
+    os.replace(tmp, out_path)
+    return out_path
+
+
+def report_path(csv_path: str, out_dir: str = None) -> str:
+    base = split_format(os.path.basename(csv_path))[0]
+    return os.path.join(out_dir or os.path.dirname(csv_path), f"{base}_report.html")
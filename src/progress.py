@@ -0,0 +1,153 @@
+# progress.py
+import io
+import time
+
+# Événements de progression structurés émis par le chargeur CSV, le streaming et les
+# prétraitements ; la barre de l'interface (jobs) et la CLI s'y abonnent.
+# Aucun import de tkinter ni de pandas.
+
+# Intervalle minimal entre deux événements d'une même étape (s)
+MIN_INTERVAL = 0.1
+
+
+class ProgressEvent:
+    """
+    État d'un traitement à un instant donné :
+    étape (nom, rang, nombre d'étapes), octets lus / total, morceaux et lignes traités,
+    fraction globale (0..1, None si inconnue), temps écoulé et temps restant estimé (s).
+    """
+
+    def __init__(self, stage, stage_index, n_stages, bytes_read, total_bytes, chunks, rows,
+                 fraction, elapsed, eta):
+        self.stage = stage
+        self.stage_index = stage_index
+        self.n_stages = n_stages
+        self.bytes_read = bytes_read
+        self.total_bytes = total_bytes
+        self.chunks = chunks
+        self.rows = rows
+        self.fraction = fraction
+        self.elapsed = elapsed
+        self.eta = eta
+
+    def describe(self) -> str:
+        """Résumé d'une ligne, ex : « statistiques (1/2) · 48/200 Mo · 5 morceaux · reste ~12 s »."""
+        parts = [f"{self.stage} ({self.stage_index + 1}/{self.n_stages})"]
+        if self.total_bytes:
+            parts.append(f"{self.bytes_read / 1024 ** 2:.0f}/{self.total_bytes / 1024 ** 2:.0f} Mo")
+        if self.chunks:
+            parts.append(f"{self.chunks} morceau{'x' if self.chunks > 1 else ''}")
+        if self.eta is not None:
+            parts.append(f"reste ~{format_duration(self.eta)}")
+        return " · ".join(parts)
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+class Progress:
+    """
+    Suivi d'un traitement découpé en étapes (lecture, statistiques, transformation, écriture…).
+    - stage(nom, total_bytes=… ou total=…) ouvre une étape mesurée en octets ou en unités (colonnes, lignes)
+    - advance(…) fait avancer l'étape courante ; callback(ProgressEvent) est appelé au plus
+      tous les MIN_INTERVAL secondes (et à chaque changement d'étape)
+    La fraction globale suppose des étapes de même durée ; le temps restant en est déduit.
+    """
+
+    def __init__(self, callback=None, n_stages: int = 1, min_interval: float = MIN_INTERVAL):
+        self.callback = callback
+        self.n_stages = n_stages
+        self.min_interval = min_interval
+        self.start = time.perf_counter()
+        self.stage_name = None
+        self.stage_index = -1
+        self._last_emit = 0.0
+        self._last_fraction = None
+        self._reset(None, None)
+
+    def _reset(self, total_bytes, total):
+        self.total_bytes = total_bytes
+        self.total = total
+        self.bytes_read = 0
+        self.done = 0
+        self.chunks = 0
+        self.rows = 0
+
+    def stage(self, name: str, total_bytes: int = None, total: int = None):
+        self.stage_index += 1
+        self.n_stages = max(self.n_stages, self.stage_index + 1)
+        self.stage_name = name
+        self._reset(total_bytes, total)
+        self._emit(force=True)
+
+    def advance(self, bytes_read: int = None, chunks: int = 1, rows: int = 0, done: int = None):
+        """bytes_read et done sont des positions absolues dans l'étape ; chunks et rows des incréments."""
+        if bytes_read is not None:
+            self.bytes_read = bytes_read
+        if done is not None:
+            self.done = done
+        self.chunks += chunks
+        self.rows += rows
+        self._emit()
+
+    def finish(self):
+        """Dernière étape terminée (fraction 1)."""
+        self.stage_index = self.n_stages - 1
+        self.bytes_read, self.done = self.total_bytes or 0, self.total or 0
+        if self._last_fraction != 1.0:
+            self._emit(force=True, fraction=1.0)
+
+    def _stage_fraction(self):
+        if self.total_bytes:
+            return min(1.0, self.bytes_read / self.total_bytes)
+        if self.total:
+            return min(1.0, self.done / self.total)
+        return None
+
+    def event(self, fraction: float = None) -> ProgressEvent:
+        elapsed = time.perf_counter() - self.start
+        if fraction is None:
+            stage_fraction = self._stage_fraction()
+            fraction = (max(self.stage_index, 0) + (stage_fraction or 0.0)) / self.n_stages
+            if stage_fraction is None and self.stage_index <= 0:
+                fraction = None
+        eta = elapsed * (1 - fraction) / fraction if fraction and fraction > 0.01 else None
+        return ProgressEvent(self.stage_name, max(self.stage_index, 0), self.n_stages, self.bytes_read,
+                             self.total_bytes, self.chunks, self.rows, fraction, elapsed, eta)
+
+    def _emit(self, force: bool = False, fraction: float = None):
+        if self.callback is None:
+            return
+        now = time.perf_counter()
+        if not force and now - self._last_emit < self.min_interval:
+            return
+        self._last_emit = now
+        event = self.event(fraction)
+        self._last_fraction = event.fraction
+        self.callback(event)
+
+
+class CountingReader(io.RawIOBase):
+    """
+    Fichier binaire qui signale les octets lus à un Progress (read_csv lit par blocs
+    de quelques centaines de Ko : un événement par bloc, sans coût mesurable).
+    """
+
+    def __init__(self, fh, progress: Progress):
+        self.fh = fh
+        self.progress = progress
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.fh.readinto(buffer)
+        self.bytes_read += n
+        self.progress.advance(bytes_read=self.bytes_read, chunks=0)
+        return n
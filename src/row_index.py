@@ -0,0 +1,549 @@
+# row_index.py
+import hashlib
+import io
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from formats import data_size, decompressed, is_columnar, is_plain_csv, iter_batches, read_columns, row_blocks
+
+# Un offset d'octets est conservé toutes les INDEX_STRIDE lignes :
+# lire la ligne N coûte au plus INDEX_STRIDE lignes parsées.
+INDEX_STRIDE = 256
+
+# Taille des blocs lus pendant l'indexation
+SCAN_BLOCK = 4 * 1024 ** 2
+
+# Les lignes sont rendues telles qu'écrites dans le fichier (aperçu, tri, filtre)
+TEXT_OPTIONS = {"dtype": str, "keep_default_na": False, "na_filter": False}
+
+# Index persistant : data/.index/<fichier>.npz, à côté des CSV
+INDEX_DIR_NAME = ".index"
+
+# Empreintes utilisées pour reconnaître un fichier simplement prolongé (ajout en fin)
+DIGEST_BYTES = 64 * 1024
+
+# Lignes par bloc d'un CSV compressé (BlockIndex)
+CSV_BLOCK_ROWS = 50_000
+
+QUOTE, NEWLINE, CR = ord('"'), ord("\n"), ord("\r")
+
+
+class _RowScanner:
+    """
+    Découpe un flux d'octets en lignes CSV : les retours à la ligne entre guillemets
+    ne terminent pas la ligne et les lignes vides sont ignorées, comme avec pd.read_csv.
+    start : offset du début de la première ligne (None : la première ligne est l'en-tête, sautée).
+    """
+
+    def __init__(self, start=None):
+        self.in_quotes = False
+        self.tail_start = start     # début de la ligne en cours
+        self.last_byte = -1
+
+    def _row_ends(self, block: np.ndarray) -> np.ndarray:
+        """Positions des retours à la ligne hors guillemets dans le bloc."""
+        quotes = block == QUOTE
+        newlines = np.flatnonzero(block == NEWLINE)
+        if not quotes.any():
+            return np.empty(0, dtype="int64") if self.in_quotes else newlines
+        # parité du nombre de guillemets depuis le début (les "" échappés se compensent)
+        parity = np.cumsum(quotes, dtype=np.uint8) & 1
+        if self.in_quotes:
+            parity ^= 1
+        self.in_quotes = bool(parity[-1])
+        return newlines[parity[newlines] == 0]
+
+    def feed(self, block: np.ndarray, base: int) -> np.ndarray:
+        """Traite le bloc situé à l'offset base ; retourne les débuts des lignes terminées (non vides)."""
+        ends = self._row_ends(block)
+        last_byte, self.last_byte = self.last_byte, int(block[-1])
+        if self.tail_start is None and len(ends):
+            self.tail_start = base + int(ends[0]) + 1
+            ends = ends[1:]
+        if len(ends) == 0:
+            return np.empty(0, dtype="int64")
+
+        starts = np.concatenate([[self.tail_start], base + ends[:-1] + 1]).astype("int64")
+        lengths = base + ends - starts
+        # ligne vide : rien entre deux retours à la ligne (ou seulement \r)
+        first = starts - base  # -1 : ligne commencée sur le dernier octet du bloc précédent
+        first_byte = np.where(first >= 0, block[np.clip(first, 0, None)], last_byte)
+        blank = (lengths == 0) | ((lengths == 1) & (first_byte == CR))
+        self.tail_start = base + int(ends[-1]) + 1
+        return starts[~blank]
+
+
+def index_path(path: str) -> str:
+    return os.path.join(os.path.dirname(path), INDEX_DIR_NAME, os.path.basename(path) + ".npz")
+
+
+def index_is_fresh(path: str) -> bool:
+    """Index sauvegardé après la dernière modification du fichier (rien à relire) ; deux stat seulement."""
+    try:
+        return os.stat(index_path(path)).st_mtime_ns >= os.stat(path).st_mtime_ns
+    except OSError:
+        return False
+
+
+def _digest(f, start: int, stop: int) -> str:
+    f.seek(max(0, start))
+    return hashlib.sha1(f.read(max(0, stop - max(0, start)))).hexdigest()
+
+
+class RowIndex:
+    """
+    Index des débuts de ligne d'un CSV (un offset toutes les `stride` lignes de données).
+    La ligne N de l'index est la ligne N du DataFrame lu par pd.read_csv.
+    - build() peut tourner dans un thread : les lignes déjà indexées sont lisibles pendant la construction ;
+    - l'index est sauvegardé à côté du fichier (index_path) et, si le fichier a seulement
+      été prolongé, repris là où il s'était arrêté (RowIndex.load) ;
+    - row_range() / read_rows() lisent une plage de lignes via mmap, en O(taille de la plage).
+    """
+
+    def __init__(self, path: str, stride: int = INDEX_STRIDE):
+        self.path = path
+        self.stride = stride
+        self.columns = list(pd.read_csv(path, nrows=0).columns)
+        self.offsets = []          # offsets[i] = début de la ligne i * stride
+        self.n_complete = 0        # lignes terminées par un retour à la ligne
+        self.scanned = 0           # octets parcourus
+        self.size = 0
+        self._scanner = _RowScanner()
+        self._mmap = None
+        self._lock = threading.Lock()
+        self.done = threading.Event()
+
+    # ---------------------------
+    # Persistance
+    # ---------------------------
+    @classmethod
+    def load(cls, path: str, stride: int = INDEX_STRIDE) -> "RowIndex":
+        """Index sauvegardé s'il correspond toujours au début du fichier, sinon index vide."""
+        index = cls(path, stride)
+        try:
+            saved = np.load(index_path(path))
+            meta = json.loads(str(saved["meta"]))
+        except (OSError, ValueError, KeyError):
+            return index
+
+        if meta["stride"] != stride or os.path.getsize(path) < meta["scanned"]:
+            return index
+        with open(path, "rb") as f:
+            head = _digest(f, 0, min(DIGEST_BYTES, meta["scanned"]))
+            tail = _digest(f, meta["scanned"] - DIGEST_BYTES, meta["scanned"])
+        if (head, tail) != (meta["head"], meta["tail"]):
+            return index  # fichier réécrit : on repart de zéro
+
+        index.offsets = saved["offsets"].tolist()
+        index.n_complete = meta["n_complete"]
+        index.scanned = index.size = meta["scanned"]
+        index._scanner.in_quotes = meta["in_quotes"]
+        index._scanner.tail_start = meta["tail_start"]
+        index._scanner.last_byte = meta["last_byte"]
+        return index
+
+    @classmethod
+    def open(cls, path: str, stride: int = INDEX_STRIDE) -> "RowIndex":
+        """Index à jour : chargé, complété avec les lignes ajoutées depuis, puis sauvegardé."""
+        return cls.load(path, stride).build()
+
+    def save(self):
+        with open(self.path, "rb") as f:
+            head = _digest(f, 0, min(DIGEST_BYTES, self.scanned))
+            tail = _digest(f, self.scanned - DIGEST_BYTES, self.scanned)
+        meta = {
+            "stride": self.stride,
+            "n_complete": self.n_complete,
+            "scanned": self.scanned,
+            "in_quotes": self._scanner.in_quotes,
+            "tail_start": self._scanner.tail_start,
+            "last_byte": self._scanner.last_byte,
+            "head": head,
+            "tail": tail,
+        }
+        target = index_path(self.path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = target + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, offsets=np.asarray(self.offsets, dtype="int64"), meta=json.dumps(meta))
+        os.replace(tmp, target)
+
+    # ---------------------------
+    # Construction
+    # ---------------------------
+    @property
+    def n_rows(self) -> int:
+        """Lignes de données indexées (la dernière, sans retour à la ligne final, compte une fois terminée)."""
+        tail_start = self._scanner.tail_start
+        partial = self.done.is_set() and tail_start is not None and self.size > tail_start
+        return self.n_complete + int(partial and self._tail_has_content())
+
+    def _tail_has_content(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(self._scanner.tail_start)
+            return f.read(self.size - self._scanner.tail_start).strip() != b""
+
+    def build(self, cancel=None):
+        """
+        Parcourt la partie non encore indexée du fichier par blocs de SCAN_BLOCK octets, puis
+        sauvegarde (sauf si rien n'a été ajouté depuis l'index chargé).
+        """
+        resumed = self.scanned
+        with open(self.path, "rb") as f:
+            f.seek(self.scanned)
+            while True:
+                if cancel is not None and cancel():
+                    return self
+                raw = f.read(SCAN_BLOCK)
+                if not raw:
+                    break
+                kept = self._scanner.feed(np.frombuffer(raw, dtype=np.uint8), self.scanned)
+                positions = self.n_complete + np.arange(len(kept))
+                self.offsets.extend(kept[positions % self.stride == 0].tolist())
+                self.n_complete += len(kept)
+                self.scanned += len(raw)
+                self.size = self.scanned
+        self.done.set()
+        if self.scanned == resumed and index_is_fresh(self.path):
+            return self
+        try:
+            self.save()
+        except OSError:
+            pass  # dossier en lecture seule : l'index reste en mémoire
+        return self
+
+    def build_in_background(self, cancel=None):
+        threading.Thread(target=self.build, args=(cancel,), daemon=True).start()
+        return self
+
+    # ---------------------------
+    # Lecture (mmap)
+    # ---------------------------
+    def _mapped(self) -> mmap.mmap:
+        """Projection mémoire du fichier, rouverte si le fichier a grandi depuis."""
+        with self._lock:
+            if self._mmap is None or len(self._mmap) < self.size:
+                if self._mmap is not None:
+                    self._mmap.close()
+                with open(self.path, "rb") as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._mmap
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+    def row_range(self, start: int, stop: int) -> bytes:
+        """
+        Octets des lignes [start, stop) : saut direct à l'offset indexé le plus proche,
+        puis au plus `stride` lignes parcourues avant start.
+        """
+        stop = min(stop, self.n_rows)
+        if start >= stop:
+            return b""
+        mm = self._mapped()
+        end_of_data = self.size
+        block = start // self.stride
+        if block == len(self.offsets):
+            # seule la dernière ligne, sans retour à la ligne final, est demandée (aucun offset indexé)
+            return mm[self._scanner.tail_start:end_of_data]
+        skip = start - block * self.stride
+        wanted = stop - block * self.stride   # lignes à parcourir depuis l'offset indexé
+
+        scanner = _RowScanner(self.offsets[block])
+        starts = []
+        pos, window = self.offsets[block], 64 * 1024
+        while len(starts) <= wanted and pos < end_of_data:
+            raw = mm[pos:min(pos + window, end_of_data)]
+            starts.extend(scanner.feed(np.frombuffer(raw, dtype=np.uint8), pos).tolist())
+            pos += len(raw)
+            window *= 2
+        begin = starts[skip] if skip < len(starts) else scanner.tail_start
+        if wanted < len(starts):
+            end = starts[wanted]
+        elif stop > self.n_complete:
+            end = end_of_data  # la dernière ligne, sans retour à la ligne final, est demandée
+        else:
+            end = scanner.tail_start  # fin de la dernière ligne terminée
+        return mm[begin:end]
+
+    def partitions(self, n_parts: int) -> list:
+        """Découpe [0, n_rows) en n_parts plages de lignes alignées sur les offsets indexés (travail parallèle)."""
+        n_blocks = len(self.offsets)
+        bounds = sorted({round(i * n_blocks / n_parts) * self.stride for i in range(n_parts)})
+        bounds = [b for b in bounds if b < self.n_rows] + [self.n_rows]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _empty(self) -> pd.DataFrame:
+        return pd.DataFrame({col: pd.Series(dtype=object) for col in self.columns})
+
+    def read_rows(self, start: int, stop: int) -> pd.DataFrame:
+        """Lignes [start, stop) en texte brut, sans parser ce qui précède start."""
+        data = self.row_range(start, stop)
+        if not data.strip():
+            return self._empty()
+        df = pd.read_csv(io.BytesIO(data), header=None, names=self.columns, **TEXT_OPTIONS)
+        df.index = pd.RangeIndex(start, start + len(df))
+        return df
+
+    def take(self, rows) -> pd.DataFrame:
+        """Lignes d'index quelconques (vue triée ou filtrée), lues bloc par bloc."""
+        rows = np.asarray(rows, dtype="int64")
+        if len(rows) == 0:
+            return self._empty()
+        parts = []
+        blocks = rows // self.stride
+        for block in np.unique(blocks):
+            wanted = np.unique(rows[blocks == block])
+            chunk = self.read_rows(int(wanted.min()), int(wanted.max()) + 1)
+            parts.append(chunk.loc[wanted])
+        return pd.concat(parts).loc[rows]
+
+
+def _as_text(df: pd.DataFrame) -> pd.DataFrame:
+    """Valeurs rendues en texte, comme lues avec TEXT_OPTIONS (les manquants deviennent des chaînes vides)."""
+    return df.astype(object).where(df.notna(), "").astype(str)
+
+
+class BlockIndex:
+    """
+    Index par blocs des formats sans offsets de lignes (formats.py), même interface que RowIndex :
+    - Parquet, Feather, dossier .parts : les blocs sont les groupes de lignes / lots, connus par les
+      métadonnées (index immédiat) et lus séparément ;
+    - CSV compressé : le fichier est parcouru une fois (build) par blocs de block_rows lignes ; un
+      flux compressé ne se lit pas à partir d'un offset, un bloc absent du cache est donc relu en
+      décompressant depuis le début.
+    Les CACHED_BLOCKS derniers blocs lus sont gardés en mémoire (défilement et tri sans relecture).
+    """
+
+    CACHED_BLOCKS = 8
+
+    def __init__(self, path: str, block_rows: int = CSV_BLOCK_ROWS):
+        self.path = path
+        self.block_rows = block_rows
+        self.columns = read_columns(path)
+        self.size = data_size(path)
+        self.counts = []           # lignes de chaque bloc
+        self.scanned = 0           # octets parcourus
+        self._readers = None       # lecture de chaque bloc (fichiers en colonnes)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.done = threading.Event()
+        if is_columnar(path):
+            blocks = row_blocks(path)
+            self.counts = [n for n, _ in blocks]
+            self._readers = [read for _, read in blocks]
+            self.scanned = self.size
+            self.done.set()
+
+    @property
+    def n_rows(self) -> int:
+        return sum(self.counts)
+
+    def _text_chunks(self):
+        with open(self.path, "rb") as raw:
+            reader = pd.read_csv(decompressed(self.path, raw), chunksize=self.block_rows, **TEXT_OPTIONS)
+            for chunk in reader:
+                yield chunk, raw.tell()
+
+    def build(self, cancel=None):
+        """Compte les lignes de chaque bloc d'un CSV compressé (les fichiers en colonnes sont indexés d'emblée)."""
+        if self.done.is_set():
+            return self
+        for chunk, position in self._text_chunks():
+            if cancel is not None and cancel():
+                return self
+            self._remember(len(self.counts), chunk)
+            self.counts.append(len(chunk))
+            self.scanned = position
+        self.done.set()
+        return self
+
+    def build_in_background(self, cancel=None):
+        threading.Thread(target=self.build, args=(cancel,), daemon=True).start()
+        return self
+
+    def close(self):
+        with self._lock:
+            self._cache.clear()
+
+    # ---------------------------
+    # Lecture
+    # ---------------------------
+    def _remember(self, block: int, data):
+        with self._lock:
+            self._cache[block] = data
+            self._cache.move_to_end(block)
+            while len(self._cache) > self.CACHED_BLOCKS:
+                self._cache.popitem(last=False)
+
+    def _block(self, block: int):
+        """Bloc en table pyarrow (fichiers en colonnes) ou en DataFrame de texte (CSV compressé)."""
+        with self._lock:
+            if block in self._cache:
+                self._cache.move_to_end(block)
+                return self._cache[block]
+        if self._readers is not None:
+            data = self._readers[block]()
+        else:
+            data = next(chunk for i, (chunk, _) in enumerate(self._text_chunks()) if i == block)
+        self._remember(block, data)
+        return data
+
+    def _rows_of(self, block: int, lo: int, hi: int) -> pd.DataFrame:
+        data = self._block(block)
+        if isinstance(data, pd.DataFrame):
+            return data.iloc[lo:hi]
+        return _as_text(data.slice(lo, hi - lo).to_pandas())
+
+    def _empty(self) -> pd.DataFrame:
+        return pd.DataFrame({col: pd.Series(dtype=object) for col in self.columns})
+
+    def _bounds(self) -> np.ndarray:
+        return np.concatenate([[0], np.cumsum(self.counts, dtype="int64")])
+
+    def read_rows(self, start: int, stop: int) -> pd.DataFrame:
+        """Lignes [start, stop) en texte, en ne lisant que les blocs qui les contiennent."""
+        bounds = self._bounds()
+        stop = min(stop, int(bounds[-1]))
+        if start >= stop:
+            return self._empty()
+        parts = []
+        for block in range(int(np.searchsorted(bounds, start, side="right")) - 1, len(self.counts)):
+            if bounds[block] >= stop:
+                break
+            lo, hi = max(start - bounds[block], 0), min(stop, bounds[block + 1]) - bounds[block]
+            parts.append(self._rows_of(block, int(lo), int(hi)))
+        df = pd.concat(parts, ignore_index=True)
+        df.index = pd.RangeIndex(start, start + len(df))
+        return df
+
+    def take(self, rows) -> pd.DataFrame:
+        """Lignes d'index quelconques (vue triée ou filtrée), lues bloc par bloc."""
+        rows = np.asarray(rows, dtype="int64")
+        if len(rows) == 0:
+            return self._empty()
+        bounds = self._bounds()
+        blocks = np.searchsorted(bounds, rows, side="right") - 1
+        parts = []
+        for block in np.unique(blocks):
+            wanted = np.unique(rows[blocks == block])
+            lo, hi = int(wanted.min() - bounds[block]), int(wanted.max() - bounds[block]) + 1
+            chunk = self._rows_of(int(block), lo, hi)
+            chunk.index = pd.RangeIndex(bounds[block] + lo, bounds[block] + hi)
+            parts.append(chunk.loc[wanted])
+        return pd.concat(parts).loc[rows]
+
+
+def open_index(path: str):
+    """Index de l'aperçu : offsets de lignes (RowIndex) pour un CSV brut, blocs (BlockIndex) sinon."""
+    return RowIndex.load(path) if is_plain_csv(path) else BlockIndex(path)
+
+
+def build_indexes(paths, stride: int = INDEX_STRIDE):
+    """
+    Crée ou complète l'index de chaque CSV brut dont l'index manque ou est périmé (appelé en
+    arrière-plan par show_databases) ; les autres formats n'ont pas d'index sauvegardé (BlockIndex).
+    """
+    for path in paths:
+        if not is_plain_csv(path) or index_is_fresh(path):
+            continue
+        try:
+            RowIndex.open(path, stride).close()
+        except Exception:
+            pass  # fichier illisible : l'aperçu signalera l'erreur à l'ouverture
+
+
+def remove_index(path: str):
+    if os.path.exists(index_path(path)):
+        os.remove(index_path(path))
+
+
+# ---------------------------
+# Tri et filtre calculés sur le fichier (par morceaux, colonne seule)
+# ---------------------------
+def _iter_column(path: str, column: str, chunksize: int):
+    """Valeurs d'une colonne en texte, par morceaux, quel que soit le format du fichier."""
+    if is_columnar(path):
+        for batch in iter_batches(path, chunksize, columns=[column]):
+            yield _as_text(batch.to_pandas())[column]
+        return
+    with open(path, "rb") as raw:
+        for chunk in pd.read_csv(decompressed(path, raw), usecols=[column], chunksize=chunksize, **TEXT_OPTIONS):
+            yield chunk[column]
+
+
+def filter_mask(path: str, column: str, text: str, chunksize: int = 1_000_000) -> np.ndarray:
+    """Masque des lignes dont la colonne contient text (insensible à la casse)."""
+    parts = [
+        values.str.contains(text, case=False, regex=False).to_numpy(dtype=bool)
+        for values in _iter_column(path, column, chunksize)
+    ]
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=bool)
+
+
+def sort_order(path: str, column: str, ascending: bool = True, chunksize: int = 1_000_000) -> np.ndarray:
+    """
+    Permutation des lignes triées sur une colonne (tri stable, vides en dernier).
+    Une colonne entièrement numérique est triée comme des nombres (8 octets par ligne),
+    sinon comme du texte.
+    """
+    numeric, numeric_ok = [], True
+    for values in _iter_column(path, column, chunksize):
+        parsed = pd.to_numeric(values, errors="coerce")
+        if (parsed.isna() & (values.str.strip() != "")).any():
+            numeric_ok = False
+            break
+        numeric.append(parsed.to_numpy(dtype="float64"))
+
+    if numeric_ok:
+        keys = pd.Series(np.concatenate(numeric) if numeric else np.zeros(0))
+    else:
+        keys = pd.concat(list(_iter_column(path, column, chunksize)), ignore_index=True)
+        keys = keys.where(keys.str.strip() != "")
+
+    keys = keys.reset_index(drop=True)
+    return keys.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+
+
+class RowView:
+    """Vue triée / filtrée d'un RowIndex : ligne affichée i → ligne du fichier."""
+
+    def __init__(self, index: RowIndex):
+        self.index = index
+        self.order = None   # permutation de tri (None : ordre du fichier)
+        self.mask = None    # masque de filtre (None : toutes les lignes)
+        self._rows = None
+
+    def _refresh(self):
+        if self.order is None and self.mask is None:
+            self._rows = None
+            return
+        rows = self.order if self.order is not None else np.arange(len(self.mask))
+        if self.mask is not None:
+            rows = rows[self.mask[rows]]
+        self._rows = rows
+
+    def set_sort(self, order):
+        self.order = order
+        self._refresh()
+
+    def set_filter(self, mask):
+        self.mask = mask
+        self._refresh()
+
+    def __len__(self):
+        return self.index.n_rows if self._rows is None else len(self._rows)
+
+    def rows(self, start: int, stop: int) -> pd.DataFrame:
+        if self._rows is None:
+            return self.index.read_rows(start, stop)
+        return self.index.take(self._rows[start:stop])
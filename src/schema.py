@@ -0,0 +1,200 @@
+# schema.py
+import numpy as np
+import pandas as pd
+
+# Schéma compact appliqué au chargement (cache.load_csv) : entiers réduits (int8/16/32),
+# flottants en float32, chaînes peu variées en category, autres chaînes en string[pyarrow],
+# dates AAAA-MM-JJ (ou AAAA-MM-JJ HH:MM:SS) en datetime64. Chaque conversion est sans perte : réécrire le DataFrame
+# en CSV redonne exactement le même texte (les sorties des prétraitements ne changent pas).
+# Les booléens True/False sont déjà lus en bool (1 octet) par pd.read_csv.
+
+# Jetons considérés comme valeurs manquantes (cf. handle_missing_data)
+NA_TOKENS = ["?", "", " "]
+
+# Une colonne de texte devient category si modalités <= CATEGORY_RATIO × valeurs présentes
+CATEGORY_RATIO = 0.5
+
+# float32 : uniquement si toutes les valeurs sont exactes en float32 et s'écrivent pareil
+# (au-delà de 1e6, float32 passe en notation scientifique : 1.6777215e+07)
+FLOAT32_LIMIT = 1e6
+
+# Valeurs dont on compare le texte réécrit avant d'adopter float32
+TEXT_CHECK_ROWS = 1000
+
+INT_DTYPES = ["int8", "int16", "int32"]
+
+# Formats de dates reconnus : ceux que to_csv réécrit à l'identique (longueur du texte → format)
+DATE_FORMATS = {10: "%Y-%m-%d", 19: "%Y-%m-%d %H:%M:%S"}
+DATETIME = "datetime64[ns]"
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = None
+
+
+# ---------------------------
+# Sélection des colonnes (quel que soit le type compact)
+# ---------------------------
+def numeric_columns(df: pd.DataFrame) -> list:
+    """Colonnes numériques de toutes tailles (int8…int64, float32/64), booléens exclus."""
+    return df.select_dtypes(include="number").columns.tolist()
+
+
+def categorical_columns(df: pd.DataFrame) -> list:
+    """Colonnes de texte : object, category et chaînes (string[pyarrow])."""
+    return df.select_dtypes(include=["object", "category", "string"]).columns.tolist()
+
+
+def is_text(series: pd.Series) -> bool:
+    return pd.api.types.is_object_dtype(series) or isinstance(series.dtype, (pd.CategoricalDtype, pd.StringDtype))
+
+
+def na_tokens_to_nan(data):
+    """
+    Remplace les jetons NA_TOKENS par NaN (DataFrame ou Series).
+    Sur une colonne category, les jetons sont retirés des modalités (replace y est déprécié).
+    """
+    if isinstance(data, pd.Series):
+        if isinstance(data.dtype, pd.CategoricalDtype):
+            tokens = [t for t in NA_TOKENS if t in data.cat.categories]
+            return data.cat.remove_categories(tokens) if tokens else data
+        return data.replace(NA_TOKENS, np.nan)
+
+    data = data.copy()
+    for col in data.columns:
+        if is_text(data[col]):
+            data[col] = na_tokens_to_nan(data[col])
+    return data
+
+
+def token_count(series: pd.Series) -> int:
+    """Nombre de jetons NA_TOKENS (colonnes de texte ; par les modalités pour une colonne category)."""
+    if not is_text(series):
+        return 0
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        tokens = [t for t in NA_TOKENS if t in series.cat.categories]
+        if not tokens:
+            return 0
+        counts = np.bincount(series.cat.codes.to_numpy() + 1, minlength=len(series.cat.categories) + 1)
+        return int(sum(counts[series.cat.categories.get_loc(t) + 1] for t in tokens))
+    return int(series.isin(NA_TOKENS).sum())
+
+
+def missing_counts(df: pd.DataFrame) -> pd.Series:
+    """
+    Valeurs manquantes par colonne (NaN et jetons NA_TOKENS), colonne par colonne :
+    ni copie du DataFrame, ni masque booléen de sa taille.
+    """
+    return pd.Series([int(df[col].isna().sum()) + token_count(df[col]) for col in df.columns],
+                     index=df.columns, dtype="int64")
+
+
+# ---------------------------
+# Inférence
+# ---------------------------
+def _int_dtype(series: pd.Series):
+    if series.dtype.itemsize <= 1 or series.empty:
+        return None
+    lo, hi = series.min(), series.max()
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.bits // 8 >= series.dtype.itemsize:
+            return None
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return None
+
+
+def _float_dtype(series: pd.Series):
+    if series.dtype != "float64":
+        return None
+    values = series.to_numpy()
+    present = values[~np.isnan(values)]
+    if len(present) and np.abs(present).max() >= FLOAT32_LIMIT:
+        return None
+    if not np.array_equal(present.astype("float32").astype("float64"), present):
+        return None
+    check = series.dropna().drop_duplicates().head(TEXT_CHECK_ROWS)
+    if not check.astype(str).equals(check.astype("float32").astype(str)):
+        return None
+    return "float32"
+
+
+def _is_dates(present: pd.Series) -> bool:
+    first = present.iloc[0]
+    fmt = DATE_FORMATS.get(len(first))
+    if fmt is None or not first[:4].isdigit() or first[4] != "-":
+        return False
+    if not (present.str.len() == len(first)).all():
+        return False
+    try:
+        parsed = pd.to_datetime(present, format=fmt)
+    except (ValueError, TypeError):
+        return False
+    # to_csv n'écrit que la date si toutes les heures sont à minuit
+    return len(first) == 10 or bool((parsed != parsed.dt.normalize()).any())
+
+
+def _text_dtype(series: pd.Series):
+    present = series.dropna()
+    if present.empty or pd.api.types.infer_dtype(present, skipna=False) != "string":
+        return None
+    if _is_dates(present):
+        return DATETIME
+    if present.nunique() <= CATEGORY_RATIO * len(present):
+        return "category"
+    return STRING_DTYPE
+
+
+def infer_schema(df: pd.DataFrame) -> dict:
+    """
+    {colonne: type compact} pour les colonnes lues avec un type plus large que nécessaire
+    (les autres sont absentes du schéma). Sérialisable en JSON.
+    """
+    schema = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            dtype = _int_dtype(series)
+        elif pd.api.types.is_float_dtype(series):
+            dtype = _float_dtype(series)
+        elif pd.api.types.is_object_dtype(series):
+            dtype = _text_dtype(series)
+        else:
+            dtype = None
+        if dtype is not None:
+            schema[str(col)] = dtype
+    return schema
+
+
+# ---------------------------
+# Application
+# ---------------------------
+def read_options(schema: dict) -> dict:
+    """Arguments de pd.read_csv appliquant le schéma pendant la lecture (dates exceptées)."""
+    dtypes = {col: dtype for col, dtype in schema.items() if dtype != DATETIME}
+    return {"dtype": dtypes} if dtypes else {}
+
+
+def apply_schema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """Convertit les colonnes selon le schéma (celles déjà converties par read_csv sont laissées telles quelles)."""
+    dtypes = {}
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        if dtype == DATETIME:
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(df[col], format="ISO8601")
+        elif df[col].dtype != dtype:
+            dtypes[col] = dtype
+    return df.astype(dtypes) if dtypes else df
+
+
+def optimize(df: pd.DataFrame) -> tuple:
+    """(DataFrame converti, schéma) : inférence puis application."""
+    schema = infer_schema(df)
+    return apply_schema(df, schema), schema
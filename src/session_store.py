@@ -0,0 +1,136 @@
+# session_store.py
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Les DataFrames rendus sont des copies superficielles du dataset partagé, en lecture seule :
+# ajouter, retirer ou renommer des colonnes est sans effet sur les autres fenêtres, mais les
+# valeurs ne doivent jamais être modifiées en place (les traitements travaillent sur une copie,
+# cf. fitted.py). Le mode copy-on-write de pandas n'est pas activé ici : il changerait le
+# comportement de tout le processus selon l'ordre des imports.
+
+
+class _Entry:
+    def __init__(self, path, df, version):
+        self.path = path
+        self.df = df
+        self.version = version
+        self.refs = 0
+        self.nbytes = int(df.memory_usage(deep=True).sum())
+
+
+class SessionStore:
+    """
+    Stockage des DataFrames chargés, partagé par toutes les fenêtres du processus.
+    - clé : chemin du fichier (invalidée si mtime/taille changent)
+    - comptage de références : une entrée utilisée par une fenêtre n'est jamais évincée
+    - LRU sous budget mémoire pour les entrées libres
+    - le chargeur s'exécute hors du verrou : release() et les autres datasets ne l'attendent pas ;
+      deux demandes du même fichier attendent un seul chargement (Event par chemin) ; si ce
+      chargement échoue ou est annulé (jeton de la tâche qui l'a lancé), les autres demandes le
+      relancent chacune avec leur propre progression au lieu de recevoir l'erreur
+    """
+
+    def __init__(self, loader, budget: int):
+        self.loader = loader
+        self.budget = budget
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def _take(self, entry, hold):
+        """Sous le verrou : entrée utilisée (LRU), retenue si hold, puis éviction."""
+        self._entries.move_to_end(entry.path)
+        if hold:
+            entry.refs += 1
+        self._evict()
+        return entry.df.copy(deep=False)
+
+    def _load(self, path, progress, hold):
+        version = self._version(path)
+        while True:
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is not None and entry.version == version:
+                    df = self._take(entry, hold)
+                    break
+                pending = self._loading.get(path)
+                owner = pending is None
+                if owner:
+                    pending = self._loading[path] = threading.Event()
+            if not owner:
+                pending.wait()  # chargement en cours ailleurs ; réussi ou non, on revérifie
+                continue
+
+            try:
+                df = self.loader(path) if progress is None else self.loader(path, progress=progress)
+                entry = _Entry(path, df, version)
+            except BaseException:
+                with self._lock:
+                    del self._loading[path]
+                pending.set()
+                raise
+            with self._lock:
+                del self._loading[path]
+                self._entries[path] = entry
+                df = self._take(entry, hold)
+            pending.set()
+            return df
+
+        if progress is not None:
+            try:
+                progress.stage("lecture (mémoire)")  # peut lever jobs.Cancelled
+            except BaseException:
+                if hold:
+                    self.release(path)
+                raise
+        return df
+
+    def get(self, path: str, progress=None) -> pd.DataFrame:
+        """
+        Copie superficielle du dataset, en lecture seule, sans le retenir (usage ponctuel).
+        progress est transmis au chargeur si le dataset doit être lu.
+        """
+        return self._load(path, progress, hold=False)
+
+    def acquire(self, path: str, progress=None) -> pd.DataFrame:
+        """Comme get(), mais retient l'entrée jusqu'à l'appel de release(path)."""
+        return self._load(path, progress, hold=True)
+
+    def source(self, path: str):
+        """(chemin absolu, mtime, taille) de la version chargée de path, ou None si elle n'est pas en mémoire."""
+        with self._lock:
+            entry = self._entries.get(path)
+            return (os.path.abspath(path),) + entry.version if entry is not None else None
+
+    def release(self, path: str):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.refs > 0:
+                entry.refs -= 1
+                self._evict()
+
+    def invalidate(self, path: str):
+        """Oublie le dataset (les fenêtres ouvertes gardent leur propre référence)."""
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def memory_usage(self):
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def _evict(self):
+        total = self.memory_usage()
+        for path in list(self._entries):
+            if total <= self.budget:
+                break
+            entry = self._entries[path]
+            if entry.refs == 0:
+                del self._entries[path]
+                total -= entry.nbytes
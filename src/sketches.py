@@ -0,0 +1,149 @@
+# sketches.py
+import numpy as np
+
+
+class KLLSketch:
+    """
+    Esquisse de quantiles approchés de type KLL (Karnin, Lang, Liberty).
+    Chaque niveau i contient des valeurs de poids 2**i ; lorsqu'un niveau dépasse
+    sa capacité, il est trié et une valeur sur deux (décalage aléatoire) monte au niveau suivant.
+    Mémoire bornée (~3k valeurs), fusionnable, erreur de rang de l'ordre de 1/k.
+    """
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0, dtype="float64")]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype="float64"))
+                buf = np.sort(self.levels[level])
+                keep = buf[-1:] if len(buf) % 2 else buf[:0]
+                buf = buf[:len(buf) - len(keep)]
+                promoted = buf[self._rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = keep
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype="float64"))
+        for i, items in enumerate(other.levels):
+            self.levels[i] = np.concatenate([self.levels[i], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """Quantile(s) approché(s) ; q peut être un scalaire ou une liste."""
+        items = np.concatenate(self.levels)
+        if len(items) == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        weights = np.concatenate([np.full(len(lvl), 2.0 ** i) for i, lvl in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cum = items[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cum, np.asarray(q) * cum[-1], side="left")
+        result = items[np.clip(idx, 0, len(items) - 1)]
+        return result if np.ndim(q) else float(result)
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def histogram(self, bins: int = 20, value_range=None):
+        """Histogramme approché de toutes les valeurs vues (valeurs retenues pondérées par 2**niveau)."""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lvl), 2.0 ** i) for i, lvl in enumerate(self.levels)])
+        counts, edges = np.histogram(items, bins=bins, range=value_range, weights=weights)
+        # les poids somment à n à un arrondi près : on ramène le total à n
+        if counts.sum() > 0:
+            counts = counts * (self.n / counts.sum())
+        return counts, edges
+
+
+class HyperLogLog:
+    """
+    Estimation du nombre de valeurs distinctes (Flajolet et al.) à partir de hachages 64 bits.
+    2**p registres d'un octet, erreur relative ~1.04/sqrt(2**p) (~0.8 % pour p=14), fusionnable.
+    """
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype="uint8")
+
+    def update(self, hashes):
+        hashes = np.asarray(hashes, dtype="uint64")
+        if len(hashes) == 0:
+            return
+        idx = (hashes >> np.uint64(64 - self.p)).astype("int64")
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # rang du premier bit à 1 (bits restants < 2**53 : conversion en float exacte)
+        bit_length = np.zeros(len(rest), dtype="int64")
+        nonzero = rest > 0
+        bit_length[nonzero] = np.floor(np.log2(rest[nonzero].astype("float64"))).astype("int64") + 1
+        rank = (64 - self.p - bit_length + 1).astype("uint8")
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype("int64")))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)  # petites cardinalités : comptage linéaire
+        return float(estimate)
+
+
+class MinHash:
+    """
+    Signature MinHash (num_perm permutations a*h + b mod 2**64) d'un ensemble de hachages 64 bits.
+    La proportion de minima égaux entre deux signatures estime l'indice de Jaccard
+    (écart-type ~1/sqrt(num_perm)).
+    """
+
+    BATCH = 8192
+
+    def __init__(self, num_perm: int = 128, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 2 ** 63, num_perm, dtype="uint64") | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, num_perm, dtype="uint64")
+        self.signature = np.full(num_perm, np.iinfo("uint64").max, dtype="uint64")
+
+    def update(self, hashes):
+        hashes = np.unique(np.asarray(hashes, dtype="uint64"))
+        if len(hashes) == 0:
+            return
+        # par lots pour borner la matrice temporaire (num_perm × lot)
+        for start in range(0, len(hashes), self.BATCH):
+            batch = hashes[start:start + self.BATCH]
+            with np.errstate(over="ignore"):
+                permuted = self.a[:, None] * batch[None, :] + self.b[:, None]
+            np.minimum(self.signature, permuted.min(axis=1), out=self.signature)
+
+    def merge(self, other: "MinHash"):
+        np.minimum(self.signature, other.signature, out=self.signature)
+        return self
+
+    def jaccard(self, other: "MinHash") -> float:
+        return float(np.mean(self.signature == other.signature))
@@ -1,55 +1,129 @@
 # smart_preprocessing.py
+import math
+from functools import partial
 import pandas as pd
 import numpy as np
 import re
 
-def analyze_dataset(df: pd.DataFrame):
+from column_stats import ColumnStats
+from parallel import column_map
+from schema import categorical_columns, numeric_columns
+
+# Au-delà de SAMPLE_THRESHOLD lignes, les agrégats coûteux (unicité, regex, nunique, quantiles)
+# sont calculés sur un échantillon ; les agrégats bon marché restent exacts.
+SAMPLE_THRESHOLD = 1_000_000
+SAMPLE_SIZE = 100_000
+
+# Aucun doublon dans un échantillon de n lignes → taux de doublons < 3/n avec 95 % de confiance
+ID_SAMPLE_CONFIDENCE = 0.95
+
+
+def _sample_rows(df: pd.DataFrame, size: int, seed: int = 0) -> pd.DataFrame:
+    """Échantillon uniforme de lignes (sans remise), dans l'ordre d'origine."""
+    rng = np.random.default_rng(seed)
+    idx = np.sort(rng.choice(len(df), size=size, replace=False))
+    return df.take(idx)
+
+
+def _decision_confidence(rate: float, threshold: float, n: int) -> float:
+    """Probabilité que le taux estimé sur n lignes soit du même côté du seuil que le vrai taux."""
+    se = math.sqrt(rate * (1 - rate) / n) if n else 0.0
+    if se == 0:
+        return 1.0
+    z = abs(rate - threshold) / se
+    return 0.5 * (1 + math.erf(z / math.sqrt(2)))
+
+
+def _coverage_confidence(series: pd.Series) -> float:
+    """Estimation de Good-Turing : part des modalités déjà observées dans l'échantillon."""
+    counts = series.value_counts()
+    n = counts.sum()
+    return 1.0 - (counts == 1).sum() / n if n else 1.0
+
+
+def is_probable_id(series: pd.Series, int_ranges: dict = None):
+    """
+    Retourne True si la colonne ressemble vraiment à un identifiant.
+    int_ranges : {colonne: (effectif, min, max)} calculés sur la colonne complète
+    lorsque series n'est qu'un échantillon.
+    """
+    # 1️⃣ Un identifiant doit être unique
+    if not series.is_unique:
+        return False
+    
+    # 2️⃣ Si c'est une chaîne contenant chiffres + lettres → ID probable
+    if series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+        if series.str.match(r'^[A-Za-z]*\d+[A-Za-z]*$').any():
+            return True
+    
+    # 3️⃣ Si c'est entier et ressemble à une séquence continue (1..N) → ID
+    if pd.api.types.is_integer_dtype(series):
+        if int_ranges is not None:
+            # unique + (max - min + 1 == effectif) ⇔ séquence parfaite, sans trier la colonne
+            count, lo, hi = int_ranges[series.name]
+            if count and hi - lo + 1 == count:
+                return True
+        else:
+            values = series.dropna().sort_values().values
+            if np.all(np.diff(values) == 1):  # séquence parfaite
+                return True
+    
+    # 4️⃣ Si c'est entier mais dispersion forte → probablement une variable utile (ex: âge, prix)
+    if pd.api.types.is_numeric_dtype(series):
+        return False  # garde les colonnes continues comme variables
+    
+    return False
+
+
+def _nunique(series: pd.Series):
+    return series.nunique()
+
+
+def analyze_dataset(df: pd.DataFrame, stats: ColumnStats = None, sample_size: int = None, n_jobs: int = 1):
     """
     Analyse intelligente du dataset.
     Ignore les colonnes identifiants et applique des seuils souples.
-    Retourne une liste de suggestions justifiées.
+    Retourne une liste de suggestions justifiées, chacune avec une confiance (0–1).
+    Les quartiles (stats) sont calculés une fois et renvoyés dans summary["column_stats"]
+    pour être réutilisés par handle_outliers.
+
+    Sur les gros fichiers (> SAMPLE_THRESHOLD lignes, ou sample_size explicite),
+    l'analyse travaille sur un échantillon pour les calculs coûteux.
+    n_jobs > 1 répartit les calculs par colonne sur plusieurs processus.
     """
 
     suggestions = []
     summary = {}
 
+    if sample_size is None:
+        sample_size = SAMPLE_SIZE if len(df) > SAMPLE_THRESHOLD else 0
+    sampled = 0 < sample_size < len(df)
+    sample = _sample_rows(df, sample_size) if sampled else df
+    summary["sampled"] = sampled
+    summary["n_analyzed"] = len(sample)
 
-    def is_probable_id(series):
-        """
-        Retourne True si la colonne ressemble vraiment à un identifiant.
-        """
-        # 1️⃣ Un identifiant doit être unique
-        if not series.is_unique:
-            return False
-        
-        # 2️⃣ Si c'est une chaîne contenant chiffres + lettres → ID probable
-        if series.dtype == object:
-            if series.str.match(r'^[A-Za-z]*\d+[A-Za-z]*$').any():
-                return True
-        
-        # 3️⃣ Si c'est entier et ressemble à une séquence continue (1..N) → ID
-        if np.issubdtype(series.dtype, np.integer):
-            values = series.dropna().sort_values().values
-            if np.all(np.diff(values) == 1):  # séquence parfaite
-                return True
-        
-        # 4️⃣ Si c'est entier mais dispersion forte → probablement une variable utile (ex: âge, prix)
-        if np.issubdtype(series.dtype, np.number):
-            return False  # garde les colonnes continues comme variables
-        
-        return False
 
     # --- 0️⃣ Filtrage basé sur heuristique intelligente ---
-    id_like = [col for col in df.columns if is_probable_id(df[col])]
+    int_ranges = None
+    if sampled:
+        int_cols = [col for col in df.columns if pd.api.types.is_integer_dtype(df[col])]
+        int_ranges = {
+            col: (int(row["count"]), int(row["min"]), int(row["max"]))
+            for col, row in df[int_cols].agg(["count", "min", "max"]).T.iterrows()
+        }
+    id_checks = column_map(partial(is_probable_id, int_ranges=int_ranges), sample, n_jobs=n_jobs)
+    id_like = [col for col in df.columns if id_checks[col]]
 
     df = df.drop(columns=id_like, errors="ignore")
+    sample = sample.drop(columns=id_like, errors="ignore")
 
     if id_like:
         suggestions.append({
             "type": "Filtrage",
             "action": f"Ignoré {len(id_like)} colonne(s) identifiant",
             "reason": f"Colonnes identifiées comme ID : {', '.join(id_like)}",
-            "justification": "Colonnes détectées comme identifiants uniques ou séquentiels."
+            "justification": "Colonnes détectées comme identifiants uniques ou séquentiels.",
+            "confidence": ID_SAMPLE_CONFIDENCE if sampled else 1.0,
         })
 
     # --- 1️⃣ Valeurs manquantes ---
@@ -62,11 +136,12 @@ def analyze_dataset(df: pd.DataFrame):
             "type": "Gestion des valeurs manquantes",
             "action": "Imputation moyenne/mode ou suppression",
             "reason": f"{len(high_missing)} colonnes >10% de NaN (max {high_missing.max():.1%})",
-            "justification": "Un fort taux de valeurs manquantes peut fausser les analyses."
+            "justification": "Un fort taux de valeurs manquantes peut fausser les analyses.",
+            "confidence": 1.0,
         })
 
     # --- 2️⃣ Variables numériques ---
-    num_df = df.select_dtypes(include=["float64", "int64"])
+    num_df = df[numeric_columns(df)]
     if not num_df.empty:
         summary["numeric_cols"] = num_df.columns.tolist()
 
@@ -79,7 +154,8 @@ def analyze_dataset(df: pd.DataFrame):
                 "type": "Standardisation",
                 "action": "StandardScaler()",
                 "reason": f"Les échelles varient beaucoup (ratio std = {std_ratio:.1f})",
-                "justification": "Recommandé pour équilibrer les variables de grande amplitude."
+                "justification": "Recommandé pour équilibrer les variables de grande amplitude.",
+                "confidence": 1.0,
             })
 
         # Vérification normalisation
@@ -89,23 +165,25 @@ def analyze_dataset(df: pd.DataFrame):
                 "type": "Normalisation",
                 "action": "MinMaxScaler()",
                 "reason": f"Les valeurs sont positives et non bornées (max = {max_val:.2f})",
-                "justification": "Utile pour homogénéiser les variables positives."
+                "justification": "Utile pour homogénéiser les variables positives.",
+                "confidence": 1.0,
             })
         elif min_val >= 0 and max_val <= 1.5:
             suggestions.append({
                 "type": "Aucune normalisation nécessaire",
                 "action": "Données déjà sur [0,1]",
                 "reason": "Les données semblent déjà normalisées",
-                "justification": "Pas besoin de retransformer les valeurs."
+                "justification": "Pas besoin de retransformer les valeurs.",
+                "confidence": 1.0,
             })
 
     # --- 3️⃣ Variables catégorielles ---
-    cat_df = df.select_dtypes(include=["object", "category"])
+    cat_df = sample[categorical_columns(sample)]
     # Filtrage intelligent : garder seulement colonnes valides
     cat_cols = cat_df.columns[
         (~cat_df.apply(pd.api.types.is_numeric_dtype)) &       # exclure numériques
         (~cat_df.apply(pd.api.types.is_datetime64_any_dtype)) & # exclure dates
-        (cat_df.nunique() <= 15)                               # nombre raisonnable de catégories
+        (pd.Series(column_map(_nunique, cat_df, n_jobs=n_jobs), dtype="int64") <= 15)  # nombre raisonnable de catégories
     ].tolist()
     cat_df = cat_df[cat_cols]
 
@@ -115,23 +193,27 @@ def analyze_dataset(df: pd.DataFrame):
             "type": "Encodage catégoriel",
             "action": "LabelEncoder",
             "reason": f"{len(cat_df.columns)} colonnes catégorielles détectées",
-            "justification": "Les modèles statistiques nécessitent des données numériques."
+            "justification": "Les modèles statistiques nécessitent des données numériques.",
+            "confidence": min(_coverage_confidence(cat_df[c]) for c in cat_df.columns) if sampled else 1.0,
         })
 
     # --- 4️⃣ Outliers ---
     if not num_df.empty:
-        q1, q3 = num_df.quantile(0.25), num_df.quantile(0.75)
-        iqr = q3 - q1
-        outlier_mask = (num_df < (q1 - 1.5 * iqr)) | (num_df > (q3 + 1.5 * iqr))
-        outlier_rate = outlier_mask.mean().mean()
+        num_sample = sample[num_df.columns]
+        if stats is None:
+            stats = ColumnStats.from_frame(num_sample, n_jobs=n_jobs)
+        summary["column_stats"] = stats
+        outlier_rate = stats.outlier_rate(num_sample)
         summary["outlier_rate"] = outlier_rate
+        outlier_confidence = _decision_confidence(outlier_rate, 0.10, len(sample)) if sampled else 1.0
 
         if outlier_rate > 0.10:  # 10% = seuil raisonnable
             suggestions.append({
                 "type": "Nettoyage d’outliers",
                 "action": "Suppression ou Winsorisation",
                 "reason": f"{outlier_rate:.1%} de valeurs extrêmes détectées",
-                "justification": "Les outliers influencent les moyennes et les modèles sensibles."
+                "justification": "Les outliers influencent les moyennes et les modèles sensibles.",
+                "confidence": outlier_confidence,
             })
 
     # --- 5️⃣ Dataset propre ---
@@ -140,7 +222,8 @@ def analyze_dataset(df: pd.DataFrame):
             "type": "Aucun prétraitement nécessaire",
             "action": "Aucune",
             "reason": "Aucune anomalie détectée",
-            "justification": "Le dataset est déjà propre et équilibré."
+            "justification": "Le dataset est déjà propre et équilibré.",
+            "confidence": outlier_confidence if not num_df.empty else 1.0,
         })
 
     return suggestions, summary
\ No newline at end of file
@@ -0,0 +1,325 @@
+# streaming.py
+import os
+
+import numpy as np
+import pandas as pd
+
+from sketches import KLLSketch
+from column_stats import ColumnStats
+from fitted import ImputeStep, OutlierStep, ScaleStep
+from formats import count_rows, decompressed, is_columnar, is_plain_csv, iter_batches
+from jobs import check_cancel
+from schema import NA_TOKENS, is_text, na_tokens_to_nan, token_count
+from writers import open_writer
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# Au-delà de cette taille (octets), l'interface bascule en mode streaming
+STREAMING_THRESHOLD = 200 * 1024 * 1024
+
+
+# =========================================
+# Accumulateur de statistiques par colonne
+# =========================================
+class ColumnAccumulator:
+    """
+    Statistiques d'une colonne accumulées morceau par morceau :
+    taux de valeurs manquantes, moyenne, variance (fusion de Chan),
+    min/max, esquisse de quantiles (KLL) et comptage des modalités.
+    Comme schema.missing_counts, les jetons NA_TOKENS d'un morceau lu comme texte
+    comptent parmi les manquants et ne sont pas des modalités.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.n_rows = 0
+        self.n_missing = 0
+        self.kinds = set()
+
+        # Partie numérique
+        self.n_numeric = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.quantile_sketch = KLLSketch()
+
+        # Partie catégorielle (comptage des modalités pour le mode)
+        self.counts = None
+
+    def update(self, series: pd.Series):
+        self.n_rows += len(series)
+        self.n_missing += int(series.isna().sum()) + token_count(series)
+        self.kinds.add(series.dtype.kind)
+
+        if _is_numeric(series):
+            values = series.dropna().to_numpy(dtype="float64")
+            self._update_numeric(values)
+        else:
+            self.add_counts(value_counts(series))
+
+    def _update_numeric(self, values):
+        n_b = len(values)
+        if n_b == 0:
+            return
+        mean_b = values.mean()
+        m2_b = ((values - mean_b) ** 2).sum()
+
+        # Fusion des moments (Chan et al.)
+        n_a = self.n_numeric
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta ** 2 * n_a * n_b / n
+        self.n_numeric = n
+
+        self.min = np.nanmin([self.min, values.min()])
+        self.max = np.nanmax([self.max, values.max()])
+        self.quantile_sketch.update(values)
+
+    def add_counts(self, counts: pd.Series):
+        if self.counts is None:
+            self.counts = counts
+        else:
+            self.counts = self.counts.add(counts, fill_value=0)
+
+    # --- Propriétés dérivées ---
+    @property
+    def is_numeric(self):
+        return bool(self.kinds) and self.kinds <= {"i", "u", "f"}
+
+    @property
+    def needs_recount(self):
+        """Colonne mixte : des morceaux numériques n'ont pas été comptés comme modalités."""
+        return not self.is_numeric and self.n_numeric > 0
+
+    @property
+    def missing_rate(self):
+        return self.n_missing / self.n_rows if self.n_rows else 0.0
+
+    @property
+    def variance(self):
+        return self.m2 / self.n_numeric if self.n_numeric else np.nan
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.variance))
+
+    @property
+    def median(self):
+        return self.quantile_sketch.median()
+
+    @property
+    def mode(self):
+        return mode_from_counts(self.counts)
+
+    @property
+    def dtype(self):
+        """Type à imposer au second passage pour garder des morceaux homogènes."""
+        if not self.is_numeric:
+            return object
+        if "f" in self.kinds or self.n_missing > 0:
+            return "float64"
+        return "int64"
+
+
+def value_counts(series: pd.Series) -> pd.Series:
+    """Effectif des modalités, sans les valeurs manquantes ni les jetons NA_TOKENS."""
+    return series.value_counts(dropna=True).drop(NA_TOKENS, errors="ignore")
+
+
+def mode_from_counts(counts):
+    """Modalité la plus fréquente (la plus petite en cas d'égalité, comme Series.mode()[0])."""
+    if counts is None or counts.empty:
+        return np.nan
+    top = counts[counts == counts.max()].index
+    try:
+        return min(top)
+    except TypeError:
+        return top[0]
+
+
+def _is_numeric(series: pd.Series):
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+# =========================================
+# Lecture par morceaux
+# =========================================
+def iter_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE, cancel=None, progress=None,
+                stage: str = "lecture", start: int = 0, **read_kwargs):
+    """
+    Itère sur le CSV par morceaux, lus comme pd.read_csv les lit (cf. cache.load_csv) :
+    « ? » et « » restent du texte, la colonne est alors une colonne de texte, comme en mémoire.
+    Passer na_values dans read_kwargs pour convertir des jetons à la lecture (cf. fitted.py).
+    cancel : callable vérifié avant chaque morceau (jobs.Cancelled est levée s'il renvoie True).
+    progress : progress.Progress facultatif ; le passage est une étape `stage`,
+    avancée à chaque morceau (octets lus, lignes).
+    start : offset d'un début de ligne à partir duquel lire (lignes ajoutées depuis un
+    passage précédent ; passer alors header=None et names=colonnes).
+    Les CSV compressés sont décompressés à la volée (octets compressés lus) ; les fichiers en
+    colonnes sont lus par lots de chunksize lignes (_iter_columnar).
+    """
+    if start and not is_plain_csv(path):
+        raise ValueError(f"Lecture à partir d'un offset impossible (CSV brut uniquement) : {path}")
+    if is_columnar(path):
+        yield from _iter_columnar(path, chunksize, cancel, progress, stage, **read_kwargs)
+        return
+    if progress is not None:
+        progress.stage(stage, total_bytes=os.path.getsize(path) - start)
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        with pd.read_csv(decompressed(path, fh), chunksize=chunksize, **read_kwargs) as reader:
+            for chunk in reader:
+                check_cancel(cancel)
+                if progress is not None:
+                    progress.advance(bytes_read=fh.tell() - start, rows=len(chunk))
+                yield chunk
+
+
+def _iter_columnar(path, chunksize, cancel, progress, stage, usecols=None, dtype=None, na_values=None):
+    """
+    Morceaux d'un fichier Parquet / Feather / .parts, présentés comme ceux de pd.read_csv :
+    usecols, dtype (dict ou type unique) et na_values (liste, ou dict par colonne) sont appliqués
+    à chaque lot. Progression en lignes (nombre de lignes lu dans les métadonnées).
+    """
+    if progress is not None:
+        progress.stage(stage, total=count_rows(path))
+    done = 0
+    for batch in iter_batches(path, chunksize, columns=list(usecols) if usecols is not None else None):
+        check_cancel(cancel)
+        chunk = batch.to_pandas()
+        if isinstance(na_values, dict):
+            for col in na_values:
+                if col in chunk.columns and is_text(chunk[col]):
+                    chunk[col] = na_tokens_to_nan(chunk[col])
+        elif na_values:
+            chunk = na_tokens_to_nan(chunk)
+        if dtype is not None:
+            types = dtype if isinstance(dtype, dict) else dict.fromkeys(chunk.columns, dtype)
+            chunk = chunk.astype({col: t for col, t in types.items() if col in chunk.columns})
+        done += len(chunk)
+        if progress is not None:
+            progress.advance(done=done, rows=len(chunk))
+        yield chunk
+
+
+def collect_stats(path: str, chunksize: int = DEFAULT_CHUNKSIZE, cancel=None, progress=None,
+                  on_chunk=None, stats: dict = None, start: int = 0, usecols=None) -> dict:
+    """
+    Premier passage : calcule les statistiques de chaque colonne sans charger
+    le fichier complet. Retourne un dict {colonne: ColumnAccumulator} ordonné.
+    on_chunk(morceau) : calculs supplémentaires pendant le même passage (profiler).
+    stats, start : prolonge des statistiques déjà calculées avec les lignes situées
+    après l'offset start (fichier complété par ajout en fin, cf. profiler).
+    usecols : ne calcule que ces colonnes.
+    """
+    stats = {} if stats is None else stats
+    read_kwargs = {"usecols": usecols} if usecols is not None else {}
+    if start:
+        read_kwargs.update(header=None, names=list(stats))
+    for chunk in iter_chunks(path, chunksize, cancel, progress, "statistiques", start, **read_kwargs):
+        for col in chunk.columns:
+            if col not in stats:
+                stats[col] = ColumnAccumulator(col)
+            stats[col].update(chunk[col])
+        if on_chunk is not None:
+            on_chunk(chunk)
+
+    # Colonnes mixtes (numériques dans certains morceaux seulement) :
+    # on recompte leurs modalités en les relisant comme texte.
+    mixed = [col for col, acc in stats.items() if acc.needs_recount]
+    if mixed:
+        for col in mixed:
+            stats[col].counts = None
+        for chunk in iter_chunks(path, chunksize, cancel, progress, "recomptage", usecols=mixed, dtype=object):
+            for col in mixed:
+                stats[col].add_counts(value_counts(chunk[col]))
+
+    return stats
+
+
+def _stream_transform(path, out_path, stats, transform, chunksize, cancel=None, progress=None):
+    """
+    Second passage : transforme chaque morceau et l'écrit dans out_path (format de son extension,
+    writers.py) depuis un thread, pendant que le morceau suivant est lu et transformé.
+    """
+    with open_writer(out_path, background=True) as writer:
+        for chunk in iter_chunks(path, chunksize, cancel, progress, "transformation", dtype=read_dtypes(stats)):
+            writer.write(transform(chunk))
+    return writer.n_rows
+
+
+def read_dtypes(stats: dict) -> dict:
+    """Types de lecture fixés par le premier passage (identiques d'un morceau à l'autre)."""
+    return {col: acc.dtype for col, acc in stats.items() if acc.kinds != {"b"}}
+
+
+# =========================================
+# Traitements en streaming
+# =========================================
+# Chaque traitement retourne l'étape ajustée appliquée (fitted.py), ou None s'il n'y avait
+# rien à faire ; stats (dict) reçoit les statistiques du premier passage si fourni.
+def stream_missing_data(path: str, out_path: str, chunksize: int = DEFAULT_CHUNKSIZE, cancel=None,
+                        progress=None, stats: dict = None) -> ImputeStep:
+    """
+    Équivalent de handle_missing_data en deux passages : les jetons NA_TOKENS des colonnes
+    de texte comptent parmi les manquants et sont remplis par le mode (ImputeStep.transform).
+    Retourne None (et n'écrit rien) si le fichier ne contient aucune valeur manquante.
+    """
+    stats = collect_stats(path, chunksize, cancel, progress, stats=stats)
+    if sum(acc.n_missing for acc in stats.values()) == 0:
+        return None
+
+    threshold_col = 0.5
+    kept = [col for col, acc in stats.items() if acc.missing_rate < threshold_col]
+    fill_values = {
+        col: stats[col].mean if stats[col].is_numeric else stats[col].mode
+        for col in kept
+        if stats[col].n_missing > 0
+    }
+
+    step = ImputeStep(kept, fill_values)
+    _stream_transform(path, out_path, stats, step.transform, chunksize, cancel, progress)
+    return step
+
+
+def _numeric_kept(stats):
+    return [col for col, acc in stats.items() if acc.is_numeric and acc.n_numeric > 0]
+
+
+def stream_normalize_data(path: str, out_path: str, chunksize: int = DEFAULT_CHUNKSIZE, cancel=None,
+                          progress=None, stats: dict = None) -> ScaleStep:
+    """Min-Max en deux passages (mêmes formules que MinMaxScaler)."""
+    stats = collect_stats(path, chunksize, cancel, progress, stats=stats)
+    cols = _numeric_kept(stats)
+    data_range = np.array([stats[c].max - stats[c].min for c in cols])
+    scale = 1.0 / np.where(data_range == 0, 1.0, data_range)
+    offset = -np.array([stats[c].min for c in cols]) * scale
+
+    step = ScaleStep("normalize", cols, scale, offset)
+    _stream_transform(path, out_path, stats, step.transform, chunksize, cancel, progress)
+    return step
+
+
+def stream_standardize_data(path: str, out_path: str, chunksize: int = DEFAULT_CHUNKSIZE, cancel=None,
+                            progress=None, stats: dict = None) -> ScaleStep:
+    """Z-score en deux passages (écart-type de population, comme StandardScaler)."""
+    stats = collect_stats(path, chunksize, cancel, progress, stats=stats)
+    cols = _numeric_kept(stats)
+    mean = np.array([stats[c].mean for c in cols])
+    std = np.array([stats[c].std for c in cols])
+    std = np.where(std == 0, 1.0, std)
+
+    step = ScaleStep("standardize", cols, mean, std)
+    _stream_transform(path, out_path, stats, step.transform, chunksize, cancel, progress)
+    return step
+
+
+def stream_outliers_data(path: str, out_path: str, chunksize: int = DEFAULT_CHUNKSIZE, cancel=None,
+                         progress=None, stats: dict = None) -> OutlierStep:
+    """Winsorisation IQR en deux passages, avec des quartiles approchés (esquisses KLL)."""
+    stats = collect_stats(path, chunksize, cancel, progress, stats=stats)
+    step = OutlierStep(ColumnStats.from_accumulators(stats))
+    _stream_transform(path, out_path, stats, step.transform, chunksize, cancel, progress)
+    return step
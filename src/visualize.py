@@ -1,10 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import seaborn as sns
 import pandas as pd
 
+from plot_aggregates import (POINT_BUDGET, AggregateCache, box_stats, correlation, crosstab, dataset_key,
+                             histogram, scatter_data, top_counts)
+from schema import categorical_columns, numeric_columns
+
 # --- STYLE GLOBAL ---
 plt.style.use("seaborn-v0_8-muted")
 sns.set_palette("deep")
@@ -14,24 +20,27 @@ sns.set_palette("deep")
 #  FONCTIONS UTILITAIRES
 # --------------------------------------------------
 def _numeric_columns(df: pd.DataFrame):
-    """Retourne les colonnes numériques."""
-    return df.select_dtypes(include=["float64", "int64"]).columns.tolist()
+    """Retourne les colonnes numériques (tous types compacts compris)."""
+    return numeric_columns(df)
 
 
 def _categorical_columns(df: pd.DataFrame):
     """Retourne les colonnes catégorielles (texte)."""
-    return df.select_dtypes(include=["object", "category"]).columns.tolist()
+    return categorical_columns(df)
 
 
 # --------------------------------------------------
 #  FENÊTRE PRINCIPALE DE VISUALISATION
 # --------------------------------------------------
-def visualize_interactive(df: pd.DataFrame, parent=None, default_vis="Histogramme"):
+def visualize_interactive(df: pd.DataFrame, parent=None, default_vis="Histogramme", point_budget: int = POINT_BUDGET,
+                          source=None):
     """
     Ouvre une fenêtre Tkinter interactive avec adaptation IHM :
     - désactive les choix inutiles selon le type de graphique
     - gère les variables numériques et catégorielles
     - accepte un type de visualisation par défaut
+    - point_budget : nombre maximal de points tracés individuellement
+    - source : (chemin, mtime, taille) du fichier chargé (SessionStore.source), clé du cache d'agrégats
     """
     num_cols = _numeric_columns(df)
     cat_cols = _categorical_columns(df)
@@ -80,15 +89,14 @@ def visualize_interactive(df: pd.DataFrame, parent=None, default_vis="Histogramm
     ttk.Button(
         options_frame,
         text="Afficher le graphique",
-        command=lambda: _plot_selected(df, selected_vis.get(), selected_x.get(), selected_y.get(), canvas_frame),
+        command=lambda: view.show(selected_vis.get(), selected_x.get(), selected_y.get()),
         style="Accent.TButton"
     ).grid(row=2, column=0, columnspan=4, pady=10)
 
     # --- CADRE DU GRAPHIQUE ---
     canvas_frame = ttk.Frame(win)
     canvas_frame.pack(fill="both", expand=True, padx=10, pady=10)
-    ttk.Label(canvas_frame, text="Sélectionnez un type et les variables, puis cliquez sur 'Afficher le graphique'.",
-              font=("Segoe UI", 10, "italic"), foreground="#666").pack(pady=50)
+    view = PlotView(df, canvas_frame, point_budget, source)
 
     # --- STYLE BOUTONS ---
     style = ttk.Style()
@@ -130,91 +138,185 @@ def visualize_interactive(df: pd.DataFrame, parent=None, default_vis="Histogramm
             x_menu.config(state="disabled")
             y_menu.config(state="disabled")
 
-    vis_menu.bind("<<ComboboxSelected>>", update_ui)
+    def on_selection(event=None):
+        """Retrace dès qu'un menu change (immédiat si la vue est déjà en cache)."""
+        view.show(selected_vis.get(), selected_x.get(), selected_y.get(), quiet=True)
+
+    vis_menu.bind("<<ComboboxSelected>>", lambda e: (update_ui(), on_selection()))
+    x_menu.bind("<<ComboboxSelected>>", on_selection)
+    y_menu.bind("<<ComboboxSelected>>", on_selection)
     update_ui()  # initialisation correcte selon le type choisi
 
     # --- AUTO-AFFICHAGE DU GRAPHIQUE PAR DÉFAUT ---
-    _plot_selected(df, default_vis, selected_x.get(), selected_y.get(), canvas_frame)
+    view.show(default_vis, selected_x.get(), selected_y.get())
+    return win
 
 
 # --------------------------------------------------
-#  FONCTION DE TRAÇAGE
+#  AGRÉGATS (mis en cache)
 # --------------------------------------------------
-def _plot_selected(df: pd.DataFrame, vis_type: str, x_col: str, y_col: str, frame):
-    """Trace le graphique choisi par l'utilisateur."""
-    for widget in frame.winfo_children():
-        widget.destroy()
+# Agrégats partagés par toutes les fenêtres : revenir à une vue déjà calculée est immédiat
+AGGREGATES = AggregateCache()
+
+
+def _check_selection(df: pd.DataFrame, vis_type: str, x_col: str, y_col: str):
+    """Message d'explication si la combinaison de variables ne convient pas au graphique, sinon None."""
+    num_cols, cat_cols = _numeric_columns(df), _categorical_columns(df)
+    if vis_type == "Boxplot (catégorie ↔ numérique)":
+        if x_col not in cat_cols or y_col not in num_cols:
+            return "Choisissez une variable catégorielle pour X et une numérique pour Y."
+    elif vis_type == "Nuage de points (2 numériques)":
+        if x_col == y_col:
+            return "Choisissez deux variables différentes pour le nuage de points."
+        if x_col not in num_cols or y_col not in num_cols:
+            return "Les deux variables doivent être numériques."
+    elif vis_type in ("Heatmap de catégories", "Comparaison groupée (2 catégories)"):
+        if x_col not in cat_cols or y_col not in cat_cols:
+            return "Les deux variables doivent être catégorielles."
+    elif vis_type == "Matrice de corrélation":
+        if len(num_cols) < 2:
+            return "Pas assez de colonnes numériques pour une matrice de corrélation."
+    elif x_col not in df.columns:
+        return "Choisissez une variable X."
+    return None
+
+
+def _aggregate(df: pd.DataFrame, vis_type: str, x_col: str, y_col: str, point_budget: int):
+    """Agrégat nécessaire au tracé (la seule étape dont le coût dépend du nombre de lignes)."""
+    if vis_type == "Histogramme":
+        if x_col in _numeric_columns(df):
+            return "hist", histogram(df[x_col])
+        return "bars", top_counts(df[x_col])
+    if vis_type == "Diagramme en barres (catégoriel)":
+        return "bars", top_counts(df[x_col])
+    if vis_type == "Boxplot (catégorie ↔ numérique)":
+        return "box", box_stats(df, x_col, y_col, budget=point_budget)
+    if vis_type == "Nuage de points (2 numériques)":
+        return "scatter", scatter_data(df[x_col], df[y_col], budget=point_budget)
+    if vis_type in ("Heatmap de catégories", "Comparaison groupée (2 catégories)"):
+        return "crosstab", crosstab(df, x_col, y_col)
+    if vis_type == "Matrice de corrélation":
+        return "corr", correlation(df, _numeric_columns(df))
+    raise ValueError(f"Type de graphique inconnu : {vis_type}")
 
-    fig, ax = plt.subplots(figsize=(8, 5.5))
 
-    try:
+# --------------------------------------------------
+#  FONCTION DE TRAÇAGE
+# --------------------------------------------------
+def _draw(fig, ax, vis_type: str, x_col: str, y_col: str, aggregate):
+    """Trace l'agrégat sur des axes vides (coût indépendant du nombre de lignes)."""
+    kind, data = aggregate
+
+    if kind == "hist":
+        counts, edges, kde = data
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", color="#4ea8de", edgecolor="white", alpha=0.75)
+        if kde is not None:
+            ax.plot(*kde, color="#4ea8de")
+        ax.set_ylabel("Count")
+        ax.set_title(f"Distribution de '{x_col}'")
+
+    elif kind == "bars":
+        ax.bar(data.index, data.values, color="#4ea8de")
+        ax.tick_params(axis='x', rotation=45)
         if vis_type == "Histogramme":
-            if x_col in _numeric_columns(df):
-                sns.histplot(df[x_col].dropna(), bins=20, kde=True, ax=ax, color="#4ea8de")
-                ax.set_title(f"Distribution de '{x_col}'")
-            else:
-                counts = df[x_col].value_counts()
-                sns.barplot(x=counts.index, y=counts.values, ax=ax, color="#4ea8de")
-                ax.set_title(f"Répartition de '{x_col}' (catégoriel)")
-                ax.tick_params(axis='x', rotation=45)
-
-        elif vis_type == "Diagramme en barres (catégoriel)":
-            counts = df[x_col].value_counts().sort_values(ascending=False)
-            sns.barplot(x=counts.index, y=counts.values, ax=ax, color="#4ea8de")
+            ax.set_title(f"Répartition de '{x_col}' (catégoriel)")
+        else:
             ax.set_title(f"Diagramme en barres : '{x_col}'")
-            ax.tick_params(axis='x', rotation=45)
             ax.set_ylabel("Fréquence")
 
-        elif vis_type == "Boxplot (catégorie ↔ numérique)":
-            if x_col in _categorical_columns(df) and y_col in _numeric_columns(df):
-                sns.boxplot(x=df[x_col], y=df[y_col], ax=ax, palette="Set2")
-                ax.set_title(f"Boxplot : {y_col} par {x_col}")
-                ax.tick_params(axis='x', rotation=45)
-            else:
-                messagebox.showinfo("Info", "Choisissez une variable catégorielle pour X et une numérique pour Y.")
-                return
-
-        elif vis_type == "Nuage de points (2 numériques)":
-            if x_col == y_col:
-                messagebox.showinfo("Information", "Choisissez deux variables différentes pour le nuage de points.")
-                return
-            sns.scatterplot(data=df, x=x_col, y=y_col, ax=ax, color="#ff595e", edgecolor="black")
-            ax.set_title(f"Nuage de points : {x_col} vs {y_col}")
-
-        elif vis_type == "Heatmap de catégories":
-            if x_col not in _categorical_columns(df) or y_col not in _categorical_columns(df):
-                messagebox.showinfo("Info", "Les deux variables doivent être catégorielles.")
-                return
-            cross = pd.crosstab(df[x_col], df[y_col])
-            sns.heatmap(cross, annot=True, cmap="YlGnBu", ax=ax)
+    elif kind == "box":
+        boxes = ax.bxp(data, patch_artist=True)
+        for patch, color in zip(boxes["boxes"], sns.color_palette("Set2", len(data))):
+            patch.set_facecolor(color)
+        ax.set_ylabel(y_col)
+        ax.set_title(f"Boxplot : {y_col} par {x_col}")
+        ax.tick_params(axis='x', rotation=45)
+
+    elif kind == "scatter":
+        mode, points = data
+        if mode == "densité":
+            image, extent = points
+            shown = ax.imshow(np.ma.masked_equal(image, 0), origin="lower", extent=extent,
+                              aspect="auto", cmap="Reds", norm=LogNorm())
+            fig.colorbar(shown, ax=ax, label="Nombre de points")
+        else:
+            ax.scatter(*points, color="#ff595e", edgecolor="black", linewidth=0.3 if mode == "points" else 0,
+                       s=20 if mode == "points" else 4)
+        ax.set_ylabel(y_col)
+        suffix = "" if mode == "points" else f" ({mode})"
+        ax.set_title(f"Nuage de points : {x_col} vs {y_col}{suffix}")
+
+    elif kind == "crosstab":
+        if vis_type == "Heatmap de catégories":
+            sns.heatmap(data, annot=True, fmt="d", cmap="YlGnBu", ax=ax)
             ax.set_title(f"Heatmap : {x_col} vs {y_col}")
-
-        elif vis_type == "Comparaison groupée (2 catégories)":
-            if x_col not in _categorical_columns(df) or y_col not in _categorical_columns(df):
-                messagebox.showinfo("Info", "Les deux variables doivent être catégorielles.")
-                return
-            sns.countplot(x=x_col, hue=y_col, data=df, ax=ax, palette="husl")
+        else:
+            data.plot.bar(ax=ax, color=sns.color_palette("husl", data.shape[1]), width=0.8)
+            ax.legend(title=y_col)
+            ax.set_ylabel("count")
             ax.set_title(f"Comparaison groupée : {x_col} vs {y_col}")
             ax.tick_params(axis='x', rotation=45)
 
-        elif vis_type == "Matrice de corrélation":
-            num_cols = _numeric_columns(df)
-            if len(num_cols) < 2:
-                messagebox.showinfo("Info", "Pas assez de colonnes numériques pour une matrice de corrélation.")
-                return
-            corr = df[num_cols].corr()
-            sns.heatmap(corr, annot=True, cmap="coolwarm", ax=ax)
-            ax.set_title("Matrice de corrélation")
-
-        # --- Style global ---
-        ax.set_xlabel(x_col)
-        ax.grid(alpha=0.3)
-        plt.tight_layout()
-
-        # --- Intégration Tkinter ---
-        canvas = FigureCanvasTkAgg(fig, master=frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
-
-    except Exception as e:
-        messagebox.showerror("Erreur", f"Impossible d'afficher la visualisation : {e}")
+    elif kind == "corr":
+        corr, sampled = data
+        sns.heatmap(corr, annot=True, cmap="coolwarm", ax=ax)
+        ax.set_title("Matrice de corrélation" + (" (échantillon)" if sampled else ""))
+
+    # --- Style global ---
+    ax.set_xlabel(x_col)
+    ax.grid(alpha=0.3)
+
+
+class PlotView:
+    """
+    Zone graphique d'une fenêtre de visualisation : une seule figure, des axes et un
+    FigureCanvasTkAgg créés une fois puis réutilisés à chaque tracé (mémoire constante).
+    Les agrégats sont mis en cache (AGGREGATES) par (version du fichier source, type, x, y, budget).
+    """
+
+    def __init__(self, df: pd.DataFrame, frame, point_budget: int = POINT_BUDGET, source=None):
+        self.df = df
+        self.point_budget = point_budget
+        self.dataset = dataset_key(source)
+        self.shown = None
+
+        self.fig, self.ax = plt.subplots(figsize=(8, 5.5))
+        self.canvas = FigureCanvasTkAgg(self.fig, master=frame)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        # la figure appartient au canvas Tk : pyplot ne doit pas la garder en mémoire
+        plt.close(self.fig)
+
+    def _reset_axes(self):
+        """Vide les axes et supprime les barres de couleur ajoutées par le tracé précédent."""
+        # Colorbar.remove() rend aussi aux axes la place qu'elle leur avait prise
+        for mappable in self.ax.images + self.ax.collections:
+            if getattr(mappable, "colorbar", None) is not None:
+                mappable.colorbar.remove()
+        self.ax.clear()
+
+    def show(self, vis_type: str, x_col: str, y_col: str, quiet: bool = False):
+        """
+        Affiche le graphique demandé. quiet=True (changement de sélection dans un menu) :
+        une combinaison invalide est ignorée au lieu d'afficher un message.
+        """
+        key = (self.dataset, vis_type, x_col, y_col, self.point_budget)
+        if key == self.shown:
+            return
+
+        message = _check_selection(self.df, vis_type, x_col, y_col)
+        if message:
+            if not quiet:
+                messagebox.showinfo("Info", message)
+            return
+
+        try:
+            aggregate = AGGREGATES.get_or_compute(
+                key, lambda: _aggregate(self.df, vis_type, x_col, y_col, self.point_budget))
+            self._reset_axes()
+            _draw(self.fig, self.ax, vis_type, x_col, y_col, aggregate)
+            self.fig.tight_layout()
+            self.canvas.draw_idle()
+            self.shown = key
+        except Exception as e:
+            self.shown = None
+            messagebox.showerror("Erreur", f"Impossible d'afficher la visualisation : {e}")
@@ -0,0 +1,8 @@
+# conftest.py
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+DATA_DIR = os.path.join(SRC_DIR, "data")
+
+sys.path.insert(0, SRC_DIR)
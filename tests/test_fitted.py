@@ -0,0 +1,62 @@
+# test_fitted.py
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import cache
+from conftest import DATA_DIR
+from fitted import FittedPipeline
+from operations import fit_pipeline
+from writers import write_frame
+
+CHAINS = [
+    ("students_dirty.csv", ["missing", "label", "standardize"]),
+    ("students_dirty.csv", ["missing", "onehot", "normalize", "variance"]),
+    ("Student Mental health.csv", ["missing", "outliers", "label"]),
+    ("student-mat.csv", ["onehot", "standardize", "variance"]),
+    ("test.csv", ["missing", "normalize", "outliers"]),
+]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "cache"))
+
+
+def _in_memory(pipeline, path):
+    return pipeline.transform(cache.load_csv(path))
+
+
+@pytest.mark.parametrize("name, actions", CHAINS)
+def test_json_round_trip(tmp_path, name, actions):
+    path = os.path.join(DATA_DIR, name)
+    pipeline = fit_pipeline(path, actions)
+    saved = pipeline.save(str(tmp_path / "chain.pipeline.json"))
+    loaded = FittedPipeline.load(saved)
+    assert loaded.to_dict() == pipeline.to_dict()
+    with open(saved, encoding="utf-8") as f:
+        assert json.load(f) == pipeline.to_dict()
+    pd.testing.assert_frame_equal(_in_memory(loaded, path), _in_memory(pipeline, path))
+
+
+@pytest.mark.parametrize("chunksize", [3, 100_000])
+@pytest.mark.parametrize("name, actions", CHAINS)
+def test_transform_file_matches_in_memory(tmp_path, name, actions, chunksize):
+    path = os.path.join(DATA_DIR, name)
+    pipeline = FittedPipeline.load(fit_pipeline(path, actions).save(str(tmp_path / "chain.pipeline.json")))
+    expected_file = tmp_path / "memory.csv"
+    write_frame(_in_memory(pipeline, path), str(expected_file))
+    out = tmp_path / "chunks.csv"
+    n_rows = pipeline.transform_file(path, str(out), chunksize=chunksize)
+    got, expected = pd.read_csv(out), pd.read_csv(expected_file)
+    assert n_rows == len(expected)
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False, rtol=1e-9)
+
+
+def test_unknown_version_rejected(tmp_path):
+    data = fit_pipeline(os.path.join(DATA_DIR, "test.csv"), ["normalize"]).to_dict()
+    data["version"] = -1
+    with pytest.raises(ValueError):
+        FittedPipeline.from_dict(data)
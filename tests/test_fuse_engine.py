@@ -0,0 +1,59 @@
+# test_fuse_engine.py
+import os
+
+import pandas as pd
+import pytest
+
+import fuse_engine
+from conftest import DATA_DIR
+from fuse_engine import TEXT_OPTIONS, _canonical_key, fuse_files
+
+PAIRS = [
+    ("students_clean.csv", "students_dirty.csv"),    # concaténation, valeurs manquantes et doublons
+    ("client_p1.csv", "client_p2.csv"),              # concaténation
+    ("produit_info.csv", "produit_prix.csv"),        # jointure sur id_produit
+    ("students_dirty.csv", "Student Mental health.csv"),  # aucune colonne commune
+]
+
+
+def _fuse(file1, file2, out_path, streamed: bool, monkeypatch):
+    monkeypatch.setattr(fuse_engine, "STREAMING_THRESHOLD", -1 if streamed else float("inf"))
+    try:
+        result = fuse_files(file1, file2, str(out_path), confirm=lambda best: True)
+    except fuse_engine.FusionError as e:
+        return type(e), None
+    df = pd.read_csv(out_path, **TEXT_OPTIONS)
+    return result, df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("file1, file2", PAIRS)
+def test_streamed_fusion_matches_in_memory(tmp_path, monkeypatch, file1, file2):
+    file1, file2 = os.path.join(DATA_DIR, file1), os.path.join(DATA_DIR, file2)
+    in_memory, expected = _fuse(file1, file2, tmp_path / "memory.csv", False, monkeypatch)
+    streamed, got = _fuse(file1, file2, tmp_path / "streamed.csv", True, monkeypatch)
+    assert streamed == in_memory
+    if expected is not None:
+        pd.testing.assert_frame_equal(got, expected)
+
+
+def test_append_compares_raw_text(tmp_path, monkeypatch):
+    _, df = _fuse(os.path.join(DATA_DIR, "students_clean.csv"), os.path.join(DATA_DIR, "students_dirty.csv"),
+                  tmp_path / "out.csv", False, monkeypatch)
+    assert len(df) == 15
+    assert "20" in set(df["Age"]) and "20.0" not in set(df["Age"])
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_join_on_equivalent_numbers(tmp_path, monkeypatch, streamed):
+    left, right = tmp_path / "left.csv", tmp_path / "right.csv"
+    left.write_text("k,a\n1.50,x\n007,y\n.5,z\nabc,w\n", encoding="utf-8")
+    right.write_text("k,b\n1.5,p\n7.0,q\n0.5,r\nABC,s\n", encoding="utf-8")
+    result, df = _fuse(str(left), str(right), tmp_path / "out.csv", streamed, monkeypatch)
+    assert result["key"] == "k"
+    assert sorted(zip(df["k"], df["b"])) == [(".5", "r"), ("007", "q"), ("1.50", "p")]
+
+
+def test_canonical_key():
+    values = ["7", "07", "7.0", "+7", "-007.50", "1.50", ".5", "0", "-0.0", "abc", "", " 12 ", "1.2.3"]
+    assert _canonical_key(pd.Series(values)).tolist() == [
+        "7", "7", "7", "7", "-7.5", "1.5", "0.5", "0", "0", "abc", "", "12", "1.2.3"]
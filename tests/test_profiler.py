@@ -0,0 +1,76 @@
+# test_profiler.py
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import DATA_DIR
+from profiler import profile_file
+
+SOURCE = os.path.join(DATA_DIR, "student-mat.csv")
+
+# Champs exacts (ou issus d'esquisses fusionnées à l'identique) d'un profil de colonne ;
+# les quantiles et l'histogramme KLL dépendent de l'ordre de lecture
+EXACT_FIELDS = ["name", "kind", "count", "missing", "integer", "min", "max", "distinct", "top"]
+
+
+def _summary(profile) -> dict:
+    columns = [{key: col[key] for key in EXACT_FIELDS if key in col} for col in profile["columns"]]
+    moments = [(col.get("mean"), col.get("std")) for col in profile["columns"]]
+    return {"n_rows": profile["n_rows"], "n_cols": profile["n_cols"], "columns": columns,
+            "duplicates": profile["duplicates"], "alerts": profile["alerts"]}, moments
+
+
+def _assert_same_profile(got, expected):
+    (got, got_moments), (expected, expected_moments) = _summary(got), _summary(expected)
+    assert got == expected
+    for (mean, std), (mean_ref, std_ref) in zip(got_moments, expected_moments):
+        assert mean == pytest.approx(mean_ref, rel=1e-12, nan_ok=True)
+        assert std == pytest.approx(std_ref, rel=1e-9, nan_ok=True)
+
+
+def _split_copy(tmp_path, head_rows):
+    """Copie du CSV limitée à ses head_rows premières lignes, et le texte des lignes restantes."""
+    with open(SOURCE, encoding="utf-8") as f:
+        lines = f.readlines()
+    path = tmp_path / "data.csv"
+    path.write_text("".join(lines[:head_rows + 1]), encoding="utf-8")
+    return str(path), "".join(lines[head_rows + 1:])
+
+
+@pytest.mark.parametrize("mode", ["minimal", "sampled"])
+def test_appended_rows_match_full_profile(tmp_path, mode):
+    path, rest = _split_copy(tmp_path, 200)
+    state = str(tmp_path / "data_report.state")
+    assert profile_file(path, mode, chunksize=64, state_file=state)["update"] == {"kind": "full"}
+    assert profile_file(path, mode, chunksize=64, state_file=state)["update"] == {"kind": "unchanged"}
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(rest)
+    incremental = profile_file(path, mode, chunksize=64, state_file=state)
+    assert incremental["update"] == {"kind": "append", "new_rows": 195}
+    _assert_same_profile(incremental, profile_file(path, mode, chunksize=64))
+
+
+def test_rewritten_column_matches_full_profile(tmp_path):
+    path, _ = _split_copy(tmp_path, 395)
+    state = str(tmp_path / "data_report.state")
+    profile_file(path, "sampled", chunksize=64, state_file=state)
+
+    df = pd.read_csv(path)
+    df["absences"] = df["absences"] * 2
+    df.loc[df["school"] == "MS", "school"] = "XX"
+    df.to_csv(path, index=False)
+    incremental = profile_file(path, "sampled", chunksize=64, state_file=state)
+    assert incremental["update"] == {"kind": "columns", "columns": ["school", "absences"]}
+    _assert_same_profile(incremental, profile_file(path, "sampled", chunksize=64))
+
+
+def test_incompatible_state_rebuilds(tmp_path):
+    path, _ = _split_copy(tmp_path, 100)
+    state = str(tmp_path / "data_report.state")
+    profile_file(path, "minimal", state_file=state)
+    # autre mode : l'état est ignoré ; fichier tronqué : tout est recalculé
+    assert profile_file(path, "sampled", state_file=state)["update"] == {"kind": "full"}
+    path, _ = _split_copy(tmp_path, 50)
+    assert profile_file(path, "sampled", state_file=state)["update"] == {"kind": "full"}
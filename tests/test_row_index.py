@@ -0,0 +1,74 @@
+# test_row_index.py
+import os
+
+import pandas as pd
+import pytest
+
+from row_index import TEXT_OPTIONS, RowIndex
+
+
+def _write(tmp_path, n_rows: int, trailing_newline: bool) -> str:
+    lines = ["id,name"] + [f"{i},row {i}" for i in range(n_rows)]
+    path = tmp_path / "rows.csv"
+    path.write_text("\n".join(lines) + ("\n" if trailing_newline else ""), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+@pytest.mark.parametrize("n_rows", [10, 257, 600])
+def test_read_rows_matches_read_csv(tmp_path, n_rows, trailing_newline):
+    path = _write(tmp_path, n_rows, trailing_newline)
+    expected = pd.read_csv(path, **TEXT_OPTIONS)
+    index = RowIndex.open(path, stride=256)
+    try:
+        assert index.n_rows == n_rows
+        ranges = [(0, n_rows), (n_rows - 2, n_rows - 1), (n_rows - 1, n_rows), (n_rows - 1, n_rows + 5)]
+        ranges += [(s, s + 1) for s in (0, 255, 256) if s < n_rows]
+        for start, stop in ranges:
+            got = index.read_rows(start, stop)
+            pd.testing.assert_frame_equal(got, expected.iloc[start:stop])
+    finally:
+        index.close()
+
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+def test_take_last_page(tmp_path, trailing_newline):
+    path = _write(tmp_path, 257, trailing_newline)
+    expected = pd.read_csv(path, **TEXT_OPTIONS)
+    index = RowIndex.open(path, stride=256)
+    try:
+        rows = [256, 0, 255, 128]
+        pd.testing.assert_frame_equal(index.take(rows), expected.loc[rows])
+    finally:
+        index.close()
+
+
+def test_reloaded_index_reads_appended_rows(tmp_path):
+    path = _write(tmp_path, 300, True)
+    RowIndex.open(path, stride=256).close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("300,row 300\n301,row 301")
+    index = RowIndex.open(path, stride=256)
+    try:
+        assert index.n_rows == 302
+        pd.testing.assert_frame_equal(index.read_rows(299, 302), pd.read_csv(path, **TEXT_OPTIONS).iloc[299:302])
+    finally:
+        index.close()
+
+
+def test_build_indexes_skips_fresh_index(tmp_path):
+    from row_index import build_indexes, index_is_fresh, index_path
+    path = _write(tmp_path, 50, True)
+    assert not index_is_fresh(path)
+    build_indexes([path])
+    assert index_is_fresh(path)
+    saved = os.stat(index_path(path)).st_mtime_ns
+    build_indexes([path])
+    assert os.stat(index_path(path)).st_mtime_ns == saved
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("50,row 50\n")
+    os.utime(path, ns=(saved + 10 ** 9, saved + 10 ** 9))
+    assert not index_is_fresh(path)
+    build_indexes([path])
+    assert RowIndex.load(path).n_complete == 51
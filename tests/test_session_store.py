@@ -0,0 +1,91 @@
+# test_session_store.py
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from jobs import Cancelled
+from session_store import SessionStore
+
+
+class _Progress:
+    """Progression d'une tâche annulée : chaque étape lève Cancelled."""
+
+    def __init__(self, cancelled=False):
+        self.cancelled = cancelled
+
+    def stage(self, *args, **kwargs):
+        if self.cancelled:
+            raise Cancelled()
+
+
+def _file(tmp_path, name="a.csv"):
+    path = tmp_path / name
+    path.write_text("a\n1\n", encoding="utf-8")
+    return str(path)
+
+
+def test_cancelled_load_is_retried_by_waiters(tmp_path):
+    path = _file(tmp_path)
+    started = threading.Event()
+    calls = []
+
+    def loader(p, progress=None):
+        calls.append(progress)
+        if len(calls) == 1:
+            started.set()
+            time.sleep(0.2)
+            progress.stage("lecture")  # tâche A annulée pendant la lecture
+        return pd.DataFrame({"a": [1]})
+
+    store = SessionStore(loader, budget=1 << 30)
+    results = {}
+
+    def job_a():
+        try:
+            store.acquire(path, progress=_Progress(cancelled=True))
+        except Cancelled:
+            results["a"] = "annulée"
+
+    def job_b():
+        started.wait()
+        results["b"] = store.acquire(path, progress=_Progress())
+
+    threads = [threading.Thread(target=job_a), threading.Thread(target=job_b)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results["a"] == "annulée"
+    assert list(results["b"]["a"]) == [1]
+    assert len(calls) == 2
+    assert store._entries[path].refs == 1
+
+
+def test_cancel_on_memory_hit_releases_reference(tmp_path):
+    path = _file(tmp_path)
+    store = SessionStore(lambda p, progress=None: pd.DataFrame({"a": [1]}), budget=1 << 30)
+    store.acquire(path)
+    with pytest.raises(Cancelled):
+        store.acquire(path, progress=_Progress(cancelled=True))
+    assert store._entries[path].refs == 1
+
+
+def test_release_does_not_wait_for_other_load(tmp_path):
+    slow, other = _file(tmp_path, "slow.csv"), _file(tmp_path, "other.csv")
+
+    def loader(p, progress=None):
+        if p == slow:
+            time.sleep(0.5)
+        return pd.DataFrame({"a": [1]})
+
+    store = SessionStore(loader, budget=1 << 30)
+    store.acquire(other)
+    thread = threading.Thread(target=store.acquire, args=(slow,))
+    thread.start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    store.release(other)
+    assert time.perf_counter() - start < 0.2
+    thread.join()
@@ -0,0 +1,94 @@
+# test_sketches.py
+import numpy as np
+import pytest
+
+from sketches import HyperLogLog, KLLSketch, MinHash
+
+QUANTILES = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+
+def _hashes(values) -> np.ndarray:
+    """Hachages 64 bits bien répartis (multiplication de Fibonacci, mélange de bits)."""
+    x = np.asarray(values, dtype="uint64") * np.uint64(0x9E3779B97F4A7C15)
+    x ^= x >> np.uint64(31)
+    return x * np.uint64(0xBF58476D1CE4E5B9)
+
+
+def _rank_error(sketch, values):
+    values = np.sort(values)
+    ranks = np.searchsorted(values, sketch.quantile(QUANTILES), side="right") / len(values)
+    return np.max(np.abs(ranks - QUANTILES))
+
+
+def test_kll_exact_below_capacity():
+    values = np.random.default_rng(1).normal(size=150)
+    sketch = KLLSketch()
+    sketch.update(values)
+    assert sketch.quantile(0.0) == values.min() and sketch.quantile(1.0) == values.max()
+    assert _rank_error(sketch, values) <= 1 / len(values)
+
+
+@pytest.mark.parametrize("chunk", [1_000, 100_000])
+def test_kll_rank_error(chunk):
+    values = np.random.default_rng(2).lognormal(size=200_000)
+    sketch = KLLSketch()
+    for start in range(0, len(values), chunk):
+        sketch.update(values[start:start + chunk])
+    assert sketch.n == len(values)
+    assert _rank_error(sketch, values) < 0.02
+    assert sum(len(level) for level in sketch.levels) < 3 * sketch.k
+
+
+def test_kll_merge_matches_single_sketch():
+    values = np.random.default_rng(3).uniform(size=100_000)
+    parts = [KLLSketch(seed=i) for i in range(4)]
+    for part, block in zip(parts, np.array_split(values, 4)):
+        part.update(block)
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    assert merged.n == len(values)
+    assert _rank_error(merged, values) < 0.02
+
+
+def test_kll_histogram_counts_all_values():
+    values = np.random.default_rng(4).normal(size=50_000)
+    sketch = KLLSketch()
+    sketch.update(values)
+    counts, edges = sketch.histogram(10, (values.min(), values.max()))
+    expected, _ = np.histogram(values, bins=edges)
+    assert counts.sum() == pytest.approx(len(values))
+    assert np.abs(counts - expected).max() < 0.02 * len(values)
+
+
+@pytest.mark.parametrize("n", [10, 1_000, 200_000])
+def test_hll_count(n):
+    hll = HyperLogLog()
+    hll.update(_hashes(np.arange(n)))
+    hll.update(_hashes(np.arange(n // 2)))  # doublons : ne changent pas l'estimation
+    assert hll.count() == pytest.approx(n, rel=0.03)
+
+
+def test_hll_merge_is_union():
+    left, right, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    left.update(_hashes(np.arange(0, 60_000)))
+    right.update(_hashes(np.arange(40_000, 100_000)))
+    union.update(_hashes(np.arange(0, 100_000)))
+    assert np.array_equal(left.merge(right).registers, union.registers)
+
+
+@pytest.mark.parametrize("overlap", [0, 250, 500, 1_000])
+def test_minhash_jaccard(overlap):
+    a, b = MinHash(), MinHash()
+    a.update(_hashes(np.arange(0, 1_000)))
+    b.update(_hashes(np.arange(1_000 - overlap, 2_000 - overlap)))
+    expected = overlap / (2_000 - overlap)
+    assert a.jaccard(b) == pytest.approx(expected, abs=0.15)
+
+
+def test_minhash_merge_is_union():
+    left, right, union = MinHash(), MinHash(), MinHash()
+    left.update(_hashes(np.arange(0, 5_000)))
+    right.update(_hashes(np.arange(3_000, 20_000)))
+    union.update(_hashes(np.arange(0, 20_000)))  # plus grand que MinHash.BATCH
+    assert np.array_equal(left.merge(right).signature, union.signature)
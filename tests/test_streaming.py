@@ -0,0 +1,114 @@
+# test_streaming.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cache
+import operations
+from conftest import DATA_DIR
+from fitted import pipeline_path
+from operations import apply_pipeline, run_preprocessing
+from streaming import ColumnAccumulator, collect_stats, iter_chunks
+
+SAMPLES = ["students_clean.csv", "students_dirty.csv", "test.csv", "test_variance_th.csv",
+           "client_p1.csv", "produit_prix.csv", "Student Mental health.csv", "student-mat.csv"]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "cache"))
+
+
+def _run(path, action, out_path, streamed: bool, monkeypatch):
+    monkeypatch.setattr(operations, "STREAMING_THRESHOLD", -1 if streamed else float("inf"))
+    done = run_preprocessing(path, action, str(out_path))
+    return done, pd.read_csv(out_path) if done else None
+
+
+# ---------------------------
+# Accumulateur (fusion de Chan)
+# ---------------------------
+@pytest.mark.parametrize("chunksize", [1, 7, 100_000])
+def test_accumulator_matches_numpy(chunksize):
+    path = os.path.join(DATA_DIR, "student-mat.csv")
+    df = pd.read_csv(path)
+    stats = collect_stats(path, chunksize=chunksize)
+    for col in ["age", "absences", "G1", "G3"]:
+        values = df[col].to_numpy(dtype="float64")
+        acc = stats[col]
+        assert acc.n_rows == len(df) and acc.n_missing == 0
+        assert acc.mean == pytest.approx(values.mean(), rel=1e-12)
+        assert acc.variance == pytest.approx(values.var(), rel=1e-9)
+        assert (acc.min, acc.max) == (values.min(), values.max())
+    for col in ["school", "Mjob"]:
+        assert stats[col].counts.astype("int64").sort_index().equals(df[col].value_counts().sort_index())
+
+
+def test_accumulator_counts_tokens_as_missing():
+    acc = ColumnAccumulator("x")
+    acc.update(pd.Series(["a", "?", "b", None]))
+    acc.update(pd.Series(["", "a"]))
+    assert acc.n_rows == 6 and acc.n_missing == 3
+    assert acc.counts.to_dict() == {"a": 2, "b": 1}
+
+
+def test_chunks_match_read_csv():
+    path = os.path.join(DATA_DIR, "student-mat.csv")
+    chunks = pd.concat(iter_chunks(path, chunksize=50), ignore_index=True)
+    pd.testing.assert_frame_equal(chunks, pd.read_csv(path))
+
+
+def test_mixed_column_recounted():
+    # « Score » : texte dans le premier morceau (« » ), entiers ensuite
+    path = os.path.join(DATA_DIR, "students_dirty.csv")
+    acc = collect_stats(path, chunksize=4)["Score"]
+    expected = pd.read_csv(path, dtype=object)["Score"]
+    assert not acc.is_numeric
+    assert acc.counts.sum() + acc.n_missing == len(expected)
+    assert acc.mode == expected.value_counts().idxmax()
+
+
+# ---------------------------
+# Streaming ↔ mémoire
+# ---------------------------
+@pytest.mark.parametrize("action", ["missing", "normalize", "standardize"])
+@pytest.mark.parametrize("name", SAMPLES)
+def test_streamed_matches_in_memory(tmp_path, monkeypatch, name, action):
+    path = os.path.join(DATA_DIR, name)
+    in_memory, expected = _run(path, action, tmp_path / "memory.csv", False, monkeypatch)
+    streamed, got = _run(path, action, tmp_path / "streamed.csv", True, monkeypatch)
+    assert streamed == in_memory
+    if expected is not None:
+        pd.testing.assert_frame_equal(got, expected, check_dtype=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("name", SAMPLES)
+def test_streamed_outliers_close_to_in_memory(tmp_path, monkeypatch, name):
+    # quartiles de l'esquisse KLL (rang) et de pandas (interpolation) : seules quelques
+    # valeurs extrêmes sont écrêtées à des bornes différentes, dans l'étendue des données
+    path = os.path.join(DATA_DIR, name)
+    original = pd.read_csv(path)
+    _, expected = _run(path, "outliers", tmp_path / "memory.csv", False, monkeypatch)
+    _, got = _run(path, "outliers", tmp_path / "streamed.csv", True, monkeypatch)
+    assert list(got.columns) == list(expected.columns) and got.shape == expected.shape
+    for col in got.columns:
+        if not pd.api.types.is_numeric_dtype(original[col]):
+            assert got[col].equals(expected[col])
+            continue
+        a, b, before = (s.to_numpy(dtype="float64") for s in (got[col], expected[col], original[col]))
+        differs = ~np.isclose(a, b, rtol=1e-9, equal_nan=True)
+        assert differs.mean() <= 0.1
+        assert (np.nanmin(before) <= a[differs]).all() and (a[differs] <= np.nanmax(before)).all()
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+@pytest.mark.parametrize("action", ["missing", "normalize", "standardize", "outliers"])
+def test_pipeline_replays_result(tmp_path, monkeypatch, action, streamed):
+    path = os.path.join(DATA_DIR, "students_dirty.csv")
+    out = tmp_path / "out.csv"
+    _, expected = _run(path, action, out, streamed, monkeypatch)
+    replayed = tmp_path / "replayed.csv"
+    assert apply_pipeline(pipeline_path(str(out)), path, str(replayed), chunksize=3) == len(expected)
+    pd.testing.assert_frame_equal(pd.read_csv(replayed), expected, check_dtype=False, rtol=1e-9)
@@ -0,0 +1,94 @@
+# test_writers.py
+import os
+
+import pandas as pd
+import pytest
+
+import cache
+import writers
+from conftest import DATA_DIR
+from formats import COLUMNAR, FORMATS, available_formats, data_size, decompressed, part_files
+from jobs import Cancelled
+from streaming import iter_chunks
+from writers import open_writer, write_frame
+
+SOURCE = os.path.join(DATA_DIR, "student-mat.csv")
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "cache"))
+
+
+def _same_values(got, expected):
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_dtype=False, check_categorical=False)
+
+
+@pytest.mark.parametrize("background", [False, True])
+@pytest.mark.parametrize("fmt", available_formats())
+def test_chunked_write_matches_in_memory(tmp_path, monkeypatch, fmt, background):
+    monkeypatch.setattr(writers, "PART_ROWS", 150)  # plusieurs parties pour .parts
+    df = cache.load_csv(SOURCE)
+    out = str(tmp_path / f"out{FORMATS[fmt]}")
+    with open_writer(out, background=background) as writer:
+        for start in range(0, len(df), 100):
+            writer.write(df.iloc[start:start + 100])
+    assert writer.n_rows == len(df)
+    if fmt == "parts":
+        assert len(part_files(out)) == 2  # 200 + 195 lignes
+    _same_values(cache.load_csv(out), df)
+    _same_values(pd.concat(iter_chunks(out, chunksize=64), ignore_index=True), df)
+
+
+@pytest.mark.parametrize("fmt", [fmt for fmt in available_formats() if fmt not in COLUMNAR])
+def test_csv_text_is_to_csv(tmp_path, fmt):
+    # CSV brut ou compressé : une fois décompressé, octet pour octet le texte de df.to_csv
+    df = pd.read_csv(SOURCE)
+    out = str(tmp_path / f"out{FORMATS[fmt]}")
+    write_frame(df, out)
+    expected = tmp_path / "expected.csv"
+    df.to_csv(expected, index=False)
+    with open(out, "rb") as raw:
+        assert decompressed(out, raw).read() == expected.read_bytes()
+
+
+@pytest.mark.parametrize("fmt", available_formats())
+def test_empty_frame_keeps_columns(tmp_path, fmt):
+    df = pd.read_csv(SOURCE).iloc[:0]
+    out = str(tmp_path / f"out{FORMATS[fmt]}")
+    write_frame(df, out)
+    assert list(cache.load_csv(out).columns) == list(df.columns)
+
+
+@pytest.mark.parametrize("background", [False, True])
+@pytest.mark.parametrize("fmt", available_formats())
+def test_failure_removes_output(tmp_path, fmt, background):
+    df = pd.read_csv(SOURCE)
+    out = str(tmp_path / f"out{FORMATS[fmt]}")
+    with pytest.raises(Cancelled):
+        with open_writer(out, background=background) as writer:
+            writer.write(df.iloc[:100])
+            raise Cancelled()
+    assert not os.path.exists(out)
+
+
+def test_cancelled_write_frame_removes_output(tmp_path, monkeypatch):
+    monkeypatch.setattr(writers, "WRITE_ROWS", 50)
+    calls = []
+    out = str(tmp_path / "out.csv")
+    with pytest.raises(Cancelled):
+        write_frame(pd.read_csv(SOURCE), out, cancel=lambda: calls.append(1) or len(calls) > 2)
+    assert not os.path.exists(out)
+
+
+def test_cache_round_trip(tmp_path):
+    # au-delà de MIN_CACHE_SIZE : la seconde lecture vient du cache binaire
+    big = str(tmp_path / "big.csv")
+    df = pd.read_csv(SOURCE)
+    write_frame(pd.concat([df] * (cache.MIN_CACHE_SIZE // data_size(SOURCE) + 2), ignore_index=True), big)
+    first = cache.load_csv(big)
+    assert os.path.exists(cache._cache_path(big))
+    second = cache.load_csv(big)
+    pd.testing.assert_frame_equal(second, first)
+    _same_values(first, pd.read_csv(big))